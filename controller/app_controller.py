@@ -1,16 +1,31 @@
 # controller/app_controller.py
 
 import threading
+import warnings
 import tkinter as tk
 from tkinter import messagebox
 import numpy as np
 import os
+import tempfile
 
 from model.data_models import (
     ProcessingParameters, ProcessingResults,
     SensorSettings, FFTResult
 )
 from processor.fft_processor import FFTProcessor
+from processor.tacho import shaft_frequency, shaft_revolutions
+from processor.order_tracking import compute_order_tracking
+from processor.campbell import campbell_map
+from processor.tsa import time_synchronous_average
+from processor.frame_transform import rotating_to_stationary, transform_channel_names
+from processor.order_slices import extract_order_slices, order_slice_table_text
+from processor.signal_cache import CleanedSignalCache, cleaned_signal_key
+from processor.feature_store import FeatureStore, DEFAULT_ENVELOPE_BAND, compute_feature_tracks, feature_table_text
+from processor.vk2_batch import run_vk2_batch, VK2_CHANNEL_SUFFIX
+from processor.csd_matrix import compute_csd_matrix
+from processor.ods import extract_ods, ods_table_text
+from processor.uff_export import export_processing_results, UFF_KINDS
+from processor.modal_fit import fit_modal_parameters, modal_table_rows, correct_exponential_window
 from view.main_window import MainWindow
 from view.dialogs import SensorSettingsDialog
 
@@ -59,6 +74,26 @@ class AppController:
         # 修改：频谱/OMA分析的时间范围设置 (按文件存储)
         self.truncation_settings = {}
 
+        # 最近一次模态识别结果 {'rows': [...], 'fits': {...}}
+        self.modal_results = None
+        # 最近一次 ODS 结果
+        self.ods_results = None
+        # 最近一次阶次跟踪结果
+        self.order_results = None
+        # 各文件的瀑布图 / 坎贝尔图结果
+        self.campbell_results = {}   # {文件名: 瀑布图结果}，见 compute_campbell
+        # 各文件的时间同步平均结果
+        self.tsa_results = {}
+        # 最近一次批量阶次切片结果 {文件名: {...}}
+        self.order_slice_results = {}
+        # VK2 清洗后时域信号缓存（超出内存上限的条目写入临时目录）
+        self.cleaned_signal_cache = CleanedSignalCache(
+            spill_dir=os.path.join(tempfile.gettempdir(), 'nvh_vk2_cache'))
+        # 全部文件 × 通道的时域特征曲线（处理完成后在后台计算），及其窗长（秒）
+        self.feature_store = FeatureStore()
+        self.feature_window_seconds = 0.01
+        self.feature_envelope_band = DEFAULT_ENVELOPE_BAND
+
         # 2) 新增: 全局参数管理器 (多级键)
         self.global_values = GlobalValues()  # 全局/文件/通道 配置都保存在这里
         
@@ -85,6 +120,31 @@ class AppController:
             messagebox.showwarning("警告", "无法确定通道数！")
             return None
 
+        integrate_acceleration = self.view.integrate_accel_var.get()
+        try:
+            integration_highpass = float(self.view.integration_highpass_var.get())
+        except ValueError:
+            messagebox.showwarning("警告", "积分高通截止频率必须是数字！")
+            return None
+        differentiate_displacement = self.view.differentiate_disp_var.get()
+        try:
+            differentiation_lowpass = float(self.view.differentiation_lowpass_var.get() or 0)
+        except ValueError:
+            messagebox.showwarning("警告", "微分低通截止频率必须是数字！")
+            return None
+        try:
+            frf_nperseg = int(self.view.frf_nperseg_var.get())
+        except ValueError:
+            messagebox.showwarning("警告", "FRF 帧长必须是整数！")
+            return None
+        impact_test = self.view.impact_test_var.get()
+        try:
+            impact_record_time = float(self.view.impact_record_time_var.get())
+            impact_trigger_level = float(self.view.impact_trigger_level_var.get())
+        except ValueError:
+            messagebox.showwarning("警告", "力锤记录时长和触发阈值必须是数字！")
+            return None
+
         sensor_settings = self.get_sensor_settings(
             num_channels, self.view.output_folder_var.get()
         )
@@ -96,7 +156,15 @@ class AppController:
             output_folder=self.view.output_folder_var.get(),
             filename_prefix=self.view.filename_prefix_var.get(),
             sampling_rate=sampling_rate,
-            sensor_settings=sensor_settings
+            sensor_settings=sensor_settings,
+            integrate_acceleration=integrate_acceleration,
+            integration_highpass=integration_highpass,
+            differentiate_displacement=differentiate_displacement,
+            differentiation_lowpass=differentiation_lowpass,
+            frf_nperseg=frf_nperseg,
+            impact_test=impact_test,
+            impact_record_time=impact_record_time,
+            impact_trigger_level=impact_trigger_level
         )
 
         errors = params.validate()
@@ -118,6 +186,14 @@ class AppController:
     def processing_finished(self, results):
         """Processor 处理完回调此方法，更新 View。"""
         self.processing_results = results
+        self.modal_results = None
+        self.ods_results = None
+        self.order_results = None
+        self.campbell_results = {}
+        self.tsa_results = {}
+        self.order_slice_results = {}
+        self.cleaned_signal_cache.clear()
+        self.feature_store.clear()
 
         self.channel_options = self._collect_channels_from_results(results)
 
@@ -125,6 +201,7 @@ class AppController:
         self.view.update_visualization_options(results)
         self.view.enable_user_define_button(True)
         self.view.refresh_global_params_tab()
+        self.start_feature_tracks()
 
 
     def _collect_channels_from_results(self, results):
@@ -221,11 +298,24 @@ class AppController:
             # 如果在原始文件中未找到匹配的通道
             return None
 
-    def get_frf_result(self, file_name, sensor_name):
+    def _select_frf_estimator(self, frf_item, estimator):
+        """按所选估计器 (H1/H2/Hv) 返回带有对应幅值 / 相位的 FRF 结果副本。"""
+        estimators = frf_item.get('estimators')
+        if not estimators or estimator not in estimators:
+            return frf_item
+        selected = dict(frf_item)
+        selected['H_f_magnitude'] = np.abs(estimators[estimator])
+        selected['H_f_phase'] = np.angle(estimators[estimator])
+        selected['estimator'] = estimator
+        return selected
+
+    def get_frf_result(self, file_name, sensor_name, estimator='H1', ref_name=None):
         """
         获取频响函数结果。
         对于原始文件，查找预计算结果。
         对于截断文件，实时计算FRF。
+        estimator 选择 'H1' / 'H2' / 'Hv'，结果中同时带有相干函数 'coherence'。
+        ref_name 指定多参考 FRF 矩阵中的输入通道；为 None 时取该输出通道的第一个输入。
         """
         if not self.processing_results:
             return None
@@ -243,30 +333,15 @@ class AppController:
 
         # 检查是否是截断文件
         if target_file_entry.get('is_truncated', False):
-            # --- 处理截断文件：实时计算 FRF ---
-            self.log_message(f"信息：正在为截断文件 '{file_name}' 实时计算通道 '{sensor_name}' 的 FRF...\n")
-            
+            # --- 处理截断文件：首次请求时一次性批量计算所有输出通道的 FRF 并缓存 ---
             channels_data = target_file_entry.get('channels')
             sampling_rate = target_file_entry.get('sampling_rate')
-            
+
             if not channels_data or sampling_rate is None:
                  self.log_message(f"错误：截断文件 '{file_name}' 缺少通道数据或采样率信息\n")
                  return None
-                 
-            # 寻找输入通道数据
-            input_channel_data = None
-            input_channel_name = None
-            for ch_name, ch_info in channels_data.items():
-                if ch_info.get('is_input', False):
-                    input_channel_data = ch_info.get('data')
-                    input_channel_name = ch_name
-                    break
-                    
-            if input_channel_data is None:
-                 self.log_message(f"错误：在截断文件 '{file_name}' 中未找到标记为输入的通道数据\n")
-                 return None
-                 
-            # 寻找请求的输出通道数据
+
+            # 检查请求的输出通道
             output_channel_info = channels_data.get(sensor_name)
             if not output_channel_info:
                 self.log_message(f"错误：在截断文件 '{file_name}' 中未找到请求的输出通道 '{sensor_name}'\n")
@@ -274,42 +349,371 @@ class AppController:
             if output_channel_info.get('is_input', False):
                 self.log_message(f"警告：不能计算输入通道 '{sensor_name}' 对自身的FRF\n")
                 return None
-                
-            output_channel_data = output_channel_info.get('data')
-            if output_channel_data is None:
-                 self.log_message(f"错误：通道 '{sensor_name}' 在截断文件 '{file_name}' 中缺少时域数据\n")
-                 return None
-                 
-            # 调用 Processor 进行计算
-            processor = FFTProcessor(self.params, self.view.log_text, self)
-            try:
-                frf_calc_result = processor.calculate_frf_from_data(
-                    input_channel_data,
-                    output_channel_data,
-                    sampling_rate
-                )
-            except Exception as e:
-                 self.log_message(f"错误：实时计算FRF时出错: {e}\n")
-                 return None
-                 
-            if frf_calc_result is None:
-                 self.log_message(f"错误：实时FRF计算未能返回有效结果。\n")
-                 return None
-                 
-            # 添加通道名称并返回
-            frf_calc_result['name'] = sensor_name 
-            return frf_calc_result
-            
+
+            cached_frfs = self._truncated_frf_items(target_file_entry)
+            if cached_frfs is None:
+                return None
+
+            frf_item = self._find_frf_item(cached_frfs, sensor_name, ref_name)
+            if frf_item is None:
+                self.log_message(f"错误：通道 '{sensor_name}' 在截断文件 '{file_name}' 中缺少可用于FRF的时域数据\n")
+                return None
+            return self._select_frf_estimator(frf_item, estimator)
+
         else:
             # --- 处理原始文件：查找预计算结果 --- 
-            frf_list = target_file_entry.get('frf_results', [])
-            for item in frf_list:
-                if item['name'] == sensor_name:
-                    return item
+            frf_item = self._find_frf_item(target_file_entry.get('frf_results', []), sensor_name, ref_name)
+            if frf_item is not None:
+                return self._select_frf_estimator(frf_item, estimator)
             # 如果原始文件没有预计算的FRF结果（例如没有设置参考通道）
             # self.log_message(f"警告：原始文件 '{file_name}' 未包含通道 '{sensor_name}' 的预计算FRF结果。\n")
             return None
 
+    def _truncated_frf_items(self, file_entry):
+        """
+        截断结果集的 FRF 列表：首次请求时批量计算全部通道并缓存。
+        缓存按 FRF 估计参数区分；估计器 (H1/H2/Hv) 在同一次计算中全部得到。
+        """
+        frf_cache = file_entry.setdefault('frf_cache', {})
+        settings_key = (self.params.frf_nperseg, self.params.frf_overlap)
+        cached_frfs = frf_cache.get(settings_key)
+        if cached_frfs is None:
+            cached_frfs = self._compute_truncated_frfs(file_entry['file_name'], file_entry.get('channels'))
+            if cached_frfs is None:
+                return None
+            frf_cache[settings_key] = cached_frfs
+        return cached_frfs
+
+    def _find_frf_item(self, frf_list, sensor_name, ref_name=None):
+        """在 FRF 列表中查找 (输出, 输入) 对；ref_name 为 None 时返回该输出的第一项。"""
+        for item in frf_list:
+            if item['name'] == sensor_name and (ref_name is None or item.get('ref_name') == ref_name):
+                return item
+        return None
+
+    def _compute_truncated_frfs(self, file_name, channels_data):
+        """
+        对截断结果集的所有输出通道做一次批量 FRF 计算（多个输入通道时估计 FRF 矩阵）。
+        返回按 (输出, 输入) 展开的 frf_item 列表，失败时返回 None。
+        """
+        self.log_message(f"信息：正在为截断文件 '{file_name}' 批量计算所有通道的 FRF...\n")
+
+        # 寻找输入通道数据
+        input_names = [
+            ch_name for ch_name, ch_info in channels_data.items()
+            if ch_info.get('is_input', False) and ch_info.get('data') is not None
+        ]
+        if not input_names:
+            self.log_message(f"错误：在截断文件 '{file_name}' 中未找到标记为输入的通道数据\n")
+            return None
+        n_samples = len(channels_data[input_names[0]]['data'])
+
+        output_names = [
+            ch_name for ch_name, ch_info in channels_data.items()
+            if not ch_info.get('is_input', False) and ch_info.get('data') is not None
+            and len(ch_info['data']) == n_samples
+        ]
+        if not output_names:
+            self.log_message(f"错误：截断文件 '{file_name}' 中没有可计算FRF的输出通道\n")
+            return None
+
+        # 从互谱矩阵缓存中取出 FRF（与相干函数 / FDD 共用同一次 FFT）
+        try:
+            csm = self.get_csd_matrix(file_name)
+            if csm is None:
+                return None
+            frf_list = FFTProcessor.frf_items_from_estimate(
+                csm.frf(input_names, output_names), input_names, output_names
+            )
+        except Exception as e:
+            self.log_message(f"错误：实时计算FRF时出错: {e}\n")
+            return None
+
+        if not frf_list:
+            self.log_message(f"错误：实时FRF计算未能返回有效结果。\n")
+            return None
+        return frf_list
+
+    def _file_channel_arrays(self, file_entry, apply_truncation=None):
+        """
+        返回文件条目中所有带时域数据的通道 (names, data (C, N), fs)。
+        原始文件在勾选“应用截断”时按文件的截断范围取数据段；在后台线程调用时由调用方
+        先在界面线程读取勾选状态并经 apply_truncation 传入（Tk 变量只能在界面线程读取）。
+        """
+        if apply_truncation is None:
+            apply_truncation = self.view.apply_truncation_to_spectrum_var.get()
+        if file_entry.get('is_truncated', False):
+            fs = file_entry.get('sampling_rate')
+            items = [(name, info.get('data')) for name, info in file_entry.get('channels', {}).items()]
+            start_idx, end_idx = 0, None
+        else:
+            fs = self.params.sampling_rate
+            items = [(e['fft_result'].name, e.get('data_converted')) for e in file_entry.get('fft_results', [])]
+            start_idx, end_idx = 0, None
+            truncation_range = self.truncation_settings.get(file_entry['file_name'])
+            if truncation_range and apply_truncation:
+                start_idx = int(truncation_range['start_sec'] * fs)
+                end_idx = int(truncation_range['end_sec'] * fs) + 1
+
+        items = [(name, data) for name, data in items if data is not None]
+        if not items:
+            return [], None, fs
+        n_samples = min(len(data) for _, data in items)
+        end_idx = n_samples if end_idx is None else min(end_idx, n_samples)
+        data = np.vstack([np.asarray(d[start_idx:end_idx]) for _, d in items])
+        return [name for name, _ in items], data, fs
+
+    def get_csd_matrix(self, file_name, nperseg=None, overlap=None):
+        """
+        获取文件全部通道的互谱矩阵 (CrossSpectralMatrix)。
+        按 (帧长, 重叠率, 截断范围) 缓存在文件条目的 'csd_cache' 中，
+        FRF、相干函数与 FDD 共用同一份结果。
+        """
+        if not self.processing_results:
+            return None
+        file_entry = None
+        for f_entry in self.processing_results.files:
+            if f_entry['file_name'] == file_name:
+                file_entry = f_entry
+                break
+        if file_entry is None:
+            self.log_message(f"错误：未找到文件 '{file_name}'\n")
+            return None
+
+        nperseg = self.params.frf_nperseg if nperseg is None else nperseg
+        overlap = self.params.frf_overlap if overlap is None else overlap
+        truncation_range = None
+        if not file_entry.get('is_truncated', False) and self.view.apply_truncation_to_spectrum_var.get():
+            truncation_range = self.truncation_settings.get(file_name)
+        truncation_key = (truncation_range['start_sec'], truncation_range['end_sec']) if truncation_range else None
+
+        csd_cache = file_entry.setdefault('csd_cache', {})
+        key = (nperseg, overlap, truncation_key)
+        if key not in csd_cache:
+            names, data, fs = self._file_channel_arrays(file_entry)
+            if data is None:
+                self.log_message(f"错误：文件 '{file_name}' 没有可用于互谱计算的时域数据\n")
+                return None
+            csd_cache[key] = compute_csd_matrix(data, fs, names, nperseg=nperseg, overlap=overlap)
+        return csd_cache[key]
+
+    def extract_ods(self, ref_name, frequencies, labels, file_names=None, nperseg=None):
+        """
+        对所有（或指定）文件提取 ODS：测点 × 频率 的复数表（幅值为 RMS，相位相对参考通道）。
+        直接读取互谱矩阵缓存，不对单个通道重新做 FFT。
+
+        结果保存在 self.ods_results = {'labels', 'frequencies', 'files': {文件名: {...}}} 并返回；
+        没有任何文件包含参考通道时返回 None
+        """
+        if not self.processing_results:
+            self.log_message("错误：没有处理结果，无法提取 ODS\n")
+            return None
+        if file_names is None:
+            file_names = [f['file_name'] for f in self.processing_results.files]
+
+        files = {}
+        for file_name in file_names:
+            csm = self.get_csd_matrix(file_name, nperseg=nperseg)
+            if csm is None:
+                continue
+            if ref_name not in csm.channel_names:
+                self.log_message(f"警告：文件 '{file_name}' 中没有参考通道 '{ref_name}'，跳过 ODS\n")
+                continue
+            table, line_freqs = extract_ods(csm, ref_name, frequencies)
+            files[file_name] = {'channels': list(csm.channel_names), 'table': table, 'line_freqs': line_freqs}
+
+        if not files:
+            return None
+        self.ods_results = {'labels': list(labels), 'frequencies': list(frequencies), 'files': files}
+        self.log_message(f"ODS 提取完成：{len(files)} 个文件，参考通道 {ref_name}\n")
+        return self.ods_results
+
+    def export_ods(self, file_path):
+        """把最近一次 ODS 结果导出为制表符分隔的文本文件。"""
+        if not self.ods_results:
+            return False
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(ods_table_text(self.ods_results['files'], self.ods_results['labels']))
+        return True
+
+    def compute_order_tracking(self, tacho_channel, deg_per_edge=3.0, threshold=2.5,
+                               max_order=20.0, resolution=0.1, file_names=None):
+        """
+        计算阶次跟踪：由各文件的转速通道得到轴转角，把该文件全部通道重采样到等角度间隔，
+        再对所有文件、所有通道批量计算阶次谱（截断设置同频谱页）。
+
+        结果保存在 self.order_results = {'orders', 'files': {文件名: {...}}} 并返回；
+        没有任何文件含有效转速通道时返回 None
+        """
+        if not self.processing_results:
+            self.log_message("错误：没有处理结果，无法进行阶次跟踪\n")
+            return None
+        if file_names is None:
+            file_names = [f['file_name'] for f in self.processing_results.files]
+
+        files = {}
+        for file_entry in self.processing_results.files:
+            file_name = file_entry['file_name']
+            if file_name not in file_names:
+                continue
+            names, data, fs = self._file_channel_arrays(file_entry)
+            if tacho_channel not in names:
+                self.log_message(f"警告：文件 '{file_name}' 中没有转速通道 '{tacho_channel}'，跳过阶次跟踪\n")
+                continue
+            revolutions = shaft_revolutions(data[names.index(tacho_channel)], fs, deg_per_edge, threshold)
+            if revolutions is None:
+                self.log_message(f"警告：文件 '{file_name}' 的转速通道无有效脉冲，跳过阶次跟踪\n")
+                continue
+            keep = [k for k, name in enumerate(names) if name != tacho_channel]
+            files[file_name] = ([names[k] for k in keep], data[keep], revolutions, fs)
+
+        if not files:
+            return None
+        result = compute_order_tracking(files, max_order, resolution)
+        for file_name, info in result['files'].items():
+            if info['aliased']:
+                self.log_message(f"警告：文件 '{file_name}' 最高转速 {info['rpm_max']:.0f} rpm 下 "
+                                 f"{max_order} 阶已超过奈奎斯特频率，高阶部分可能混叠\n")
+        if not result['files']:
+            self.log_message("警告：转数不足一帧，无法计算阶次谱，请降低阶次分辨率\n")
+            return None
+        self.order_results = result
+        self.log_message(f"阶次跟踪完成：{len(result['files'])} 个文件，最大阶次 {max_order}，分辨率 {resolution}\n")
+        return result
+
+    def compute_tsa(self, file_name, tacho_channel, deg_per_edge=3.0, threshold=2.5, points_per_rev=None,
+                    keyphasor=False):
+        """
+        对文件全部通道（不含转速通道）做时间同步平均。keyphasor 为 True 时转速通道为每转一个脉冲的键相信号
+        （只用上升沿，每沿 360°，忽略 deg_per_edge）。
+
+        结果保存在 self.tsa_results[file_name]（含 'channels'）并返回；失败时返回 None
+        """
+        if not self.processing_results:
+            self.log_message("错误：没有处理结果，无法进行同步平均\n")
+            return None
+        file_entry = next((f for f in self.processing_results.files if f['file_name'] == file_name), None)
+        if file_entry is None:
+            self.log_message(f"错误：未找到文件 '{file_name}'\n")
+            return None
+        names, data, fs = self._file_channel_arrays(file_entry)
+        if tacho_channel not in names:
+            self.log_message(f"错误：文件 '{file_name}' 中没有转速通道 '{tacho_channel}'\n")
+            return None
+        if keyphasor:
+            revolutions = shaft_revolutions(data[names.index(tacho_channel)], fs, 360.0, threshold, both_edges=False)
+        else:
+            revolutions = shaft_revolutions(data[names.index(tacho_channel)], fs, deg_per_edge, threshold)
+        if revolutions is None:
+            self.log_message(f"错误：文件 '{file_name}' 的转速通道无有效脉冲\n")
+            return None
+        keep = [k for k, name in enumerate(names) if name != tacho_channel]
+        result = time_synchronous_average(data[keep], revolutions, fs, points_per_rev)
+        if result is None:
+            self.log_message(f"错误：文件 '{file_name}' 不足一整转，无法同步平均\n")
+            return None
+        result['channels'] = [names[k] for k in keep]
+        self.tsa_results[file_name] = result
+        self.log_message(f"同步平均完成：{file_name}，{result['n_revolutions']} 转，"
+                         f"每转 {len(result['angle'])} 点\n")
+        return result
+
+    def extract_order_slices(self, tacho_channel, slice_params, callback=None):
+        """
+        对全部文件（每个文件为一次升速 / 降速）批量提取 阶次 × 转速 切片，按文件分发到进程池，
+        在后台线程中等待结果。转速通道与已派生的 _转速 通道不参与计算。
+
+        slice_params 见 processor.order_slices.extract_order_slices；完成后结果存入
+        self.order_slice_results，并在界面线程调用 callback(results)。没有可用文件时返回 False。
+        """
+        if not self.processing_results:
+            self.log_message("错误：没有处理结果，无法提取阶次切片\n")
+            return False
+        files = {}
+        for file_entry in self.processing_results.files:
+            file_name = file_entry['file_name']
+            names, data, fs = self._file_channel_arrays(file_entry)
+            if tacho_channel not in names:
+                self.log_message(f"警告：文件 '{file_name}' 中没有转速通道 '{tacho_channel}'，跳过阶次切片\n")
+                continue
+            keep = [k for k, name in enumerate(names) if name != tacho_channel and not name.endswith('_转速')]
+            if keep:
+                files[file_name] = ([names[k] for k in keep], data[keep], data[names.index(tacho_channel)], fs)
+        if not files:
+            return False
+
+        def run_slices():
+            try:
+                results = extract_order_slices(files, slice_params)
+                self.view.after(0, self._store_order_slices, results, callback)
+            except Exception as e:
+                self.view.after(0, self.log_message, f"错误：阶次切片提取失败: {e}\n")
+
+        self.log_message(f"正在提取阶次切片（{slice_params['method'].upper()}）：{len(files)} 个文件...\n")
+        threading.Thread(target=run_slices, daemon=True).start()
+        return True
+
+    def _store_order_slices(self, results, callback):
+        self.order_slice_results = results
+        self.log_message(f"阶次切片提取完成：{len(results)} 个文件\n")
+        if callback is not None:
+            callback(results)
+
+    def export_order_slices(self, file_path):
+        """把最近一次阶次切片结果导出为 文件 × 通道 × 阶次 行、转速列的制表符分隔表。"""
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(order_slice_table_text(self.order_slice_results))
+
+    def compute_campbell(self, file_name, tacho_channel, deg_per_edge=3.0, threshold=2.5, nperseg=4096,
+                         rpm_step=50.0, axis='frequency', max_order=20.0, order_resolution=0.1, callback=None):
+        """
+        在后台线程中计算文件全部通道（不含转速通道）的瀑布图 / 坎贝尔图（转速 × 频率或阶次）。
+
+        取数、转速计算、STFT 与分箱均在后台线程；完成后结果存入 self.campbell_results[file_name]
+        （含 'channels'），并在界面线程调用 callback(file_name, result)。没有转速通道、转速通道
+        无有效脉冲等计算中发现的问题在界面线程记录并提示。文件不存在时返回 False。
+        """
+        if not self.processing_results:
+            self.log_message("错误：没有处理结果，无法计算瀑布图\n")
+            return False
+        file_entry = next((f for f in self.processing_results.files if f['file_name'] == file_name), None)
+        if file_entry is None:
+            self.log_message(f"错误：未找到文件 '{file_name}'\n")
+            return False
+        apply_truncation = self.view.apply_truncation_to_spectrum_var.get()
+
+        def run_campbell():
+            try:
+                names, data, fs = self._file_channel_arrays(file_entry, apply_truncation)
+                if tacho_channel not in names:
+                    raise ValueError(f"文件 '{file_name}' 中没有转速通道 '{tacho_channel}'")
+                shaft_freq = shaft_frequency(data[names.index(tacho_channel)], fs, deg_per_edge, threshold)
+                if shaft_freq is None:
+                    raise ValueError(f"文件 '{file_name}' 的转速通道无有效脉冲")
+                keep = [k for k, name in enumerate(names) if name != tacho_channel]
+                if not keep:
+                    raise ValueError(f"文件 '{file_name}' 除转速通道外没有其他通道")
+                result = campbell_map(data[keep], fs, shaft_freq, nperseg=nperseg, rpm_step=rpm_step, axis=axis,
+                                      max_order=max_order, order_resolution=order_resolution)
+                result['channels'] = [names[k] for k in keep]
+                self.view.after(0, self._store_campbell, file_name, result, callback)
+            except Exception as e:
+                self.view.after(0, self._campbell_failed, f"瀑布图计算失败: {e}")
+
+        self.log_message(f"正在计算瀑布图：{file_name}...\n")
+        threading.Thread(target=run_campbell, daemon=True).start()
+        return True
+
+    def _campbell_failed(self, message):
+        self.log_message(f"错误：{message}\n")
+        messagebox.showwarning("警告", message)
+
+    def _store_campbell(self, file_name, result, callback):
+        self.campbell_results[file_name] = result
+        self.log_message(f"瀑布图计算完成：{file_name}，转速 {result['rpm'][0]:.0f} - {result['rpm'][-1]:.0f} rpm\n")
+        if callback is not None:
+            callback(file_name, result)
+
     def get_oma_time_data(self, file_name, channel_list):
         import numpy as np
         if not self.processing_results:
@@ -397,21 +801,53 @@ class AppController:
 
 
     def get_vk2_parameters(self):
-        """从View读取 vk2_r, vk2_filtord, freq_list。"""
+        """
+        从View读取 vk2_r, vk2_filtord, 分块长度以及去除对象：
+        频率模式返回 freq_list；阶次模式返回 order_list、order_action 与转速通道参数。
+        """
         try:
             vk2_r = float(self.view.vk2_r_var.get())
             vk2_filtord = int(self.view.vk2_filtord_var.get())
+            # 分块长度（秒），0 表示整体求解
+            block_seconds = float(self.view.vk2_block_seconds_var.get() or 0)
+            joint = bool(self.view.vk2_joint_var.get())
+            if self.view.vk2_mode_var.get() == 'order':
+                order_list = [float(x.strip()) for x in self.view.order_list_var.get().split(',') if x.strip()]
+                if not order_list:
+                    return None
+                return {
+                    'r': vk2_r,
+                    'filtord': vk2_filtord,
+                    'block_seconds': block_seconds,
+                    'joint': joint,
+                    'mode': 'order',
+                    'order_list': order_list,
+                    'order_action': self.view.order_action_var.get(),
+                    'tacho_channel': self.view.tacho_channel_var.get(),
+                    'deg_per_edge': float(self.view.tacho_deg_per_edge_var.get()),
+                    'tacho_threshold': float(self.view.tacho_threshold_var.get())
+                }
             freq_list = [float(x.strip()) for x in self.view.freq_to_remove_var.get().split(',')]
             if not freq_list:
                 return None
             return {
                 'r': vk2_r,
                 'filtord': vk2_filtord,
+                'block_seconds': block_seconds,
+                'joint': joint,
+                'mode': 'frequency',
                 'freq_list': freq_list
             }
         except ValueError:
             return None
 
+    def get_shaft_frequency(self, file_name, tacho_channel, deg_per_edge=3.0, threshold=2.5):
+        """由文件中的转速脉冲通道计算逐点瞬时轴频（转/秒）；失败时返回 None。"""
+        tacho_data = self.get_time_domain_data(file_name, tacho_channel)
+        if tacho_data is None:
+            return None
+        return shaft_frequency(tacho_data, self.params.sampling_rate, deg_per_edge, threshold)
+
     def remove_specified_frequencies(self, data, fs, vk2_params):
         """调用 Processor.remove_specified_frequencies。"""
         if not self.params:
@@ -555,15 +991,21 @@ class AppController:
                 return
 
             # 插入到 fft_results
+            self.feature_store.invalidate(file_name, custom_name)
             f_res['fft_results'].append({
                 "col_idx": -1,
                 "fft_result": user_fft_result,
                 "data_converted": result_data
             })
+            if self.processing_results.band_energy_index is not None:
+                self.processing_results.band_energy_index.add_channel(
+                    file_name, custom_name, user_fft_result.freq, user_fft_result.amplitude
+                )
             if user_frf_result is not None:
                 if 'frf_results' not in f_res:
                     f_res['frf_results'] = []
                 f_res['frf_results'].append(user_frf_result)
+            self._invalidate_file_caches(f_res, [custom_name])
 
         self.view.update_visualization_options(self.processing_results)
 
@@ -574,17 +1016,270 @@ class AppController:
         self.log_message("[完成]" + finish_msg + "\n")
         messagebox.showinfo("提示", finish_msg)
 
-    def get_spectrum_data(self, file_name, channel_name):
+    def start_feature_tracks(self):
         """
-        获取频谱数据。如果设置了截断范围并且View中勾选了应用，则使用截断后的数据计算FFT。
+        在后台线程中按当前窗长与增强包络带通范围计算全部文件 × 通道的时域特征曲线，
+        存入 self.feature_store；已有相同设置条目的通道跳过。时域页切换特征或通道时直接取用。
         """
         if not self.processing_results:
-            return None, None
+            return
+        channels = {}
+        for file_entry in self.processing_results.files:
+            fs = file_entry.get('sampling_rate') or self.params.sampling_rate
+            for name, data, _ in self._file_time_channels(file_entry):
+                if data is not None:
+                    channels[(file_entry['file_name'], name)] = (np.asarray(data), fs)
+        if not channels:
+            return
+        window_seconds = self.feature_window_seconds
+        band = self.feature_envelope_band
+
+        def run_features():
+            try:
+                count = self.feature_store.compute_all(channels, window_seconds, band)
+                if count:
+                    self.view.after(0, self.log_message, f"时域特征曲线计算完成：{count} 个通道\n")
+            except Exception as e:
+                self.view.after(0, self.log_message, f"错误：时域特征曲线计算失败: {e}\n")
+
+        threading.Thread(target=run_features, daemon=True).start()
+
+    def get_feature_tracks(self, file_name, channel_name, window_seconds=None, band=None):
+        """
+        返回 (文件, 通道) 的特征曲线条目（见 processor.feature_store.compute_feature_tracks）。
+
+        window_seconds 或增强包络带通范围 band 与当前设置不同时更新设置并在后台重算其余通道；
+        本通道未命中时在当前线程计算并存入。没有该通道数据时返回 None。
+        """
+        changed = False
+        if window_seconds is not None and window_seconds != self.feature_window_seconds:
+            self.feature_window_seconds = window_seconds
+            changed = True
+        if band is not None and tuple(band) != tuple(self.feature_envelope_band):
+            self.feature_envelope_band = tuple(band)
+            changed = True
+        if changed:
+            self.start_feature_tracks()
+        file_entry = next((f for f in self.processing_results.files if f['file_name'] == file_name), None) \
+            if self.processing_results else None
+        data = self.get_time_domain_data(file_name, channel_name)
+        if file_entry is None or data is None:
+            return None
+        fs = file_entry.get('sampling_rate') or self.params.sampling_rate
+        entry = self.feature_store.get(file_name, channel_name, fs, self.feature_window_seconds, len(data),
+                                       self.feature_envelope_band)
+        if entry is None:
+            version = self.feature_store.version(file_name, channel_name)
+            entry = compute_feature_tracks(np.asarray(data), fs, self.feature_window_seconds,
+                                           self.feature_envelope_band)
+            self.feature_store.put(file_name, channel_name, entry, version)
+        return entry
+
+    def export_feature_tracks(self, file_path, file_name, window_seconds=None, band=None):
+        """
+        把文件全部通道的特征曲线（RMS / 峰值因子 / 偏度 / 峭度 / TKEO / 包络 / 增强包络）
+        导出为时间行、通道 × 特征列的制表符分隔表。
+        """
+        file_entry = next((f for f in self.processing_results.files if f['file_name'] == file_name), None) \
+            if self.processing_results else None
+        if file_entry is None:
+            raise ValueError(f"未找到文件 '{file_name}'")
+        fs = file_entry.get('sampling_rate') or self.params.sampling_rate
+        entries = []
+        for name, data, _ in self._file_time_channels(file_entry):
+            entry = self.get_feature_tracks(file_name, name, window_seconds, band) if data is not None else None
+            if entry is not None:
+                entries.append((name, entry))
+        # 长度与首个通道不同的通道无法与其共用时间列，跳过
+        if entries:
+            entries = [(name, entry) for name, entry in entries if entry['length'] == entries[0][1]['length']]
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(feature_table_text(entries, fs))
+
+    def _file_time_channels(self, file_entry):
+        """返回文件条目中全部通道的 [(通道名, 时域数据, 单位)]（原始条目与截断条目均可）。"""
+        if file_entry.get('is_truncated', False):
+            return [(name, info.get('data'), info['fft_result'].unit)
+                    for name, info in file_entry.get('channels', {}).items()]
+        return [(e['fft_result'].name, e.get('data_converted'), e['fft_result'].unit)
+                for e in file_entry.get('fft_results', [])]
+
+    def run_vk2_batch(self):
+        """
+        VK2 批处理阶段：按频谱页当前的 VK2 设置，在后台用进程池清洗全部文件 × 通道，
+        结果以 “通道名_VK2” 作为新通道写回 ProcessingResults。
+        阶次模式下转速通道本身不清洗；已有的 _VK2 通道不再重复清洗。
+        """
+        if not self.processing_results:
+            messagebox.showwarning("警告", "请先完成数据处理。")
+            return
+        vk2_params = self.get_vk2_parameters()
+        if not vk2_params:
+            messagebox.showwarning("警告", "VK2参数无效或频率 / 阶次列表为空！")
+            return
+
+        fs = self.params.sampling_rate
+        order_mode = vk2_params['mode'] == 'order'
+        file_channels, units, shaft_by_file = {}, {}, {}
+        for file_entry in self.processing_results.files:
+            file_name = file_entry['file_name']
+            channels = [(name, data, unit) for name, data, unit in self._file_time_channels(file_entry)
+                        if data is not None and not name.endswith(VK2_CHANNEL_SUFFIX)
+                        and not (order_mode and name == vk2_params['tacho_channel'])]
+            if not channels:
+                continue
+            length = len(channels[0][1])
+            channels = [c for c in channels if len(c[1]) == length]
+            if order_mode:
+                shaft_freq = self.get_shaft_frequency(file_name, vk2_params['tacho_channel'],
+                                                      vk2_params['deg_per_edge'], vk2_params['tacho_threshold'])
+                if shaft_freq is None or len(shaft_freq) != length:
+                    self.log_message(f"警告：文件 '{file_name}' 的转速通道无效，跳过 VK2 批处理\n")
+                    continue
+                shaft_by_file[file_name] = shaft_freq
+            file_channels[file_name] = ([c[0] for c in channels], np.vstack([c[1] for c in channels]))
+            units[file_name] = {c[0]: c[2] for c in channels}
+
+        if not file_channels:
+            self.log_message("警告：没有可做 VK2 批处理的通道\n")
+            return
+
+        def run_batch():
+            try:
+                messages = []
+                cleaned = run_vk2_batch(file_channels, fs, vk2_params, shaft_by_file, messages=messages)
+                for file_name, channel_name, text in messages:
+                    self.view.after(0, self.log_message, f"警告：{text}（文件: {file_name}，通道: {channel_name}）\n")
+                self.view.after(0, self._store_vk2_channels, cleaned, units)
+            except Exception as e:
+                self.view.after(0, self.log_message, f"错误：VK2 批处理失败: {e}\n")
+
+        n_jobs = sum(len(names) for names, _ in file_channels.values())
+        self.log_message(f"正在进行 VK2 批处理：{len(file_channels)} 个文件，{n_jobs} 个通道...\n")
+        threading.Thread(target=run_batch, daemon=True).start()
+
+    def _store_vk2_channels(self, cleaned, units):
+        """在界面线程中把 VK2 批处理结果作为新通道写回 ProcessingResults，同名通道直接替换。"""
+        processor = FFTProcessor(self.params, None, self)
+        count = 0
+        for file_entry in self.processing_results.files:
+            file_name = file_entry['file_name']
+            if file_name not in cleaned:
+                continue
+            written = []
+            for name, data in cleaned[file_name].items():
+                written.append(f"{name}{VK2_CHANNEL_SUFFIX}")
+                self._add_time_channel(processor, file_entry, written[-1], data, units[file_name][name])
+                count += 1
+            self._invalidate_file_caches(file_entry, written)
+
+        self._refresh_channel_options()
+        self.log_message(f"VK2 批处理完成：已写回 {count} 个 {VK2_CHANNEL_SUFFIX} 通道\n")
+
+    def _add_time_channel(self, processor, file_entry, new_name, data, unit):
+        """把一路时域数据作为新通道写入文件条目（计算 FFT、登记频带能量），同名通道直接替换。"""
+        file_name = file_entry['file_name']
+        fft_result = processor.build_fft_result(data, new_name, unit)
+        self.feature_store.invalidate(file_name, new_name)
+        if file_entry.get('is_truncated', False):
+            file_entry['channels'][new_name] = {
+                'data': data,
+                'fft_result': fft_result,
+                'is_input': False,
+                'original_col_idx': -1
+            }
+        else:
+            file_entry['fft_results'] = [e for e in file_entry['fft_results']
+                                         if e['fft_result'].name != new_name]
+            file_entry['fft_results'].append({
+                "col_idx": -1,
+                "fft_result": fft_result,
+                "data_converted": data
+            })
+        if self.processing_results.band_energy_index is not None:
+            self.processing_results.band_energy_index.add_channel(
+                file_name, new_name, fft_result.freq, fft_result.amplitude
+            )
+
+    def _invalidate_file_caches(self, file_entry, channel_names):
+        """
+        文件新增或替换通道后，FRF / 互谱缓存需要包含新通道，清空后按需重算；
+        清洗信号缓存只清除写入的通道 channel_names，其余通道的数据未变，缓存仍然有效。
+        """
+        file_entry.pop('csd_cache', None)
+        file_entry.pop('frf_cache', None)
+        for name in channel_names:
+            self.cleaned_signal_cache.invalidate(file_entry['file_name'], name)
+
+    def _refresh_channel_options(self):
+        self.view.update_visualization_options(self.processing_results)
+        self.channel_options = self._collect_channels_from_results(self.processing_results)
+        self.view.refresh_global_params_tab()
+        self.start_feature_tracks()
+
+    def create_frame_transform_channels(self, pairs, tacho_channel, offsets_deg, deg_per_edge=3.0, threshold=2.5):
+        """
+        旋转坐标系 → 静止坐标系变换：对每个文件，由转速通道得到逐点轴转角，把全部 (x, y) 通道对
+        在全部角度偏置下一次变换，结果作为 Fx / Fy 新通道写回（不经过自定义脚本 exec）。
+
+        参数：
+        pairs       - [(x 通道名, y 通道名), ...]，旋转坐标系下的力环通道对
+        offsets_deg - 角度偏置列表（度）
+
+        返回：写回的通道数
+        """
+        if not self.processing_results:
+            self.log_message("错误：没有处理结果，无法做坐标变换\n")
+            return 0
+        fx_names, fy_names = transform_channel_names(pairs, offsets_deg)
+        offsets = np.deg2rad(np.asarray(offsets_deg, dtype=np.float64))
+        processor = FFTProcessor(self.params, None, self)
+        count = 0
+        for file_entry in self.processing_results.files:
+            file_name = file_entry['file_name']
+            channels = {name: (data, unit) for name, data, unit in self._file_time_channels(file_entry)
+                        if data is not None}
+            missing = [n for n in [tacho_channel] + [n for pair in pairs for n in pair] if n not in channels]
+            if missing:
+                self.log_message(f"警告：文件 '{file_name}' 缺少通道 {missing}，跳过坐标变换\n")
+                continue
+            fs = file_entry.get('sampling_rate') or self.params.sampling_rate
+            revolutions = shaft_revolutions(channels[tacho_channel][0], fs, deg_per_edge, threshold)
+            if revolutions is None:
+                self.log_message(f"警告：文件 '{file_name}' 的转速通道无有效脉冲，跳过坐标变换\n")
+                continue
+            x_rot = np.vstack([channels[x][0] for x, _ in pairs])
+            y_rot = np.vstack([channels[y][0] for _, y in pairs])
+            fx, fy = rotating_to_stationary(x_rot, y_rot, 2 * np.pi * revolutions, offsets)
+
+            units = {name: unit for name, (_, unit) in channels.items()}
+            for p, (x_name, _) in enumerate(pairs):
+                for k in range(len(offsets)):
+                    self._add_time_channel(processor, file_entry, fx_names[p][k], fx[p, k], units.get(x_name, ''))
+                    self._add_time_channel(processor, file_entry, fy_names[p][k], fy[p, k], units.get(x_name, ''))
+                    count += 2
+            self._invalidate_file_caches(file_entry, [name for names in fx_names + fy_names for name in names])
+
+        if count:
+            self._refresh_channel_options()
+        self.log_message(f"坐标变换完成：已写回 {count} 个通道\n")
+        return count
+
+    def get_cleaned_time_data(self, file_name, channel_name, use_truncation=True):
+        """
+        返回频谱页当前设置下的时域数据：按需截断（View 勾选且该文件设置了截断范围），
+        并在勾选“应用频率去除”时做 VK2 清洗。
+
+        VK2 结果按 (文件, 通道, 截断范围, VK2 参数) 缓存在 cleaned_signal_cache 中，
+        重绘、切分、音频播放等复用同一次计算。失败时返回 None。
+        """
+        if not self.processing_results:
+            return None
             
         # 检查是否需要应用截断 (按文件检查)
         apply_truncation = False
         truncation_range = None
-        if self.view.apply_truncation_to_spectrum_var.get(): # Checkbox state from view
+        if use_truncation and self.view.apply_truncation_to_spectrum_var.get(): # Checkbox state from view
             truncation_range = self.truncation_settings.get(file_name)
             if truncation_range:
                 apply_truncation = True
@@ -592,10 +1287,11 @@ class AppController:
         # 获取原始时域数据
         data_converted = self.get_time_domain_data(file_name, channel_name)
         if data_converted is None:
-            return None, None
+            return None
             
         # 如果应用截断，则截取数据段
         data_to_process = data_converted
+        start_idx, end_idx = 0, len(data_converted)
         if apply_truncation:
             start_sec = truncation_range['start_sec']
             end_sec = truncation_range['end_sec']
@@ -606,24 +1302,60 @@ class AppController:
             
             if len(data_to_process) < 1024: # 检查截断后长度
                 self.log_message(f"警告：截断后数据点数过少 ({len(data_to_process)}点)，无法进行频谱分析 (通道: {channel_name})\n")
-                return None, None
+                return None
             # self.log_message(f"信息：正在使用 {start_sec:.4f}s - {end_sec:.4f}s 时间段进行频谱分析 (通道: {channel_name})\n") # 避免过多日志
 
         # 检查是否需要应用频率去除 (VK2)
-        apply_removal = self.view.apply_freq_removal_var.get()
-        if apply_removal:
-            vk2_params = self.get_vk2_parameters()
-            if not vk2_params or not vk2_params.get('freq_list'):
-                 self.log_message("警告：VK2参数无效或频率列表为空，无法去除频率\n")
-                 # 即使VK2失败，也继续进行FFT
-                 pass # 继续执行下面的FFT
-            else:
-                # 对截断后（或完整）的数据应用VK2
-                from processor.fft_processor import FFTProcessor
-                processor = FFTProcessor(self.params, None, self)
-                data_to_process = processor.remove_specified_frequencies(data_to_process, self.params.sampling_rate, vk2_params)
-                if data_to_process is None: # VK2处理失败
-                    return None, None 
+        if not self.view.apply_freq_removal_var.get():
+            return data_to_process
+        vk2_params = self.get_vk2_parameters()
+        if not vk2_params:
+            self.log_message("警告：VK2参数无效或频率 / 阶次列表为空，无法去除频率\n")
+            # 即使VK2失败，也继续使用未清洗的数据
+            return data_to_process
+
+        def clean():
+            processor = FFTProcessor(self.params, None, self)
+            if vk2_params['mode'] == 'order':
+                # 阶次跟踪：转速通道取同一文件、同一截断段
+                shaft_freq = self.get_shaft_frequency(file_name, vk2_params['tacho_channel'],
+                                                      vk2_params['deg_per_edge'], vk2_params['tacho_threshold'])
+                if shaft_freq is None:
+                    self.log_message(f"警告：转速通道 '{vk2_params['tacho_channel']}' 无有效脉冲，未进行阶次跟踪\n")
+                    return None
+                return processor.track_orders(data_to_process, self.params.sampling_rate,
+                                              shaft_freq[start_idx:end_idx], vk2_params)
+            # 对截断后（或完整）的数据应用VK2
+            return processor.remove_specified_frequencies(data_to_process, self.params.sampling_rate, vk2_params)
+
+        def compute():
+            # 联合求解病态时 VK2 发出 RuntimeWarning 并改用独立求解，这里转为日志
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always', RuntimeWarning)
+                try:
+                    cleaned = clean()
+                except Exception as e:
+                    self.log_message(f"错误：VK2 频率去除失败 (通道: {channel_name}): {e}\n")
+                    cleaned = None
+            for message in dict.fromkeys(str(w.message) for w in caught if issubclass(w.category, RuntimeWarning)):
+                self.log_message(f"警告：{message}（通道: {channel_name}）\n")
+            return cleaned
+
+        key = cleaned_signal_key(file_name, channel_name, truncation_range if apply_truncation else None, vk2_params)
+        cleaned = self.cleaned_signal_cache.get_or_compute(key, compute)
+        if cleaned is None:
+            # 要求去除频率但清洗失败时不返回未清洗的数据，避免把未滤波的结果当作已滤波显示
+            self.log_message(f"警告：通道 '{channel_name}' 未能完成频率去除，未返回数据\n")
+        return cleaned
+
+    def get_spectrum_data(self, file_name, channel_name):
+        """
+        获取频谱数据。如果设置了截断范围并且View中勾选了应用，则使用截断后的数据计算FFT；
+        勾选频率去除时使用缓存的 VK2 清洗结果。
+        """
+        data_to_process = self.get_cleaned_time_data(file_name, channel_name)
+        if data_to_process is None:
+            return None, None
 
         # 对截断后（或完整，可能已VK2处理）的数据进行FFT
         import numpy as np
@@ -639,6 +1371,151 @@ class AppController:
              amplitude[0] = amplitude[0]/2
         return freq, amplitude
 
+    def query_band_energy(self, bands, file_names=None, channel_names=None, metric='energy'):
+        """
+        批量查询频带能量 / 频带 RMS。
+
+        参数：
+        bands         - [(f_low, f_high), ...]，单位 Hz
+        file_names    - 文件列表，None 表示全部文件
+        channel_names - 通道列表，None 表示全部通道
+        metric        - 'energy' 或 'rms'
+
+        返回: (matrix[files, channels, bands], file_names, channel_names)；无结果时返回 None
+        """
+        if not self.processing_results or self.processing_results.band_energy_index is None:
+            self.log_message("错误：没有可用的频带能量索引，请先完成数据处理\n")
+            return None
+        try:
+            return self.processing_results.band_energy_index.query(
+                bands, file_names, channel_names, metric
+            )
+        except ValueError as e:
+            self.log_message(f"错误：频带能量查询参数无效: {e}\n")
+            return None
+
+    def estimate_modal_parameters(self, f_low, f_high, n_modes, file_names=None, estimator='H1', ref_name=None):
+        """
+        对所有（或指定）文件的 FRF 批量做模态识别（峰值拾取 / 圆拟合 / RFP）。
+        同一文件、同一输入的全部输出通道一起拟合，共享同一组极点。
+
+        结果保存在 self.modal_results = {'rows': [...], 'fits': {文件名: {...}}}，并返回表格行；
+        没有可用 FRF 时返回 None
+        """
+        if not self.processing_results:
+            self.log_message("错误：没有处理结果，无法进行模态识别\n")
+            return None
+
+        if file_names is None:
+            file_names = [f['file_name'] for f in self.processing_results.files]
+
+        rows = []
+        fits = {}
+        for f_entry in self.processing_results.files:
+            file_name = f_entry['file_name']
+            if file_name not in file_names:
+                continue
+            if f_entry.get('is_truncated', False):
+                frf_items = self._truncated_frf_items(f_entry) or []
+            else:
+                frf_items = f_entry.get('frf_results', [])
+            if not frf_items:
+                continue
+
+            file_ref = ref_name if ref_name is not None else frf_items[0].get('ref_name')
+            items = [item for item in frf_items if item.get('ref_name') == file_ref]
+            if not items:
+                continue
+            H = np.vstack([item['estimators'].get(estimator, item['estimators']['H1']) for item in items])
+            channel_names = [item['name'] for item in items]
+
+            try:
+                results = fit_modal_parameters(items[0]['freq'], H, f_low, f_high, n_modes)
+            except (ValueError, np.linalg.LinAlgError) as e:
+                self.log_message(f"警告：文件 '{file_name}' 模态识别失败: {e}\n")
+                continue
+            # 力锤试验的 FRF 带指数窗，扣除其附加阻尼
+            if items[0].get('exp_tau'):
+                correct_exponential_window(results, items[0]['exp_tau'])
+
+            fits[file_name] = {'ref_name': file_ref, 'channels': channel_names, 'results': results}
+            rows.extend(modal_table_rows(file_name, file_ref, channel_names, results))
+
+        if not fits:
+            self.log_message("错误：没有可用于模态识别的 FRF 结果（请设置参考通道）\n")
+            return None
+
+        self.modal_results = {'rows': rows, 'fits': fits}
+        self.log_message(f"模态识别完成：{len(fits)} 个文件，频带 {f_low}-{f_high} Hz，{n_modes} 阶\n")
+        return rows
+
+    def get_modal_fit(self, file_name, channel_name):
+        """
+        返回某文件某通道的模态识别结果，用于在 FRF 图上标记：
+        {'ref_name', 'freqs': {方法: 固有频率数组}, 'fit_freq', 'fit_H'(RFP 合成 FRF，无时为 None)}
+        """
+        if not self.modal_results or file_name not in self.modal_results['fits']:
+            return None
+        fit = self.modal_results['fits'][file_name]
+        if channel_name not in fit['channels']:
+            return None
+        c = fit['channels'].index(channel_name)
+        rfp = fit['results'].get('RFP')
+        return {
+            'ref_name': fit['ref_name'],
+            'freqs': {method: res['freq'] for method, res in fit['results'].items()},
+            'fit_freq': rfp['fit_freq'] if rfp is not None else None,
+            'fit_H': rfp['fit_H'][c] if rfp is not None else None
+        }
+
+    def export_modal_table(self, file_path):
+        """把最近一次模态识别的表格导出为制表符分隔的文本文件。"""
+        if not self.modal_results:
+            return False
+        header = "文件\t输入\t方法\t阶次\t频率(Hz)\t阻尼比\t通道\t振型幅值\t振型相位(deg)\n"
+        lines = [
+            f"{f}\t{ref}\t{m}\t{k}\t{fn:.4f}\t{z:.6f}\t{ch}\t{amp:.6e}\t{ph:.2f}"
+            for f, ref, m, k, fn, z, ch, amp, ph in self.modal_results['rows']
+        ]
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(header + "\n".join(lines) + "\n")
+        return True
+
+    def export_uff(self, output_folder, binary=False, kinds=UFF_KINDS, estimator='H1'):
+        """
+        在后台线程中把全部文件 × 通道的时域、频谱与 FRF 批量导出为 UFF58（ASCII 或 58b 二进制）。
+        截断结果集的 FRF 先按当前 FRF 参数计算（已缓存则直接取用），再随数据集一起导出。
+        """
+        if not self.processing_results:
+            self.log_message("错误：没有处理结果，无法导出 UFF\n")
+            return
+
+        results = self.processing_results
+        sampling_rate = self.params.sampling_rate
+        frf_items = {}
+        if 'frf' in kinds:
+            for file_entry in results.files:
+                if not file_entry.get('is_truncated', False):
+                    continue
+                items = self._truncated_frf_items(file_entry)
+                if items:
+                    frf_items[file_entry['file_name']] = items
+                else:
+                    self.log_message(f"警告：截断文件 '{file_entry['file_name']}' 的 FRF 计算失败，UFF 中不包含 FRF\n")
+
+        def run_export():
+            try:
+                paths = export_processing_results(
+                    results, sampling_rate, output_folder,
+                    kinds=kinds, binary=binary, estimator=estimator, frf_items=frf_items
+                )
+                self.view.after(0, self.log_message, f"UFF 导出完成：{len(paths)} 个文件 -> {output_folder}\n")
+            except Exception as e:
+                self.view.after(0, self.log_message, f"错误：UFF 导出失败: {e}\n")
+
+        self.log_message(f"正在导出 UFF{'(二进制)' if binary else ''}...\n")
+        threading.Thread(target=run_export, daemon=True).start()
+
     def set_analysis_truncation_range(self, file_name, start_sec, end_sec):
         """存储指定文件用于后续分析(频谱/OMA)的时间范围（秒）"""
         if not self.params:
@@ -719,14 +1596,10 @@ class AppController:
             self.log_message(f"错误：未找到文件 '{file_name}' 或其有效的通道数据/传感器设置\n")
             return None
             
-        # 确定参考(输入)通道索引和名称
-        ref_channel_index = -1
-        ref_channel_name = None
-        for idx, setting in enumerate(original_sensor_settings):
-            if setting.is_reference:
-                ref_channel_index = idx
-                ref_channel_name = setting.name
-                break
+        # 确定参考(输入)通道名称，可有多个
+        ref_channel_names = {
+            setting.name for setting in original_sensor_settings if setting.is_reference
+        }
         
         # 验证时间范围 (需要先获取一次数据以得到总时长)
         first_fft_entry = original_file_data['fft_results'][0]
@@ -767,7 +1640,7 @@ class AppController:
             original_channel_name = original_fft_entry['fft_result'].name
             original_data = original_fft_entry.get('data_converted')
             col_idx = original_fft_entry.get('col_idx', -1)
-            is_input_channel = (original_channel_name == ref_channel_name)
+            is_input_channel = (original_channel_name in ref_channel_names)
 
             if original_data is None:
                 original_data = self.get_time_domain_data(file_name, original_channel_name)
@@ -813,7 +1686,17 @@ class AppController:
         self.log_message(f"注意：截断生成的结果 '{new_file_name}' 包含各通道截断的时域数据和频谱(FFT)分析。FRF将在查看时实时计算。\n")
         
         # 将新结果添加到 processing_results 列表中
+        self.cleaned_signal_cache.invalidate(new_file_name)
+        self.feature_store.invalidate(new_file_name)
         self.processing_results.files.append(new_file_result_entry)
+        if self.processing_results.band_energy_index is not None:
+            channel_names = list(new_channels_dict.keys())
+            self.processing_results.band_energy_index.add_file(
+                new_file_name,
+                new_channels_dict[channel_names[0]]['fft_result'].freq,
+                channel_names,
+                np.vstack([new_channels_dict[ch]['fft_result'].amplitude for ch in channel_names])
+            )
         
         # 更新UI
         self.view.update_visualization_options(self.processing_results)
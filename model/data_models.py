@@ -24,31 +24,73 @@ class ProcessingParameters:
     """处理过程所需的参数集合。"""
     def __init__(
         self, input_folder, output_folder, filename_prefix,
-        sampling_rate, sensor_settings
+        sampling_rate, sensor_settings,
+        integrate_acceleration=False, integration_highpass=2.0,
+        differentiate_displacement=False, differentiation_lowpass=0.0,
+        frf_nperseg=4096, frf_overlap=0.5,
+        impact_test=False, impact_record_time=1.0, impact_trigger_level=0.1
     ):
         self.input_folder = input_folder
         self.output_folder = output_folder
         self.filename_prefix = filename_prefix
         self.sampling_rate = sampling_rate
         self.sensor_settings = sensor_settings
+        # 加速度频域积分 (速度/位移) 开关及高通截止频率 (Hz)
+        self.integrate_acceleration = integrate_acceleration
+        self.integration_highpass = integration_highpass
+        # 位移（电涡流）频域微分 (速度/加速度) 开关及低通截止频率 (Hz，0 为不限制)
+        self.differentiate_displacement = differentiate_displacement
+        self.differentiation_lowpass = differentiation_lowpass
+        # FRF 帧平均参数：帧长（点）与重叠率
+        self.frf_nperseg = frf_nperseg
+        self.frf_overlap = frf_overlap
+        # 力锤试验模式：按敲击截取记录（时长 s）并平均，触发阈值为相对最大峰值的比例
+        self.impact_test = impact_test
+        self.impact_record_time = impact_record_time
+        self.impact_trigger_level = impact_trigger_level
 
     def validate(self):
         errors = []
         if not self.input_folder or not self.output_folder:
             errors.append("输入和输出文件夹不能为空。")
+        if self.integrate_acceleration and self.integration_highpass < 0:
+            errors.append("积分高通截止频率不能为负数。")
+        if self.differentiate_displacement and self.differentiation_lowpass < 0:
+            errors.append("微分低通截止频率不能为负数。")
+        if self.frf_nperseg < 8:
+            errors.append("FRF 帧长至少为 8 点。")
+        if not (0 <= self.frf_overlap < 1):
+            errors.append("FRF 重叠率必须在 0 ~ 1 之间。")
+        if self.impact_test:
+            if self.impact_record_time <= 0:
+                errors.append("力锤记录时长必须为正数。")
+            if not (0 < self.impact_trigger_level < 1):
+                errors.append("力锤触发阈值必须在 0 ~ 1 之间。")
+            if not any(s.sensor_type == '力锤' for s in self.sensor_settings):
+                errors.append("力锤试验模式需要至少一个力锤通道。")
         return errors
 
 class ProcessingResults:
     """
     整个处理完成后保存的结果。
     files: [{ 'file_name', 'fft_results', 'frf_results', 'base_name'}, ...]
+        frf_results: [{ 'freq', 'H_f_magnitude', 'H_f_phase', 'estimators', 'coherence',
+                        'ordinary_coherence', 'name', 'ref_name' }, ...]，
+            每个 (输出 name, 输入 ref_name) 对一项；estimators 为 {'H1','H2','Hv'} -> 复数 FRF
+            （多参考时仅有 H1），coherence 为输出的多重相干（单参考时即常相干）
+        fft_results 中由加速度积分、位移微分或转速脉冲得到的通道带有 'channel_type'
+        ('速度'/'位移'/'加速度'/'转速')
+        和 'source_col_idx'，其 col_idx 为 -1
+        文件条目在首次使用时可带有缓存 'csd_cache'：{(帧长, 重叠率, 截断范围): CrossSpectralMatrix}
     sensor_settings
     has_reference_sensor
+    band_energy_index: 处理时建立的 BandEnergyIndex（频带能量查询），未建立时为 None
     """
     def __init__(self, sensor_settings):
         self.files = []
         self.sensor_settings = sensor_settings
         self.has_reference_sensor = any(s.is_reference for s in sensor_settings)
+        self.band_energy_index = None
 
     def add_file_result(self, file_result):
         self.files.append(file_result)
@@ -0,0 +1,133 @@
+# processor/band_energy.py
+
+import numpy as np
+
+
+class BandEnergyIndex:
+    """
+    频带能量查询索引。
+
+    处理时为每个文件保存一次频率轴和各通道单边幅值谱的累积功率：
+        cumulative[c, k] = sum(power[c, :k])
+    任意频带 [f1, f2] 的能量 = cumulative[c, hi] - cumulative[c, lo]，
+    其中 lo / hi 由两次 searchsorted 得到，无需再切片频谱。
+    功率按均方值计: 交流谱线为 A^2 / 2，直流为 A^2，故频带 RMS = sqrt(能量)。
+    """
+    def __init__(self):
+        # file_name -> {'freq': (F,), 'channels': [name, ...], 'cumulative': (C, F+1)}
+        self._entries = {}
+
+    @staticmethod
+    def _cumulative_power(freq, amplitudes):
+        amplitudes = np.atleast_2d(np.asarray(amplitudes, dtype=np.float64))
+        power = amplitudes ** 2 / 2
+        if len(freq) and freq[0] == 0:
+            power[:, 0] = amplitudes[:, 0] ** 2
+        cumulative = np.zeros((amplitudes.shape[0], amplitudes.shape[1] + 1))
+        np.cumsum(power, axis=1, out=cumulative[:, 1:])
+        return cumulative
+
+    def add_file(self, file_name, freq, channel_names, amplitudes):
+        """
+        登记一个文件的所有通道（共享同一频率轴）。
+
+        参数：
+        file_name     - 文件名（查询时的键）
+        freq          - 频率轴 (F,)
+        channel_names - 通道名列表，长度 C
+        amplitudes    - 单边幅值谱 (C, F)
+        """
+        freq = np.asarray(freq, dtype=np.float64)
+        self._entries[file_name] = {
+            'freq': freq,
+            'channels': list(channel_names),
+            'cumulative': self._cumulative_power(freq, amplitudes)
+        }
+
+    def add_channel(self, file_name, channel_name, freq, amplitude):
+        """
+        向已登记的文件追加一个通道（例如用户自定义信号）。
+        若频率轴与文件已有频率轴不同，则把累积功率插值到已有频率轴上。
+        """
+        entry = self._entries.get(file_name)
+        if entry is None:
+            self.add_file(file_name, freq, [channel_name], np.asarray(amplitude)[np.newaxis, :])
+            return
+
+        freq = np.asarray(freq, dtype=np.float64)
+        cumulative = self._cumulative_power(freq, amplitude)[0]
+        if len(freq) != len(entry['freq']) or not np.allclose(freq, entry['freq']):
+            # 累积功率在谱线右端取值，插值时对齐到谱线上界
+            cumulative = np.concatenate(([0.0], np.interp(entry['freq'], freq, cumulative[1:])))
+
+        if channel_name in entry['channels']:
+            entry['cumulative'][entry['channels'].index(channel_name)] = cumulative
+        else:
+            entry['channels'].append(channel_name)
+            entry['cumulative'] = np.vstack([entry['cumulative'], cumulative])
+
+    def remove_file(self, file_name):
+        self._entries.pop(file_name, None)
+
+    def file_names(self):
+        return list(self._entries.keys())
+
+    def channel_names(self):
+        names = []
+        for entry in self._entries.values():
+            for ch in entry['channels']:
+                if ch not in names:
+                    names.append(ch)
+        return names
+
+    def query(self, bands, file_names=None, channel_names=None, metric='energy'):
+        """
+        批量频带查询。
+
+        参数：
+        bands         - 频带列表 [(f_low, f_high), ...]，单位 Hz，闭区间
+        file_names    - 要查询的文件；None 表示全部已登记文件
+        channel_names - 要查询的通道；None 表示所有出现过的通道
+        metric        - 'energy'（均方值）或 'rms'
+
+        返回：
+        (matrix, file_names, channel_names)，matrix 形状为 files × channels × bands，
+        文件中不存在的通道填 NaN
+        """
+        if metric not in ('energy', 'rms'):
+            raise ValueError("metric 必须为 'energy' 或 'rms'")
+
+        bands = np.atleast_2d(np.asarray(bands, dtype=np.float64))
+        if bands.shape[1] != 2:
+            raise ValueError("bands 的每一项必须是 (f_low, f_high)")
+        f_low = np.minimum(bands[:, 0], bands[:, 1])
+        f_high = np.maximum(bands[:, 0], bands[:, 1])
+
+        if file_names is None:
+            file_names = self.file_names()
+        if channel_names is None:
+            channel_names = self.channel_names()
+        channel_pos = {name: i for i, name in enumerate(channel_names)}
+
+        matrix = np.full((len(file_names), len(channel_names), len(bands)), np.nan)
+        for fi, file_name in enumerate(file_names):
+            entry = self._entries.get(file_name)
+            if entry is None:
+                continue
+            src_rows = []
+            dst_cols = []
+            for row, ch in enumerate(entry['channels']):
+                if ch in channel_pos:
+                    src_rows.append(row)
+                    dst_cols.append(channel_pos[ch])
+            if not src_rows:
+                continue
+
+            lo = np.searchsorted(entry['freq'], f_low, side='left')
+            hi = np.searchsorted(entry['freq'], f_high, side='right')
+            cumulative = entry['cumulative'][src_rows]
+            matrix[fi, dst_cols, :] = cumulative[:, hi] - cumulative[:, lo]
+
+        if metric == 'rms':
+            matrix = np.sqrt(np.maximum(matrix, 0.0))
+        return matrix, list(file_names), list(channel_names)
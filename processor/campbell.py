@@ -0,0 +1,131 @@
+# processor/campbell.py
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+
+from .frf_estimators import get_window, frame_signals, segment_parameters
+
+# 每批 FFT 的复数谱内存上限（字节）
+_BATCH_BYTES = 64 * 1024 * 1024
+
+CAMPBELL_AXES = ('frequency', 'order')
+
+
+def frame_rpm(shaft_freq, nperseg, noverlap):
+    """
+    每帧的平均转速（rpm）：由逐点轴频的累积和相减得到帧内均值，不逐帧循环。
+    """
+    step = nperseg - noverlap
+    cumsum = np.concatenate(([0.0], np.cumsum(np.asarray(shaft_freq, dtype=np.float64))))
+    n_frames = (len(shaft_freq) - nperseg) // step + 1
+    starts = np.arange(n_frames) * step
+    return (cumsum[starts + nperseg] - cumsum[starts]) / nperseg * 60.0
+
+
+def rpm_grid(rpm, rpm_step):
+    """覆盖全部帧转速、间隔 rpm_step 的转速分箱边界。"""
+    low = np.floor(np.min(rpm) / rpm_step) * rpm_step
+    high = np.ceil(np.max(rpm) / rpm_step) * rpm_step
+    if high <= low:
+        high = low + rpm_step
+    return np.arange(low, high + rpm_step / 2, rpm_step)
+
+
+def binned_sums(values, bins, n_bins):
+    """
+    沿最后一维按箱号求和：values (..., M) 的第 m 列加到箱 bins[m]，返回 (..., n_bins)。
+    各行的箱号错开 n_bins，一次 np.bincount 完成全部行，O(M)。
+    """
+    flat = values.reshape(-1, values.shape[-1])
+    offsets = (np.arange(flat.shape[0]) * n_bins)[:, np.newaxis]
+    sums = np.bincount((bins[np.newaxis, :] + offsets).ravel(), weights=flat.ravel(),
+                       minlength=flat.shape[0] * n_bins)
+    return sums.reshape(values.shape[:-1] + (n_bins,))
+
+
+def _frames_to_orders(amplitude, freq, rpm, orders):
+    """
+    把各帧的频率谱按帧转速换算到阶次轴：阶次 o 对应频率 o · rpm / 60，
+    所有帧一次性按分数谱线下标线性插值。amplitude 形状 (C, frames, F)。
+    """
+    df = freq[1] - freq[0]
+    position = orders[np.newaxis, :] * (rpm[:, np.newaxis] / 60.0) / df       # (frames, O)
+    valid = position <= len(freq) - 1
+    lower = np.clip(np.floor(position).astype(np.int64), 0, len(freq) - 2)
+    weight = position - lower
+    frame_idx = np.arange(len(rpm))[:, np.newaxis]
+    out = amplitude[:, frame_idx, lower] * (1.0 - weight) + amplitude[:, frame_idx, lower + 1] * weight
+    return np.where(valid, out, np.nan)
+
+
+def campbell_map(data, fs, shaft_freq, nperseg=4096, overlap=0.75, window='hann',
+                 rpm_step=50.0, axis='frequency', max_order=20.0, order_resolution=0.1):
+    """
+    瀑布图 / 坎贝尔图：对多通道信号分帧批量 STFT，每帧按帧内平均转速归入转速分箱并求平均。
+
+    参数：
+    data             - 形状 (C, N)
+    fs               - 采样频率（Hz）
+    shaft_freq       - 逐点瞬时轴频 (N,)（转/秒）
+    nperseg          - 帧长
+    overlap          - 重叠率
+    window           - 窗函数
+    rpm_step         - 转速分箱宽度（rpm）
+    axis             - 'frequency'：纵轴为频率；'order'：逐帧按转速换算为阶次
+    max_order        - 阶次轴的最大阶次（axis='order'）
+    order_resolution - 阶次轴间隔（axis='order'）
+
+    返回：
+    {'rpm': 分箱中心 (B,), 'axis': 频率或阶次 (F,), 'axis_type', 'amplitude': (C, B, F) 峰值幅值
+     （空箱为 NaN）, 'counts': 每箱帧数 (B,)}
+    """
+    if axis not in CAMPBELL_AXES:
+        raise ValueError(f"不支持的坐标轴类型: {axis}")
+    data = np.atleast_2d(np.asarray(data, dtype=np.float64))
+    n_ch, n_samples = data.shape
+    if len(shaft_freq) != n_samples:
+        raise ValueError("轴频序列与信号长度不一致")
+    nperseg, noverlap = segment_parameters(n_samples, nperseg, overlap)
+    win = get_window(window, nperseg)
+    scale = 2.0 / np.sum(win)
+
+    frames = frame_signals(data, nperseg, noverlap)                    # (C, frames, L)
+    n_frames = frames.shape[1]
+    rpm = frame_rpm(shaft_freq, nperseg, noverlap)
+    freq = rfftfreq(nperseg, d=1.0 / fs)
+    if axis == 'order':
+        axis_values = np.arange(0.0, max_order + order_resolution / 2, order_resolution)
+    else:
+        axis_values = freq
+
+    edges = rpm_grid(rpm, rpm_step)
+    bins = np.clip(np.digitize(rpm, edges) - 1, 0, len(edges) - 2)
+    n_bins = len(edges) - 1
+
+    # 批量 STFT，每批帧数按内存上限决定；各帧按转速箱号经 binned_sums 累加进转速分箱，
+    # 不保留全部帧的谱
+    batch = max(1, min(n_frames, _BATCH_BYTES // max(n_ch * len(freq) * 16, 1)))
+    sums = np.zeros((n_ch, n_bins, len(axis_values)))
+    valid = np.zeros((n_ch, n_bins, len(axis_values)))
+    for start in range(0, n_frames, batch):
+        stop = min(start + batch, n_frames)
+        amplitude = np.abs(rfft(frames[:, start:stop, :] * win, axis=-1)) * scale
+        amplitude[..., 0] /= 2
+        if axis == 'order':
+            amplitude = _frames_to_orders(amplitude, freq, rpm[start:stop], axis_values)
+        finite = ~np.isnan(amplitude)
+        # (C, frames, K) → (C, K, frames)，按帧所在转速箱求和后换回 (C, B, K)
+        frame_bins = bins[start:stop]
+        sums += np.swapaxes(binned_sums(np.swapaxes(np.where(finite, amplitude, 0.0), 1, 2), frame_bins, n_bins), 1, 2)
+        valid += np.swapaxes(binned_sums(np.swapaxes(finite, 1, 2).astype(np.float64), frame_bins, n_bins), 1, 2)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        binned = np.where(valid > 0, sums / valid, np.nan)
+
+    return {
+        'rpm': 0.5 * (edges[:-1] + edges[1:]),
+        'axis': axis_values,
+        'axis_type': axis,
+        'amplitude': binned,
+        'counts': np.bincount(bins, minlength=n_bins),
+    }
@@ -0,0 +1,141 @@
+# processor/csd_matrix.py
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+
+from .frf_estimators import get_window, frame_signals, segment_parameters, mimo_frf_from_spectra, frf_from_spectra
+
+# 每批帧的复数谱内存上限（字节），按通道对数与谱线数自动决定每批帧数
+_BATCH_BYTES = 64 * 1024 * 1024
+
+
+class CrossSpectralMatrix:
+    """
+    全部通道对的互谱密度矩阵 G[i, j](f) = E[conj(Xi) · Xj]（单边 PSD 标定）。
+
+    利用 Hermitian 对称 G[j, i] = conj(G[i, j])，只存上三角（含对角线）：
+        data 形状 (P, F)，P = C(C+1)/2，第 p 行对应通道对 (rows[p], cols[p])。
+    """
+    def __init__(self, freq, channel_names, data, n_averages):
+        self.freq = freq
+        self.channel_names = list(channel_names)
+        self.data = data
+        self.n_averages = n_averages
+        n = len(self.channel_names)
+        self.rows, self.cols = np.triu_indices(n)
+        # (i, j) -> 上三角中的行号
+        self._pair_index = np.full((n, n), -1, dtype=np.int64)
+        self._pair_index[self.rows, self.cols] = np.arange(len(self.rows))
+
+    def index(self, name):
+        return self.channel_names.index(name)
+
+    def get(self, i, j):
+        """返回 G[i, j](f)；下三角由上三角共轭得到。i / j 可为通道名或序号。"""
+        i = self.index(i) if isinstance(i, str) else i
+        j = self.index(j) if isinstance(j, str) else j
+        if i <= j:
+            return self.data[self._pair_index[i, j]]
+        return np.conj(self.data[self._pair_index[j, i]])
+
+    def auto(self, i):
+        """自谱 G[i, i](f)（实数）。"""
+        return np.real(self.get(i, i))
+
+    def submatrix(self, row_names, col_names):
+        """取出 G[rows, cols] 子矩阵，形状 (F, len(rows), len(cols))，全部以索引运算完成。"""
+        r = np.array([self.index(n) if isinstance(n, str) else n for n in row_names])
+        c = np.array([self.index(n) if isinstance(n, str) else n for n in col_names])
+        rr, cc = np.meshgrid(r, c, indexing='ij')
+        upper = rr <= cc
+        idx = self._pair_index[np.minimum(rr, cc), np.maximum(rr, cc)]
+        block = self.data[idx]                                 # (R, C, F)
+        block = np.where(upper[:, :, np.newaxis], block, np.conj(block))
+        return np.moveaxis(block, -1, 0)
+
+    def full(self):
+        """完整的 (F, C, C) 谱矩阵。"""
+        names = list(range(len(self.channel_names)))
+        return self.submatrix(names, names)
+
+    def coherence(self, i, j):
+        """常相干函数 |Gij|² / (Gii · Gjj)。"""
+        tiny = np.finfo(np.float64).tiny
+        return np.clip(np.abs(self.get(i, j)) ** 2 /
+                       np.maximum(self.auto(i) * self.auto(j), tiny), 0.0, 1.0)
+
+    def frf(self, input_names, output_names):
+        """
+        由缓存的谱矩阵估计（多参考）FRF，返回与 estimate_mimo_frf 相同结构的字典，
+        无需重新做 FFT。
+        """
+        Gxx = self.submatrix(input_names, input_names)           # (F, R, R)
+        Gyx = np.transpose(self.submatrix(input_names, output_names), (0, 2, 1))  # (F, C, R)
+        out_idx = [self.index(n) if isinstance(n, str) else n for n in output_names]
+        Gyy = np.vstack([self.auto(i) for i in out_idx])         # (C, F)
+        H, multiple_coherence, coherence = mimo_frf_from_spectra(Gxx, Gyy, Gyx)
+
+        estimators = {'H1': H}
+        if len(input_names) == 1:
+            single, _ = frf_from_spectra(np.real(Gxx[:, 0, 0]), Gyy, Gyx[:, :, 0].T)
+            estimators['H2'] = single['H2'][:, np.newaxis, :]
+            estimators['Hv'] = single['Hv'][:, np.newaxis, :]
+        return {
+            'freq': self.freq,
+            'estimators': estimators,
+            'multiple_coherence': multiple_coherence,
+            'coherence': coherence,
+            'n_averages': self.n_averages
+        }
+
+    def singular_values(self, channel_names=None):
+        """FDD：各频率线上谱矩阵的奇异值，形状 (C, F)，按降序排列。"""
+        names = channel_names if channel_names is not None else list(range(len(self.channel_names)))
+        return np.linalg.svd(self.submatrix(names, names), compute_uv=False).T
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+
+def compute_csd_matrix(data, fs, channel_names, nperseg=4096, overlap=0.5, window='hann'):
+    """
+    对多通道数据块做一次分帧、批量 FFT，计算全部通道对的互谱矩阵（只算上三角）。
+
+    参数：
+    data          - 形状 (C, N)
+    fs            - 采样频率（Hz）
+    channel_names - 通道名列表
+    nperseg       - 帧长，超过信号长度时自动截断
+    overlap       - 重叠率
+    window        - 窗函数名称
+
+    返回：CrossSpectralMatrix
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=np.float64))
+    n_ch, n_samples = data.shape
+    nperseg, noverlap = segment_parameters(n_samples, nperseg, overlap)
+    win = get_window(window, nperseg)
+
+    frames = frame_signals(data, nperseg, noverlap)
+    n_frames = frames.shape[1]
+    n_freq = nperseg // 2 + 1
+    rows, cols = np.triu_indices(n_ch)
+
+    per_frame = max(len(rows) * n_freq * 16, 1)
+    batch = max(1, min(n_frames, _BATCH_BYTES // per_frame))
+
+    G = np.zeros((len(rows), n_freq), dtype=np.complex128)
+    for start in range(0, n_frames, batch):
+        spec = rfft(frames[:, start:start + batch, :] * win, axis=-1)   # (C, frames, F)
+        G += np.sum(np.conj(spec[rows]) * spec[cols], axis=1)
+
+    # 单边 PSD 标定
+    scale = 2.0 / (fs * np.sum(win ** 2) * n_frames)
+    G *= scale
+    G[:, 0] /= 2
+    if nperseg % 2 == 0:
+        G[:, -1] /= 2
+
+    freq = rfftfreq(nperseg, d=1.0 / fs)
+    return CrossSpectralMatrix(freq, channel_names, G, n_frames)
@@ -0,0 +1,220 @@
+# processor/feature_store.py
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.fft import next_fast_len
+from scipy.ndimage import maximum_filter1d
+from scipy.signal import butter, filtfilt, hilbert
+
+from .sliding_stats import sliding_features, default_window
+
+# 特征曲线：界面名称 -> 条目 tracks 中的键（按此顺序导出）
+FEATURE_TRACKS = {
+    "RMS": 'rms',
+    "峰值因子": 'crest_factor',
+    "偏度": 'skewness',
+    "峭度": 'kurtosis',
+    "TKEO": 'tkeo',
+    "包络": 'envelope',
+    "增强包络": 'enhanced_envelope',
+}
+
+# 增强包络的默认带通范围 (Hz)
+DEFAULT_ENVELOPE_BAND = (500.0, 5000.0)
+# TKEO 滑动平均窗长（秒，至少 10 点）与增强包络的平滑低通截止频率 (Hz)
+_TKEO_SMOOTH_SECONDS = 0.002
+_ENVELOPE_SMOOTH_HZ = 50.0
+
+
+def envelope_band(fs, low=None, high=None):
+    """
+    把增强包络的带通范围限制在 (1 Hz, 0.95 × 奈奎斯特频率) 内，上限至少比下限高 10 Hz。
+    low / high 为 None 时取默认范围。返回 (下限, 上限)，作为特征仓库键的一部分。
+    """
+    nyquist = fs / 2
+    low = DEFAULT_ENVELOPE_BAND[0] if low is None else float(low)
+    high = DEFAULT_ENVELOPE_BAND[1] if high is None else float(high)
+    low = max(1.0, min(low, nyquist * 0.95))
+    high = max(low + 10, min(high, nyquist * 0.95))
+    return low, high
+
+
+def _hilbert_envelope(x):
+    """解析信号的幅值；FFT 长度取 next_fast_len，避免长度为大素数时变慢。"""
+    n = len(x)
+    return np.abs(hilbert(x, N=next_fast_len(n))[:n])
+
+
+def tkeo_track(x, fs):
+    """平滑后的 |TKEO|，TKEO[n] = x[n]^2 - x[n-1] * x[n+1]，对冲击极其敏感。"""
+    tkeo = np.zeros(len(x))
+    if len(x) < 3:
+        return tkeo
+    tkeo[1:-1] = x[1:-1] ** 2 - x[:-2] * x[2:]
+    tkeo[0] = tkeo[1]
+    tkeo[-1] = tkeo[-2]
+    smooth_window = max(int(fs * _TKEO_SMOOTH_SECONDS), 10)
+    kernel = np.ones(smooth_window) / smooth_window
+    return np.convolve(np.abs(tkeo), kernel, mode='same')
+
+
+def enhanced_envelope_track(x, fs, band):
+    """增强包络：4 阶带通滤波 + Hilbert 包络 + 2 阶低通平滑。"""
+    nyquist = fs / 2
+    b, a = butter(4, [band[0] / nyquist, band[1] / nyquist], btype='band')
+    envelope = _hilbert_envelope(filtfilt(b, a, x))
+    smooth_cutoff_norm = _ENVELOPE_SMOOTH_HZ / nyquist
+    if smooth_cutoff_norm < 1:
+        b_smooth, a_smooth = butter(2, smooth_cutoff_norm, btype='low')
+        envelope = filtfilt(b_smooth, a_smooth, envelope)
+    return envelope
+
+
+def compute_feature_tracks(data, fs, window_seconds=0.01, band=None):
+    """
+    计算一路信号的全部特征曲线，按窗口步长抽取、以 float32 存储。
+
+    矩特征取各窗口的统计量；TKEO / 包络 / 增强包络在整段信号上计算后取窗口中心处的值
+    （包络未经平滑，先取步长范围内的最大值，抽取后不丢冲击峰值）。
+
+    参数：
+    band - 增强包络的带通范围 (下限, 上限)，经 envelope_band 限制；None 为默认范围
+
+    返回：
+    {'window', 'step', 'length', 'band', 'tracks': {键: (M,) float32}}；第 m 个值对应窗口中心
+    window // 2 + m * step（采样点），不单独保存时间轴
+    """
+    data = np.asarray(data, dtype=np.float64)
+    window, step = default_window(fs, window_seconds)
+    band = envelope_band(fs, *(band or (None, None)))
+    features = sliding_features(data, window, step)
+    tracks = {key: features[key].astype(np.float32) for key in ('rms', 'crest_factor', 'skewness', 'kurtosis')}
+    centers = features['center']
+    if len(centers):
+        envelope = maximum_filter1d(_hilbert_envelope(data), size=step, mode='nearest')
+        tracks['tkeo'] = tkeo_track(data, fs)[centers].astype(np.float32)
+        tracks['envelope'] = envelope[centers].astype(np.float32)
+        tracks['enhanced_envelope'] = enhanced_envelope_track(data, fs, band)[centers].astype(np.float32)
+    else:
+        for key in ('tkeo', 'envelope', 'enhanced_envelope'):
+            tracks[key] = np.empty(0, dtype=np.float32)
+    return {
+        'window': window,
+        'step': step,
+        'length': len(data),
+        'band': band,
+        'tracks': tracks,
+    }
+
+
+class FeatureStore:
+    """
+    全部文件 × 通道的时域特征曲线仓库，键为 (文件, 通道, 增强包络带通范围)。
+
+    带通范围经 envelope_band 限制后入键，修改范围即落到新键，切回原范围时仍可命中。
+    条目记录计算时的窗长 / 步长与数据长度，窗设置不同或长度不符时视为未命中；
+    通道数据被替换时由调用方 invalidate。每个 (文件, 通道) 带版本号：后台计算开始后该通道被
+    invalidate，计算结果不再写入，避免旧数据覆盖新数据。所有操作加锁，可在后台线程与界面线程间共享。
+    """
+    def __init__(self):
+        self._entries = {}       # (文件, 通道, 带通范围) -> 条目，见 compute_feature_tracks
+        self._versions = {}      # (文件, 通道) -> invalidate 次数
+        self._lock = threading.Lock()
+
+    def version(self, file_name, channel_name):
+        # 读取即登记，使之后的 invalidate 能使尚未存入条目的计算失效
+        with self._lock:
+            return self._versions.setdefault((file_name, channel_name), 0)
+
+    def get(self, file_name, channel_name, fs, window_seconds, length=None, band=None):
+        """命中返回条目，窗设置或数据长度不符时返回 None。"""
+        window, step = default_window(fs, window_seconds)
+        key = (file_name, channel_name, envelope_band(fs, *(band or (None, None))))
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or (entry['window'], entry['step']) != (window, step):
+            return None
+        if length is not None and entry['length'] != length:
+            return None
+        return entry
+
+    def put(self, file_name, channel_name, entry, version=None):
+        """存入条目（带通范围取自条目）；给定 version 且该通道此后已被 invalidate 时丢弃。"""
+        with self._lock:
+            if version is not None and self._versions.get((file_name, channel_name), 0) != version:
+                return False
+            self._entries[(file_name, channel_name, entry['band'])] = entry
+            return True
+
+    def invalidate(self, file_name=None, channel_name=None):
+        """清除某个通道 / 某个文件（channel_name 为 None）/ 全部（均为 None）的条目。"""
+        def matches(key):
+            return (file_name is None or key[0] == file_name) and (channel_name is None or key[1] == channel_name)
+
+        with self._lock:
+            for key in [key for key in self._entries if matches(key)]:
+                del self._entries[key]
+            for key in set(self._versions) | {key[:2] for key in self._entries}:
+                if matches(key):
+                    self._versions[key] = self._versions.get(key, 0) + 1
+
+    def clear(self):
+        self.invalidate(None)
+
+    def compute_all(self, channels, window_seconds=0.01, band=None, max_workers=None):
+        """
+        用线程池计算多路信号的特征曲线并存入（numpy 的累积和、FFT 与滤波在大数组上释放 GIL）。
+        已有相同窗设置与带通范围条目的通道跳过。
+
+        参数：
+        channels - {(文件, 通道): (数据 (N,), 采样频率)}
+        band     - 增强包络的带通范围 (下限, 上限)，None 为默认范围
+
+        返回：新计算的条目数
+        """
+        jobs = []
+        for (file_name, channel_name), (data, fs) in channels.items():
+            if self.get(file_name, channel_name, fs, window_seconds, len(data), band) is None:
+                jobs.append((file_name, channel_name, data, fs, self.version(file_name, channel_name)))
+        if not jobs:
+            return 0
+
+        def run(job):
+            file_name, channel_name, data, fs, version = job
+            return self.put(file_name, channel_name, compute_feature_tracks(data, fs, window_seconds, band), version)
+
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+            return sum(executor.map(run, jobs))
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return sum(track.nbytes for entry in self._entries.values() for track in entry['tracks'].values())
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def track_times(entry, fs):
+    """条目中各特征值对应的时刻（窗口中心，秒）。"""
+    n = len(next(iter(entry['tracks'].values())))
+    return (entry['window'] // 2 + np.arange(n) * entry['step']) / fs
+
+
+def feature_table_text(entries, fs):
+    """
+    把同一文件各通道的特征曲线展开为制表符分隔文本：第一列为窗口中心时刻，
+    其余每列一个 (通道, 特征)。entries 为 [(通道名, 条目)]，各条目的窗设置与长度应一致。
+    """
+    if not entries:
+        return ""
+    times = track_times(entries[0][1], fs)
+    columns = [(f"{name}_{label}", entry['tracks'][key]) for name, entry in entries
+               for label, key in FEATURE_TRACKS.items()]
+    header = "\t".join(["时间(s)"] + [title for title, _ in columns])
+    table = np.column_stack([times] + [values for _, values in columns])
+    lines = [header] + ["\t".join(f"{v:.6e}" for v in row) for row in table]
+    return "\n".join(lines) + "\n"
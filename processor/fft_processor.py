@@ -10,7 +10,12 @@ from tkinter import messagebox
 from model.data_models import (
     ProcessingParameters, FFTResult, SensorSettings, ProcessingResults
 )
-from .vk2 import vk2
+from . import vk2_batch
+from .omega_arithmetic import integrate_acceleration, differentiate_displacement
+from .tacho import shaft_rpm
+from .band_energy import BandEnergyIndex
+from .frf_estimators import estimate_mimo_frf
+from .impact_test import impact_frf
 
 class FFTProcessor:
     """
@@ -40,16 +45,27 @@ class FFTProcessor:
         feature_file_path = os.path.join(self.params.output_folder, "features_with_fft.txt")
         os.makedirs(self.params.output_folder, exist_ok=True)
 
-        # 是否存在参考通道 (用以决定是否计算 FRF)
-        ref_channel_index = None
-        for idx, ch_settings in enumerate(self.params.sensor_settings):
-            if ch_settings.is_reference:
-                ref_channel_index = idx
-                break
-        compute_frf = (ref_channel_index is not None)
+        # 收集全部参考通道 (用以决定是否计算 FRF；多个参考时估计 MIMO FRF 矩阵)
+        ref_channel_indices = [
+            idx for idx, ch_settings in enumerate(self.params.sensor_settings)
+            if ch_settings.is_reference
+        ]
+        compute_frf = bool(ref_channel_indices)
+
+        # 力锤试验模式：以力锤通道（优先取被设为参考的）为输入，按敲击平均
+        hammer_channel_index = None
+        if self.params.impact_test:
+            hammer_indices = [
+                idx for idx, ch_settings in enumerate(self.params.sensor_settings)
+                if ch_settings.sensor_type == '力锤'
+            ]
+            hammer_refs = [idx for idx in hammer_indices if idx in ref_channel_indices]
+            if hammer_refs or hammer_indices:
+                hammer_channel_index = (hammer_refs or hammer_indices)[0]
 
         # 建立空的处理结果存储
         processing_results = ProcessingResults(self.params.sensor_settings)
+        processing_results.band_energy_index = BandEnergyIndex()
 
         # 寻找匹配文件并排序
         matched_files = sorted(
@@ -92,29 +108,30 @@ class FFTProcessor:
 
                         # 数据换算
                         data_converted, unit, name = self.convert_data(column, col_idx)
-                        data_processed = data_converted
 
-                        N = len(data_processed)
-                        fft_values = fft(data_processed)
-                        freq = fftfreq(N, d=1 / self.params.sampling_rate)
-                        idx_positive = np.where(freq >= 0)
-                        freq = freq[idx_positive]
-                        fft_values = fft_values[idx_positive]
-
-                        fft_amplitude = np.abs(fft_values) * 2 / N
-                        fft_amplitude[0] = fft_amplitude[0] / 2
-
-                        fft_result = FFTResult(freq, fft_amplitude, np.angle(fft_values), name, unit)
+                        fft_result = self.build_fft_result(data_converted, name, unit)
                         fft_results.append({
                             'col_idx': col_idx,
                             'fft_result': fft_result,
                             'data_converted': data_converted
                         })
 
+                    # 转速传感器通道：由脉冲计算逐点转速，作为独立的转速通道
+                    fft_results.extend(self.derive_speed_channels(fft_results))
+
+                    # (可选) 加速度通道频域积分为速度 / 位移
+                    if self.params.integrate_acceleration:
+                        fft_results.extend(self.derive_integrated_channels(fft_results))
+                    # (可选) 电涡流位移通道频域微分为速度 / 加速度
+                    if self.params.differentiate_displacement:
+                        fft_results.extend(self.derive_differentiated_channels(fft_results))
+
                     # 如果启用了频响曲线计算，进行计算并保存结果
                     frf_results = []
-                    if compute_frf:
-                        frf_results = self.compute_frequency_response(fft_results, ref_channel_index, base_name, feature_file)
+                    if hammer_channel_index is not None:
+                        frf_results = self.compute_impact_response(fft_results, hammer_channel_index, feature_file)
+                    elif compute_frf:
+                        frf_results = self.compute_frequency_response(fft_results, ref_channel_indices, base_name, feature_file)
 
                     feature_file.write("\n")
 
@@ -125,6 +142,14 @@ class FFTProcessor:
                         'base_name': base_name
                     })
 
+                    # 登记累积功率，供频带能量批量查询
+                    processing_results.band_energy_index.add_file(
+                        file_name,
+                        fft_results[0]['fft_result'].freq,
+                        [e['fft_result'].name for e in fft_results],
+                        np.vstack([e['fft_result'].amplitude for e in fft_results])
+                    )
+
                 self.log_message(f"已处理: {file_name}\n")
 
             except Exception as e:
@@ -162,30 +187,116 @@ class FFTProcessor:
         参数：
         data       - 输入信号数据
         fs         - 采样频率
-        vk2_params - vk2 函数所需的参数字典，包括 r、filtord 和 freq_list
+        vk2_params - vk2 函数所需的参数字典，包括 r、filtord 和 freq_list；
+                     可选 block_seconds（> 0 时分块重叠求解）与 block_tol
         """
-        freq_list = vk2_params.get('freq_list', None)
-        r = vk2_params.get('r', 1000)
-        filtord = vk2_params.get('filtord', 1)
+        return vk2_batch.remove_frequencies(data, fs, vk2_params)
 
-        if freq_list is None:
-            raise ValueError("需要提供要去除的频率列表 freq_list")
+    def track_orders(self, data, fs, shaft_freq, vk2_params):
+        """
+        阶次跟踪 VK2：按瞬时轴频提取或去除指定阶次。
 
+        参数：
+        data       - 输入信号数据
+        fs         - 采样频率
+        shaft_freq - 与 data 等长的瞬时轴频（转/秒）
+        vk2_params - 参数字典，包括 r、filtord、order_list 与 order_action（'remove' / 'extract'）；
+                     可选 block_seconds 与 block_tol，同 remove_specified_frequencies
+        """
+        return vk2_batch.track_orders(data, fs, shaft_freq, vk2_params)
+
+    def build_fft_result(self, data, name, unit):
+        """对单路时域数据做 FFT，返回单边幅值谱的 FFTResult。"""
         N = len(data)
-        t = np.arange(N) / fs
+        fft_values = fft(data)
+        freq = fftfreq(N, d=1 / self.params.sampling_rate)
+        idx_positive = np.where(freq >= 0)
+        freq = freq[idx_positive]
+        fft_values = fft_values[idx_positive]
 
-        # 初始化被提取的频率成分的总和
-        extracted_components = np.zeros(N, dtype=np.float64)
+        fft_amplitude = np.abs(fft_values) * 2 / N
+        fft_amplitude[0] = fft_amplitude[0] / 2
 
-        for freq in freq_list:
-            f_vector = np.full(N, freq)
-            x, bw, T, xr = vk2(data, f_vector, fs, r, filtord)
-            extracted_components += xr  # 累加被提取的频率成分
+        return FFTResult(freq, fft_amplitude, np.angle(fft_values), name, unit)
 
-        # 从原始信号中减去提取的频率成分
-        y_filtered = data - extracted_components
+    def derive_integrated_channels(self, fft_results):
+        """
+        把 fft_results 中所有 '加速度' 通道按单位分组，每组一次 rfft 同时积分出速度和位移，
+        返回新的通道条目列表（channel_type 为 '速度' / '位移'），不需要重新读取文件。
+        """
+        return self._derive_omega_channels(fft_results, '加速度', integrate_acceleration,
+                                           self.params.integration_highpass, ('速度', '位移'))
 
-        return y_filtered
+    def derive_differentiated_channels(self, fft_results):
+        """
+        把 fft_results 中所有 '电涡流'（位移）通道按单位分组，每组一次 rfft 同时微分出速度和加速度，
+        返回新的通道条目列表（channel_type 为 '速度' / '加速度'），与 derive_integrated_channels 对应。
+        """
+        return self._derive_omega_channels(fft_results, '电涡流', differentiate_displacement,
+                                           self.params.differentiation_lowpass, ('速度', '加速度'))
+
+    def _derive_omega_channels(self, fft_results, sensor_type, transform, cutoff, channel_types):
+        """
+        积分 / 微分派生通道的公共部分：挑出 sensor_type 的通道并按单位分组，每组调用一次
+        transform(矩阵 (N, C), 采样频率, 单位, cutoff) -> (一次结果, 单位, 二次结果, 单位)，
+        两个结果分别以 channel_types 中的类型命名（通道名_类型）并计算 FFT。
+        """
+        groups = {}
+        for entry in fft_results:
+            col_idx = entry.get('col_idx', -1)
+            if col_idx < 0 or entry.get('data_converted') is None:
+                continue
+            if self.params.sensor_settings[col_idx].sensor_type != sensor_type:
+                continue
+            groups.setdefault(entry['fft_result'].unit, []).append(entry)
+
+        derived = []
+        for unit, entries in groups.items():
+            matrix = np.column_stack([e['data_converted'] for e in entries])
+            first, first_unit, second, second_unit = transform(matrix, self.params.sampling_rate, unit, cutoff)
+            for channel_type, result, new_unit in ((channel_types[0], first, first_unit),
+                                                   (channel_types[1], second, second_unit)):
+                for k, entry in enumerate(entries):
+                    new_name = f"{entry['fft_result'].name}_{channel_type}"
+                    new_data = result[:, k]
+                    derived.append({
+                        'col_idx': -1,
+                        'source_col_idx': entry['col_idx'],
+                        'channel_type': channel_type,
+                        'fft_result': self.build_fft_result(new_data, new_name, new_unit),
+                        'data_converted': new_data
+                    })
+        return derived
+
+    def derive_speed_channels(self, fft_results):
+        """
+        对 fft_results 中所有 '转速' 传感器通道（参数 a 为每沿角度、b 为触发门限）计算逐点转速，
+        返回新的通道条目列表（名称加后缀 _转速，单位 rpm，channel_type 为 '转速'）。
+        """
+        derived = []
+        for entry in fft_results:
+            col_idx = entry.get('col_idx', -1)
+            if col_idx < 0 or entry.get('data_converted') is None:
+                continue
+            ch_settings = self.params.sensor_settings[col_idx]
+            if ch_settings.sensor_type != '转速':
+                continue
+            # 未填写 a / b（如旧配置文件）时沿用每沿 3°、门限 2.5 V 的默认约定
+            deg_per_edge = ch_settings.a if ch_settings.a is not None else 3.0
+            threshold = ch_settings.b if ch_settings.b is not None else 2.5
+            rpm = shaft_rpm(entry['data_converted'], self.params.sampling_rate, deg_per_edge, threshold)
+            if rpm is None:
+                self.log_message(f"转速通道 {ch_settings.name} 未检测到足够的脉冲沿，未生成转速通道。\n")
+                continue
+            new_name = f"{entry['fft_result'].name}_转速"
+            derived.append({
+                'col_idx': -1,
+                'source_col_idx': col_idx,
+                'channel_type': '转速',
+                'fft_result': self.build_fft_result(rpm, new_name, 'rpm'),
+                'data_converted': rpm
+            })
+        return derived
 
     def get_base_name(self, file_name):
         base_name_parts = file_name.split("-")
@@ -215,48 +326,160 @@ class FFTProcessor:
 
         return data_converted, unit, name
 
-    def compute_frequency_response(self, fft_results, ref_channel_index, base_name, feature_file):
-        reference_result = None
-        for result in fft_results:
-            if result['col_idx'] == ref_channel_index:
-                reference_result = result
-                break
-        if reference_result is None:
+    def compute_frequency_response(self, fft_results, ref_channel_indices, base_name, feature_file):
+        """
+        以全部参考通道为输入，对其余所有通道批量估计 FRF 矩阵与相干函数。
+        单参考时与 H1/H2/Hv 估计一致；多参考时 H = Gyx·Gxx⁻¹，并给出多重相干。
+        返回 frf_results 列表，每个 (输出, 输入) 对一项，H_f_magnitude / H_f_phase 默认取 H1。
+        """
+        if np.isscalar(ref_channel_indices):
+            ref_channel_indices = [ref_channel_indices]
+        reference_entries = [
+            r for ref_idx in ref_channel_indices
+            for r in fft_results if r['col_idx'] == ref_idx
+        ]
+        if not reference_entries:
             self.log_message(f"未找到参考信号的 FFT 结果。\n")
             return []
 
-        ref_fft_values = reference_result['fft_result'].amplitude
-        ref_name = reference_result['fft_result'].name
+        n_samples = len(reference_entries[0]['data_converted'])
+        response_entries = [
+            r for r in fft_results
+            if r['col_idx'] not in ref_channel_indices and r.get('data_converted') is not None
+            and len(r['data_converted']) == n_samples
+        ]
+        if not response_entries:
+            return []
 
-        frf_results = []
+        frf_results = self.calculate_frf_matrix(
+            np.vstack([r['data_converted'] for r in reference_entries]),
+            np.vstack([r['data_converted'] for r in response_entries]),
+            self.params.sampling_rate,
+            [r['fft_result'].name for r in reference_entries],
+            [r['fft_result'].name for r in response_entries]
+        )
 
-        for result in fft_results:
-            if result['col_idx'] == ref_channel_index:
-                continue  # 跳过参考信号
+        # 写入特征文件
+        for item in frf_results:
+            feature_file.write(
+                f"  频响函数 {item['name']} / {item['ref_name']}:\n"
+                f"    频率范围: {item['freq'][0]} - {item['freq'][-1]} Hz\n"
+                f"    平均次数: {item['n_averages']}\n"
+            )
+
+        return frf_results
 
-            H_f = result['fft_result'].amplitude / ref_fft_values  # 计算频响函数
-            H_f_magnitude = np.abs(H_f)
-            H_f_phase = np.angle(H_f)
+    def compute_impact_response(self, fft_results, hammer_channel_index, feature_file):
+        """
+        力锤试验：在力锤通道上检测敲击、剔除连击，截取记录加力窗 / 指数窗后，
+        对其余全部通道批量做多次敲击平均的 FRF (H1/H2/Hv)。
+        返回与 compute_frequency_response 相同结构的 frf_results 列表。
+        """
+        hammer_entry = None
+        for result in fft_results:
+            if result['col_idx'] == hammer_channel_index:
+                hammer_entry = result
+                break
+        if hammer_entry is None:
+            self.log_message(f"未找到力锤通道的数据。\n")
+            return []
 
-            freq = result['fft_result'].freq
-            name = result['fft_result'].name
-            response_name = f"{name}_FRF"
+        force = hammer_entry['data_converted']
+        ref_name = hammer_entry['fft_result'].name
+        response_entries = [
+            r for r in fft_results
+            if r['col_idx'] != hammer_channel_index and r.get('data_converted') is not None
+            and len(r['data_converted']) == len(force)
+        ]
+        if not response_entries:
+            return []
 
-            # 写入特征文件
-            feature_file.write(
-                f"  频响函数 {name} / {ref_name}:\n"
-                f"    频率范围: {freq[0]} - {freq[-1]} Hz\n"
+        record_length = int(round(self.params.impact_record_time * self.params.sampling_rate))
+        if record_length < 8 or record_length > len(force):
+            self.log_message(
+                f"力锤通道 {ref_name}: 记录时长 {self.params.impact_record_time} s 无效或超过信号长度 "
+                f"({len(force) / self.params.sampling_rate:.3f} s)，跳过力锤 FRF。\n"
             )
+            return []
 
+        impact = impact_frf(
+            force,
+            np.vstack([r['data_converted'] for r in response_entries]),
+            self.params.sampling_rate,
+            record_time=self.params.impact_record_time,
+            trigger_level=self.params.impact_trigger_level
+        )
+        if impact is None:
+            self.log_message(f"力锤通道 {ref_name} 未检测到有效敲击。\n")
+            return []
+
+        feature_file.write(
+            f"  力锤试验 {ref_name}: 有效敲击 {impact['n_hits']} 次，"
+            f"剔除 {len(impact['rejected_times'])} 次，指数窗时间常数 {impact['exp_tau']:.4f} s\n"
+        )
+        self.log_message(
+            f"力锤通道 {ref_name}: 有效敲击 {impact['n_hits']} 次，剔除连击/越界 {len(impact['rejected_times'])} 次\n"
+        )
+
+        frf_results = []
+        for k, result in enumerate(response_entries):
+            estimators = {key: H[k] for key, H in impact['estimators'].items()}
             frf_results.append({
-                'freq': freq,
-                'H_f_magnitude': H_f_magnitude,
-                'H_f_phase': H_f_phase,
-                'name': name
+                'freq': impact['freq'],
+                'H_f_magnitude': np.abs(estimators['H1']),
+                'H_f_phase': np.angle(estimators['H1']),
+                'estimators': estimators,
+                'coherence': impact['coherence'][k],
+                'ordinary_coherence': impact['coherence'][k],
+                'n_averages': impact['n_hits'],
+                'hit_times': impact['hit_times'],
+                'exp_tau': impact['exp_tau'],
+                'name': result['fft_result'].name,
+                'ref_name': ref_name
             })
-
         return frf_results
 
+    def calculate_frf_matrix(self, input_matrix, output_matrix, fs, input_names, output_names):
+        """
+        多参考 FRF 矩阵估计：所有输入 / 输出通道共享同一次分帧与批量 FFT，
+        各频率线上的 Gxx 求逆以批量线性求解完成。
+
+        返回: 按 (输出, 输入) 展开的字典列表，每项包含 freq, H_f_magnitude, H_f_phase (H1),
+              estimators, coherence (输出的多重相干), ordinary_coherence, n_averages, name, ref_name
+        """
+        input_matrix = np.atleast_2d(input_matrix)
+        output_matrix = np.atleast_2d(output_matrix)
+        if output_matrix.shape[1] != input_matrix.shape[1]:
+            self.log_message("错误：计算FRF时输入和输出数据长度不一致！\n")
+            return []
+
+        frf = estimate_mimo_frf(
+            input_matrix, output_matrix, fs,
+            nperseg=self.params.frf_nperseg,
+            overlap=self.params.frf_overlap
+        )
+        return self.frf_items_from_estimate(frf, input_names, output_names)
+
+    @staticmethod
+    def frf_items_from_estimate(frf, input_names, output_names):
+        """把 estimate_mimo_frf（或互谱矩阵缓存）给出的 FRF 矩阵展开为按 (输出, 输入) 的列表。"""
+        results = []
+        for c, name in enumerate(output_names):
+            for r, ref_name in enumerate(input_names):
+                estimators = {key: H[c, r] for key, H in frf['estimators'].items()}
+                results.append({
+                    'freq': frf['freq'],
+                    'H_f_magnitude': np.abs(estimators['H1']),
+                    'H_f_phase': np.angle(estimators['H1']),
+                    'estimators': estimators,
+                    'coherence': frf['multiple_coherence'][c],
+                    'ordinary_coherence': frf['coherence'][c, r],
+                    'n_averages': frf['n_averages'],
+                    'name': name,
+                    'ref_name': ref_name
+                })
+        return results
+
     def process_user_defined_signals(self, user_data, custom_name):
         """
         接收用户自定义的单路时域数据 (user_data)，并执行:
@@ -311,44 +534,3 @@ class FFTProcessor:
             user_frf_result = None
 
         return user_fft_result, user_frf_result
-
-    def calculate_frf_from_data(self, input_data, output_data, fs):
-        """
-        根据输入的时域数据计算频响函数 (FRF)。
-        使用频谱比值法 (H = Gxy / Gxx 的简化，直接用 FFT 比值)
-        
-        返回: 包含 freq, H_f_magnitude, H_f_phase 的字典，或在错误时返回 None
-        """
-        if len(input_data) != len(output_data):
-            self.log_message("错误：计算FRF时输入和输出数据长度不一致！\n")
-            return None
-        
-        N = len(input_data)
-        if N == 0:
-            return None
-            
-        # 计算 FFT
-        fft_input = np.fft.fft(input_data)
-        fft_output = np.fft.fft(output_data)
-        freq = np.fft.fftfreq(N, d=1.0/fs)
-        
-        # 只取正频率部分
-        idx_pos = np.where(freq >= 0)
-        freq = freq[idx_pos]
-        fft_input = fft_input[idx_pos]
-        fft_output = fft_output[idx_pos]
-        
-        # 计算 FRF (频谱比值法) - 注意处理除零
-        # 为避免除零，可以在分母加一个小数，或者只在分母大于某个阈值时计算
-        epsilon = 1e-12 # 避免除零的小数
-        H_f = fft_output / (fft_input + epsilon)
-        
-        H_f_magnitude = np.abs(H_f)
-        H_f_phase = np.angle(H_f)
-        
-        return {
-            'freq': freq,
-            'H_f_magnitude': H_f_magnitude,
-            'H_f_phase': H_f_phase
-            # 'name' is not needed here, will be handled by controller
-        }
@@ -0,0 +1,47 @@
+# processor/frame_transform.py
+
+import numpy as np
+
+
+def rotating_to_stationary(x_rot, y_rot, angle, offsets):
+    """
+    旋转坐标系 → 静止坐标系的坐标变换（与 config/自定义函数测试/Fx0.py、Fy30.py 等脚本的公式一致）：
+
+        Fx(φ) =  x · cos(θ + φ) + y · sin(θ + φ)
+        Fy(φ) = -x · sin(θ + φ) + y · cos(θ + φ)
+
+    θ 为逐点瞬时轴转角（不是由平均转速推算的 2π·n·t）。先算 φ = 0 时的 A = Fx(0)、B = Fy(0)，
+    其余偏置角由 Fx(φ) = A cosφ + B sinφ、Fy(φ) = -A sinφ + B cosφ 广播得到，
+    整个过程只对 θ 求一次 cos / sin。
+
+    参数：
+    x_rot, y_rot - 旋转坐标系下成对的 x / y 通道，形状 (P, N)
+    angle        - 逐点轴转角 (N,)（弧度）
+    offsets      - 角度偏置 (K,)（弧度）
+
+    返回：
+    (Fx, Fy)，形状均为 (P, K, N)
+    """
+    x_rot = np.atleast_2d(np.asarray(x_rot, dtype=np.float64))
+    y_rot = np.atleast_2d(np.asarray(y_rot, dtype=np.float64))
+    offsets = np.atleast_1d(np.asarray(offsets, dtype=np.float64))
+    cos_t, sin_t = np.cos(angle), np.sin(angle)
+    a = (x_rot * cos_t + y_rot * sin_t)[:, np.newaxis, :]          # (P, 1, N)
+    b = (y_rot * cos_t - x_rot * sin_t)[:, np.newaxis, :]
+    cos_o = np.cos(offsets)[np.newaxis, :, np.newaxis]              # (1, K, 1)
+    sin_o = np.sin(offsets)[np.newaxis, :, np.newaxis]
+    return a * cos_o + b * sin_o, b * cos_o - a * sin_o
+
+
+def transform_channel_names(pairs, offsets_deg):
+    """
+    变换输出通道名：单对通道时为 Fx0、Fy30 …（与原脚本命名一致），
+    多对时加 x 通道名前缀，如 力环1_Fx0。返回 (fx_names, fy_names)，均为 P × K 的嵌套列表。
+    """
+    def label(value):
+        return f"{value:g}"
+
+    prefix = [("" if len(pairs) == 1 else f"{x_name}_") for x_name, _ in pairs]
+    fx_names = [[f"{p}Fx{label(o)}" for o in offsets_deg] for p in prefix]
+    fy_names = [[f"{p}Fy{label(o)}" for o in offsets_deg] for p in prefix]
+    return fx_names, fy_names
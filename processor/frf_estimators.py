@@ -0,0 +1,189 @@
+# processor/frf_estimators.py
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, rfftfreq
+
+FRF_ESTIMATORS = ('H1', 'H2', 'Hv')
+
+# 每批同时做 FFT 的帧数，限制框架化后复数谱的内存占用
+_FRAMES_PER_BATCH = 64
+
+
+def get_window(name, n):
+    """按名称返回长度为 n 的窗函数数组。"""
+    name = (name or 'hann').lower()
+    if name in ('hann', 'hanning'):
+        return np.hanning(n)
+    if name == 'hamming':
+        return np.hamming(n)
+    if name == 'blackman':
+        return np.blackman(n)
+    if name in ('boxcar', 'rect', '矩形'):
+        return np.ones(n)
+    raise ValueError(f"不支持的窗函数: {name}")
+
+
+def frame_signals(data, nperseg, noverlap):
+    """
+    把多通道信号切成重叠帧（只创建视图，不复制数据）。
+
+    参数：
+    data     - 形状 (C, N) 的数组
+    nperseg  - 帧长（点数）
+    noverlap - 相邻帧重叠点数
+
+    返回：
+    形状 (C, n_frames, nperseg) 的只读视图
+    """
+    step = nperseg - noverlap
+    if step <= 0:
+        raise ValueError("noverlap 必须小于 nperseg")
+    frames = sliding_window_view(data, nperseg, axis=-1)
+    return frames[..., ::step, :]
+
+
+def segment_parameters(n_samples, nperseg, overlap):
+    """把段长截断到信号长度以内，并根据重叠率换算 noverlap。"""
+    nperseg = int(min(max(int(nperseg), 8), n_samples))
+    noverlap = int(nperseg * overlap)
+    if noverlap >= nperseg:
+        noverlap = nperseg - 1
+    return nperseg, noverlap
+
+
+def frf_from_spectra(Gxx, Gyy, Gyx):
+    """
+    由自谱 / 互谱计算 H1、H2、Hv 与常相干函数。
+
+    H1 = Gyx / Gxx            (输出端噪声下无偏)
+    H2 = Gyy / Gxy            (输入端噪声下无偏)
+    Hv = H1 / sqrt(coherence) (幅值为 H1、H2 的几何平均，相位与 H1 相同)
+    coherence = |Gyx|^2 / (Gxx * Gyy)
+    """
+    tiny = np.finfo(np.float64).tiny
+    Gxx = np.maximum(Gxx, tiny)
+    Gyy_safe = np.maximum(Gyy, tiny)
+
+    H1 = Gyx / Gxx
+    coherence = np.clip(np.abs(Gyx) ** 2 / (Gxx * Gyy_safe), 0.0, 1.0)
+    Gxy = np.conj(Gyx)
+    H2 = Gyy / np.where(np.abs(Gxy) > tiny, Gxy, tiny)
+    Hv = H1 / np.sqrt(np.maximum(coherence, tiny))
+    return {'H1': H1, 'H2': H2, 'Hv': Hv}, coherence
+
+
+def averaged_spectral_matrix(X, Y, fs, nperseg, noverlap, window='hann'):
+    """
+    多参考（MIMO）情形下的帧平均谱矩阵，所有参考与响应通道在同一次批量 FFT 中处理。
+
+    参数：
+    X        - 参考（输入）信号 (R, N)
+    Y        - 响应（输出）信号 (C, N)
+    fs       - 采样频率（Hz）
+    nperseg  - 帧长
+    noverlap - 重叠点数
+    window   - 窗函数名称
+
+    返回：
+    freq, Gxx (F, R, R), Gyy (C, F), Gyx (F, C, R)
+    其中 Gxx[f, i, j] = E[conj(Xi) * Xj]，Gyx[f, c, r] = E[conj(Xr) * Yc]
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    n_ref = X.shape[0]
+    win = get_window(window, nperseg)
+
+    frames = frame_signals(np.vstack([X, Y]), nperseg, noverlap)
+    n_frames = frames.shape[1]
+    n_freq = nperseg // 2 + 1
+
+    Gxx = np.zeros((n_freq, n_ref, n_ref), dtype=np.complex128)
+    Gyy = np.zeros((Y.shape[0], n_freq))
+    Gyx = np.zeros((n_freq, Y.shape[0], n_ref), dtype=np.complex128)
+    for start in range(0, n_frames, _FRAMES_PER_BATCH):
+        block = frames[:, start:start + _FRAMES_PER_BATCH, :]
+        spec = rfft(block * win, axis=-1)          # (R + C, frames, F)
+        Xs = spec[:n_ref]
+        S = spec[n_ref:]
+        Xc = np.conj(Xs)
+        Gxx += np.einsum('ikf,jkf->fij', Xc, Xs, optimize=True)
+        Gyy += np.sum(np.abs(S) ** 2, axis=1)
+        Gyx += np.einsum('rkf,ckf->fcr', Xc, S, optimize=True)
+
+    freq = rfftfreq(nperseg, d=1.0 / fs)
+    return freq, Gxx / n_frames, Gyy / n_frames, Gyx / n_frames
+
+
+def mimo_frf_from_spectra(Gxx, Gyy, Gyx):
+    """
+    由谱矩阵求 MIMO H1 矩阵、多重相干与各输入-输出对的常相干函数。
+
+    模型 Y = H X 给出 Gyx = H · Gxx^T，故 Gxx · H^T = Gyx^T，
+    对所有频率线做一次批量线性求解（不做逐频率循环）。
+    多重相干 = (Σ_r conj(H_cr) · Gyx_cr) / Gyy_c，即输出中可由全部输入线性解释的功率比例。
+
+    返回：
+    H (C, R, F), multiple_coherence (C, F), coherence (C, R, F)
+    """
+    tiny = np.finfo(np.float64).tiny
+    n_ref = Gxx.shape[-1]
+
+    # 参考信号强相关时 Gxx 接近奇异，按迹加极小的对角正则项保证可解
+    trace = np.real(np.trace(Gxx, axis1=1, axis2=2)) / n_ref
+    Gxx_reg = Gxx + (trace * 1e-12 + tiny)[:, np.newaxis, np.newaxis] * np.eye(n_ref)
+
+    H_T = np.linalg.solve(Gxx_reg, np.transpose(Gyx, (0, 2, 1)))   # (F, R, C)
+    H = np.transpose(H_T, (2, 1, 0))                                 # (C, R, F)
+
+    Gyy_safe = np.maximum(Gyy, tiny)                                 # (C, F)
+    explained = np.real(np.sum(np.conj(H_T) * np.transpose(Gyx, (0, 2, 1)), axis=1))  # (F, C)
+    multiple_coherence = np.clip(explained.T / Gyy_safe, 0.0, 1.0)
+
+    Gxx_diag = np.maximum(np.real(np.diagonal(Gxx, axis1=1, axis2=2)), tiny)          # (F, R)
+    coherence = np.abs(np.transpose(Gyx, (1, 2, 0))) ** 2 / (
+        Gxx_diag.T[np.newaxis, :, :] * Gyy_safe[:, np.newaxis, :]
+    )
+    return H, multiple_coherence, np.clip(coherence, 0.0, 1.0)
+
+
+def estimate_mimo_frf(X, Y, fs, nperseg=4096, overlap=0.5, window='hann'):
+    """
+    多参考 FRF 矩阵估计 H = Gyx · Gxx^-1。
+
+    参数：
+    X       - 参考（输入）信号 (R, N) 或 (N,)
+    Y       - 响应信号 (C, N) 或 (N,)
+    fs      - 采样频率（Hz）
+    nperseg - 帧长（点数），超过信号长度时自动截断
+    overlap - 重叠率 (0 ~ 1)
+    window  - 窗函数名称
+
+    返回：
+    {'freq': (F,), 'estimators': {'H1': (C, R, F)}, 'multiple_coherence': (C, F),
+     'coherence': (C, R, F), 'n_averages': 帧数}
+    单参考时 estimators 另含 'H2'、'Hv'（形状同为 (C, 1, F)），多重相干即常相干。
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+    Y = np.atleast_2d(np.asarray(Y, dtype=np.float64))
+    if Y.shape[1] != X.shape[1]:
+        raise ValueError("参考信号与响应信号长度不一致")
+
+    nperseg, noverlap = segment_parameters(X.shape[1], nperseg, overlap)
+    freq, Gxx, Gyy, Gyx = averaged_spectral_matrix(X, Y, fs, nperseg, noverlap, window)
+    H, multiple_coherence, coherence = mimo_frf_from_spectra(Gxx, Gyy, Gyx)
+
+    estimators = {'H1': H}
+    if X.shape[0] == 1:
+        single, _ = frf_from_spectra(np.real(Gxx[:, 0, 0]), Gyy, Gyx[:, :, 0].T)
+        estimators['H2'] = single['H2'][:, np.newaxis, :]
+        estimators['Hv'] = single['Hv'][:, np.newaxis, :]
+
+    n_averages = (X.shape[1] - noverlap) // (nperseg - noverlap)
+    return {
+        'freq': freq,
+        'estimators': estimators,
+        'multiple_coherence': multiple_coherence,
+        'coherence': coherence,
+        'n_averages': n_averages
+    }
@@ -0,0 +1,142 @@
+# processor/impact_test.py
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+
+from .frf_estimators import frf_from_spectra
+
+
+def detect_hits(force, fs, record_length, trigger_level=0.1, pretrigger=0.01, merge_time=0.005):
+    """
+    在力锤通道上检测敲击（阈值触发），并剔除连击。
+
+    参数：
+    force         - 力锤信号 (N,)
+    fs            - 采样频率（Hz）
+    record_length - 每次敲击截取的记录长度（点数）
+    trigger_level - 触发阈值，相对于最大峰值的比例 (0 ~ 1)
+    pretrigger    - 预触发时间（s），记录从触发点前 pretrigger 开始
+    merge_time    - 同一次敲击内脉冲振荡造成的重复过阈值合并时间（s）
+
+    返回：
+    (starts, rejected)：有效记录的起始点数组，以及因连击 / 越界被剔除的触发点数组
+    """
+    force = np.asarray(force, dtype=np.float64)
+    force = force - np.median(force)
+    # 按最大峰值的极性翻转，使正负安装方向的力锤都向上触发
+    peak = force[np.argmax(np.abs(force))]
+    if peak == 0:
+        return np.array([], dtype=np.int64), np.array([], dtype=np.int64)
+    level = np.abs(peak) * trigger_level
+    above = (force * np.sign(peak)) > level
+
+    # 上升沿
+    edges = np.flatnonzero(above[1:] & ~above[:-1]) + 1
+    if above[0]:
+        edges = np.concatenate(([0], edges))
+    if len(edges) == 0:
+        return edges, edges
+
+    # 合并同一脉冲内的多次过阈值
+    merge_points = max(int(round(merge_time * fs)), 1)
+    keep = np.concatenate(([True], np.diff(edges) > merge_points))
+    triggers = edges[keep]
+
+    # 连击：相邻两次触发间隔小于一个记录长度，则两次都剔除
+    close = np.diff(triggers) < record_length
+    double_hit = np.zeros(len(triggers), dtype=bool)
+    double_hit[:-1] |= close
+    double_hit[1:] |= close
+
+    pre_points = int(round(pretrigger * fs))
+    starts = triggers - pre_points
+    in_range = (starts >= 0) & (starts + record_length <= len(force))
+
+    valid = in_range & ~double_hit
+    return starts[valid], triggers[~valid]
+
+
+def impact_windows(record_length, fs, force_window=0.05, pretrigger=0.01, exp_end_ratio=0.01):
+    """
+    力窗与指数窗。
+
+    力窗：覆盖预触发段与力脉冲（前 pretrigger + force_window 秒）的矩形窗，其余置零以去除力锤噪声；
+    指数窗：exp(-t / tau)，tau 使窗在记录末尾衰减到 exp_end_ratio，抑制响应截断泄漏。
+    力通道同样乘指数窗，使附加阻尼在输入、输出两端一致，可按 1/tau 修正模态阻尼。
+
+    返回：
+    (force_win, exp_win, tau)
+    """
+    t = np.arange(record_length) / fs
+    duration = record_length / fs
+    tau = -duration / np.log(exp_end_ratio)
+    exp_win = np.exp(-t / tau)
+
+    force_win = np.zeros(record_length)
+    force_win[:min(int(round((pretrigger + force_window) * fs)), record_length)] = 1.0
+    return force_win * exp_win, exp_win, tau
+
+
+def stack_records(data, starts, record_length):
+    """
+    按起始点把多通道信号切成记录，返回形状 (C, hits, L) 的数组（一次花式索引完成）。
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=np.float64))
+    index = starts[:, np.newaxis] + np.arange(record_length)[np.newaxis, :]
+    return data[:, index]
+
+
+def impact_frf(force, responses, fs, record_time=1.0, trigger_level=0.1,
+               pretrigger=0.01, force_window=0.05, exp_end_ratio=0.01):
+    """
+    力锤试验：检测敲击、截取记录、加力窗 / 指数窗，并对所有响应通道批量做多次敲击平均的 FRF。
+
+    参数：
+    force         - 力锤信号 (N,)
+    responses     - 响应信号 (C, N)
+    fs            - 采样频率（Hz）
+    record_time   - 每次敲击的记录时长（s）
+    trigger_level - 触发阈值（相对最大峰值）
+    pretrigger    - 预触发时间（s）
+    force_window  - 力窗宽度（s，自触发点起）
+    exp_end_ratio - 指数窗在记录末尾的衰减比例
+
+    返回：
+    {'freq', 'estimators': {'H1','H2','Hv'} -> (C, F), 'coherence': (C, F),
+     'n_hits', 'hit_times', 'rejected_times', 'exp_tau'}；没有有效敲击时返回 None
+    """
+    force = np.asarray(force, dtype=np.float64)
+    responses = np.atleast_2d(np.asarray(responses, dtype=np.float64))
+    record_length = int(round(record_time * fs))
+    if record_length < 8 or record_length > len(force):
+        raise ValueError("记录时长无效或超过信号长度")
+
+    starts, rejected = detect_hits(force, fs, record_length, trigger_level, pretrigger)
+    if len(starts) == 0:
+        return None
+
+    force_win, exp_win, tau = impact_windows(record_length, fs, force_window, pretrigger, exp_end_ratio)
+
+    # 力与响应叠成 (1 + C, hits, L)，一次 FFT 完成全部敲击、全部通道
+    records = stack_records(np.vstack([force[np.newaxis, :], responses]), starts, record_length)
+    # 以预触发段均值去除各记录的直流偏置
+    pre_points = max(int(round(pretrigger * fs)), 1)
+    records = records - records[:, :, :pre_points].mean(axis=-1, keepdims=True)
+
+    X = rfft(records[0] * force_win, axis=-1)                 # (hits, F)
+    Y = rfft(records[1:] * exp_win, axis=-1)                  # (C, hits, F)
+
+    Gxx = np.mean(np.abs(X) ** 2, axis=0)
+    Gyy = np.mean(np.abs(Y) ** 2, axis=1)
+    Gyx = np.mean(np.conj(X)[np.newaxis, :, :] * Y, axis=1)
+    estimators, coherence = frf_from_spectra(Gxx, Gyy, Gyx)
+
+    return {
+        'freq': rfftfreq(record_length, d=1.0 / fs),
+        'estimators': estimators,
+        'coherence': coherence,
+        'n_hits': len(starts),
+        'hit_times': (starts + int(round(pretrigger * fs))) / fs,
+        'rejected_times': rejected / fs,
+        'exp_tau': tau
+    }
@@ -0,0 +1,258 @@
+# processor/modal_fit.py
+
+import numpy as np
+from scipy.signal import find_peaks
+
+MODAL_METHODS = ('峰值拾取', '圆拟合', 'RFP')
+
+
+def _band(freq, H, f_low, f_high):
+    """截取 [f_low, f_high] 频带（跳过 0 Hz），返回 (freq, H (C, P))。"""
+    H = np.atleast_2d(H)
+    mask = (freq >= f_low) & (freq <= f_high) & (freq > 0)
+    if np.count_nonzero(mask) < 8:
+        raise ValueError("拟合频带内的谱线过少")
+    return freq[mask], H[:, mask]
+
+
+def peak_picking(freq, H, f_low, f_high, n_modes):
+    """
+    峰值拾取 + 半功率带宽阻尼。
+
+    以所有通道 |H|^2 之和作为模态指示函数取峰（各通道共享同一组模态），
+    半功率点在指示函数上线性插值；振型取各通道在峰值谱线处的复数 FRF。
+
+    返回：
+    {'freq': (M,), 'damping': (M,), 'shapes': (M, C) complex}
+    """
+    f, Hb = _band(freq, H, f_low, f_high)
+    indicator = np.sum(np.abs(Hb) ** 2, axis=0)
+
+    peaks, props = find_peaks(indicator, prominence=0)
+    if len(peaks) == 0:
+        return {'freq': np.array([]), 'damping': np.array([]), 'shapes': np.zeros((0, Hb.shape[0]), complex)}
+    order = np.argsort(props['prominences'])[::-1][:n_modes]
+    peaks = np.sort(peaks[order])
+
+    fn = f[peaks]
+    damping = np.full(len(peaks), np.nan)
+    for k, p in enumerate(peaks):
+        level = indicator[p] / 2
+        left = np.flatnonzero(indicator[:p] < level)
+        right = np.flatnonzero(indicator[p:] < level) + p
+        if len(left) == 0 or len(right) == 0:
+            continue
+        i, j = left[-1], right[0]
+        # 在跨越半功率水平的两条谱线之间线性插值
+        f1 = np.interp(level, indicator[i:i + 2], f[i:i + 2])
+        f2 = np.interp(level, indicator[j - 1:j + 1][::-1], f[j - 1:j + 1][::-1])
+        damping[k] = (f2 - f1) / (2 * fn[k])
+
+    return {'freq': fn, 'damping': damping, 'shapes': Hb[:, peaks].T}
+
+
+def circle_fit(freq, H, modes_freq, modes_damping):
+    """
+    圆拟合：在每阶模态附近对所有通道的 Nyquist 数据同时做代数最小二乘圆拟合
+    （批量 3x3 正规方程），由扫角速率最大处定固有频率，
+    由共振点两侧各点对的圆心角求阻尼并取中位数。
+
+    参数：
+    modes_freq / modes_damping - 初值（通常来自峰值拾取），决定拟合频带（±1 倍半功率带宽）
+
+    返回：
+    {'freq': (M,), 'damping': (M,), 'shapes': (M, C) complex,
+     'channel_freq': (M, C), 'channel_damping': (M, C)}，全局值取各通道按半径加权的平均
+    """
+    H = np.atleast_2d(H)
+    n_ch = H.shape[0]
+    n_modes = len(modes_freq)
+    channel_freq = np.full((n_modes, n_ch), np.nan)
+    channel_damping = np.full((n_modes, n_ch), np.nan)
+    shapes = np.zeros((n_modes, n_ch), dtype=np.complex128)
+    df = freq[1] - freq[0]
+
+    for k, (f0, z0) in enumerate(zip(modes_freq, modes_damping)):
+        half = 2 * (z0 if np.isfinite(z0) and z0 > 0 else 0.01) * f0
+        half = max(half, 3 * df)
+        mask = (freq >= f0 - half) & (freq <= f0 + half) & (freq > 0)
+        if np.count_nonzero(mask) < 5:
+            continue
+        w = 2 * np.pi * freq[mask]
+        x = H[:, mask].real
+        y = H[:, mask].imag
+
+        # x^2 + y^2 + a x + b y + c = 0，所有通道一起解
+        A = np.stack([x, y, np.ones_like(x)], axis=-1)                 # (C, P, 3)
+        rhs = -(x ** 2 + y ** 2)
+        AtA = np.einsum('cpi,cpj->cij', A, A)
+        Atb = np.einsum('cpi,cp->ci', A, rhs)
+        coef = np.linalg.solve(AtA + np.eye(3) * np.finfo(float).tiny, Atb[..., np.newaxis])[..., 0]
+        xc, yc = -coef[:, 0] / 2, -coef[:, 1] / 2
+        radius = np.sqrt(np.maximum(xc ** 2 + yc ** 2 - coef[:, 2], 0.0))
+
+        theta = np.unwrap(np.angle((x - xc[:, np.newaxis]) + 1j * (y - yc[:, np.newaxis])), axis=1)
+        rate = np.abs(np.diff(theta, axis=1)) / np.diff(w)
+        i_max = np.argmax(rate, axis=1)
+        rows = np.arange(n_ch)
+        wn = (w[i_max] + w[i_max + 1]) / 2
+        theta_n = (theta[rows, i_max] + theta[rows, i_max + 1]) / 2
+
+        # 共振点两侧所有点对的阻尼估计取中位数: (C, 下方点, 上方点)
+        below = w[np.newaxis, :] < wn[:, np.newaxis]
+        dtheta = np.abs(theta - theta_n[:, np.newaxis])
+        wa = w[np.newaxis, :, np.newaxis]
+        wb = w[np.newaxis, np.newaxis, :]
+        denom = wn[:, np.newaxis, np.newaxis] * (
+            wa * np.tan(dtheta[:, :, np.newaxis] / 2) + wb * np.tan(dtheta[:, np.newaxis, :] / 2)
+        )
+        pair = below[:, :, np.newaxis] & ~below[:, np.newaxis, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            zeta_pairs = np.where(pair, (wb ** 2 - wa ** 2) / (2 * denom), np.nan)
+            zeta = np.nanmedian(zeta_pairs.reshape(n_ch, -1), axis=1)
+
+        channel_freq[k] = wn / (2 * np.pi)
+        channel_damping[k] = np.where(np.isfinite(zeta) & (zeta > 0), zeta, np.nan)
+        # 振型：模态圆直径，方向取圆心相对原点的方向
+        shapes[k] = 2 * radius * np.exp(1j * np.angle(xc + 1j * yc))
+
+    weights = np.abs(shapes)
+    valid = np.isfinite(channel_damping) & (weights > 0)
+    weights = np.where(valid, weights, 0.0)
+    total = np.maximum(weights.sum(axis=1), np.finfo(float).tiny)
+    global_freq = np.nansum(np.where(valid, channel_freq, 0.0) * weights, axis=1) / total
+    global_damping = np.nansum(np.where(valid, channel_damping, 0.0) * weights, axis=1) / total
+    no_fit = ~valid.any(axis=1)
+    global_freq[no_fit] = np.nan
+    global_damping[no_fit] = np.nan
+
+    return {
+        'freq': global_freq,
+        'damping': global_damping,
+        'shapes': shapes,
+        'channel_freq': channel_freq,
+        'channel_damping': channel_damping
+    }
+
+
+def modal_synthesis_basis(w, poles):
+    """
+    由共享极点构造部分分式基：[1/(jω-λ), 1/(jω-λ*)] 每阶两列，外加上 / 下剩余项（常数、-1/ω²）。
+    返回 (P, 2K + 2) 复数矩阵。
+    """
+    jw = 1j * w[:, np.newaxis]
+    poles = np.asarray(poles)
+    basis = [1.0 / (jw - poles[np.newaxis, :]), 1.0 / (jw - np.conj(poles)[np.newaxis, :]),
+             np.ones((len(w), 1)), -1.0 / (w[:, np.newaxis] ** 2)]
+    return np.hstack(basis)
+
+
+def rfp_fit(freq, H, f_low, f_high, n_modes):
+    """
+    全局有理分式多项式 (RFP) 最小二乘拟合：所有通道共享分母多项式（即共享极点），
+    各通道分子独立。分子系数在正规方程中按通道消去，只剩分母的小规模方程，
+    对通道的累加以 einsum 批量完成；极点确定后再用一次多右端项最小二乘求全部通道的留数。
+
+    返回：
+    {'freq': (M,), 'damping': (M,), 'shapes': (M, C) complex（各通道留数）,
+     'poles': (M,), 'fit_freq': (P,), 'fit_H': (C, P)（拟合合成的 FRF）}
+    """
+    f, Hb = _band(freq, H, f_low, f_high)
+    n_ch = Hb.shape[0]
+    w = 2 * np.pi * f
+    w_max = w[-1]
+    s = 1j * w / w_max                                   # 归一化，改善多项式条件数
+
+    # 各通道按幅值归一，避免大幅值通道主导分母
+    scale = np.maximum(np.max(np.abs(Hb), axis=1), np.finfo(float).tiny)
+    Hn = Hb / scale[:, np.newaxis]
+
+    n_den = 2 * n_modes
+    n_num = 2 * n_modes + 1
+    Phi = s[:, np.newaxis] ** np.arange(n_num)                        # (P, n_num)
+    S_pow = s[:, np.newaxis] ** np.arange(n_den)                      # (P, n_den)
+    Theta = -Hn[:, :, np.newaxis] * S_pow[np.newaxis, :, :]           # (C, P, n_den)
+    rhs = Hn * (s ** n_den)[np.newaxis, :]                            # (C, P)
+
+    # 实系数 -> 实部 / 虚部叠加的正规方程
+    R = np.real(Phi.conj().T @ Phi)                                   # (n_num, n_num)
+    S = np.real(np.einsum('pi,cpj->cij', Phi.conj(), Theta))          # (C, n_num, n_den)
+    T = np.real(np.einsum('cpi,cpj->cij', Theta.conj(), Theta))       # (C, n_den, n_den)
+    u = np.real(np.einsum('pi,cp->ci', Phi.conj(), rhs))              # (C, n_num)
+    v = np.real(np.einsum('cpi,cp->ci', Theta.conj(), rhs))           # (C, n_den)
+
+    R_inv_S = np.linalg.solve(R, S.transpose(1, 0, 2).reshape(n_num, -1)).reshape(n_num, n_ch, n_den)
+    R_inv_u = np.linalg.solve(R, u.T)                                  # (n_num, C)
+    M = T.sum(axis=0) - np.einsum('cik,icj->kj', S, R_inv_S)
+    b = v.sum(axis=0) - np.einsum('cik,ic->k', S, R_inv_u)
+    den = np.linalg.lstsq(M, b, rcond=None)[0]
+
+    roots = np.roots(np.concatenate(([1.0], den[::-1]))) * w_max
+    poles = roots[(roots.imag > 0) & (roots.real < 0)]
+    poles = poles[(np.abs(poles) >= w[0]) & (np.abs(poles) <= w[-1])]
+    poles = poles[np.argsort(np.abs(poles))]
+
+    if len(poles) == 0:
+        return {'freq': np.array([]), 'damping': np.array([]), 'shapes': np.zeros((0, n_ch), complex),
+                'poles': poles, 'fit_freq': f, 'fit_H': np.zeros_like(Hb)}
+
+    basis = modal_synthesis_basis(w, poles)
+    coef = np.linalg.lstsq(basis, Hb.T, rcond=None)[0]                 # (2K + 2, C)
+    K = len(poles)
+
+    return {
+        'freq': np.abs(poles) / (2 * np.pi),
+        'damping': -poles.real / np.abs(poles),
+        'shapes': coef[:K],
+        'poles': poles,
+        'fit_freq': f,
+        'fit_H': (basis @ coef).T
+    }
+
+
+def fit_modal_parameters(freq, H, f_low, f_high, n_modes, methods=MODAL_METHODS):
+    """
+    对一组共享频率轴的 FRF（同一文件、同一输入的全部输出通道）做模态识别。
+
+    返回：{方法名: 结果字典}；圆拟合以峰值拾取结果作为初值
+    """
+    freq = np.asarray(freq, dtype=np.float64)
+    H = np.atleast_2d(H)
+    results = {}
+    peak = None
+    if '峰值拾取' in methods or '圆拟合' in methods:
+        peak = peak_picking(freq, H, f_low, f_high, n_modes)
+    if '峰值拾取' in methods:
+        results['峰值拾取'] = peak
+    if '圆拟合' in methods:
+        results['圆拟合'] = circle_fit(freq, H, peak['freq'], peak['damping'])
+    if 'RFP' in methods:
+        results['RFP'] = rfp_fit(freq, H, f_low, f_high, n_modes)
+    return results
+
+
+def correct_exponential_window(results, tau):
+    """
+    修正指数窗附加的阻尼：exp(-t/tau) 使每阶极点实部增加 1/tau，
+    故 ζ_真实 = ζ_识别 - 1 / (tau · ωn)。原地修改 results 中各方法的 damping。
+    """
+    for res in results.values():
+        if len(res['freq']):
+            res['damping'] = res['damping'] - 1.0 / (tau * 2 * np.pi * res['freq'])
+    return results
+
+
+def modal_table_rows(file_name, ref_name, channel_names, results):
+    """
+    把 fit_modal_parameters 的结果展平成表格行：
+    每行 (文件, 输入, 方法, 阶次, 频率 Hz, 阻尼比, 通道, 振型幅值, 振型相位 deg)
+    """
+    rows = []
+    for method, res in results.items():
+        for k in range(len(res['freq'])):
+            amplitude = np.abs(res['shapes'][k])
+            phase = np.degrees(np.angle(res['shapes'][k]))
+            for c, ch in enumerate(channel_names):
+                rows.append((file_name, ref_name, method, k + 1, res['freq'][k], res['damping'][k],
+                             ch, amplitude[c], phase[c]))
+    return rows
@@ -0,0 +1,64 @@
+# processor/ods.py
+
+import numpy as np
+
+
+def extract_ods(csm, ref_name, frequencies, channel_names=None, half_width=2):
+    """
+    从互谱矩阵缓存中提取工作变形 (ODS)，不重新做 FFT。
+
+    幅值：各测点自谱在目标谱线 ±half_width 条谱线内积分后开方，即该频率分量的 RMS，
+          加窗造成的主瓣泄漏被一并计入；
+    相位：测点相对参考通道的互谱 G[ref, c] 在目标谱线处的相位（参考通道相位为 0）。
+
+    参数：
+    csm           - CrossSpectralMatrix
+    ref_name      - 参考通道名
+    frequencies   - 目标频率列表（Hz）
+    channel_names - 测点通道；None 表示全部通道
+    half_width    - 幅值积分的半宽（谱线数）
+
+    返回：
+    (table, line_freqs)：table 为 测点 × 频率 的复数表；line_freqs 为实际使用的谱线频率
+    """
+    if channel_names is None:
+        channel_names = csm.channel_names
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    freq = csm.freq
+    df = freq[1] - freq[0]
+
+    # 目标频率附近的谱线：先就近取线，再在 ±half_width 内取自谱峰值所在谱线
+    lines = np.clip(np.rint((frequencies - freq[0]) / df).astype(np.int64), 0, len(freq) - 1)
+    offsets = np.arange(-half_width, half_width + 1)
+    window = np.clip(lines[:, np.newaxis] + offsets[np.newaxis, :], 0, len(freq) - 1)   # (K, W)
+
+    ch_idx = [csm.index(n) for n in channel_names]
+    auto = np.vstack([csm.auto(i) for i in ch_idx])                 # (C, F)
+    ref_row = csm.submatrix([ref_name], channel_names)[:, 0, :].T   # (C, F)，G[ref, c]
+
+    ref_auto = csm.auto(csm.index(ref_name))
+    peak_lines = window[np.arange(len(lines)), np.argmax(ref_auto[window], axis=1)]    # (K,)
+
+    amplitude = np.sqrt(np.sum(auto[:, window], axis=2) * df)        # (C, K)
+    phase = np.angle(ref_row[:, peak_lines])                          # (C, K)
+    return amplitude * np.exp(1j * phase), freq[peak_lines]
+
+
+def ods_table_text(ods_results, labels):
+    """
+    把多个文件的 ODS 表展开为制表符分隔文本：每行 (文件, 测点, 各频率的幅值 / 相位)。
+    ods_results: {文件名: {'channels', 'table' (C, K), 'line_freqs' (K,)}}
+    """
+    header = ["文件", "测点"]
+    for label in labels:
+        header += [f"{label}_幅值", f"{label}_相位(deg)"]
+    lines = ["\t".join(header)]
+    for file_name, res in ods_results.items():
+        table = res['table']
+        values = np.empty((table.shape[0], 2 * table.shape[1]))
+        values[:, 0::2] = np.abs(table)
+        values[:, 1::2] = np.degrees(np.angle(table))
+        for ch, row in zip(res['channels'], values):
+            lines.append("\t".join([file_name, ch] + [f"{v:.6e}" if k % 2 == 0 else f"{v:.2f}"
+                                                      for k, v in enumerate(row)]))
+    return "\n".join(lines) + "\n"
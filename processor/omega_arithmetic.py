@@ -0,0 +1,122 @@
+# processor/omega_arithmetic.py
+
+import numpy as np
+from scipy.fft import rfft, irfft, rfftfreq
+
+# 标准重力加速度 (m/s^2)，用于 g -> m/s^2 换算
+STANDARD_GRAVITY = 9.80665
+
+
+def omega_arithmetic(data, fs, orders, highpass=None, lowpass=None):
+    """
+    频域 omega 算法：在频域乘以 (jω)^order 实现积分 / 微分。
+    多通道数据只做一次 rfft，多个阶次共享同一份频谱。
+
+    参数：
+    data     - 时域数据，形状 (N,) 或 (N, C)，每列一个通道
+    fs       - 采样频率（Hz）
+    orders   - 阶次，整数或整数序列；-1 为一次积分，-2 为二次积分，1 为一次微分
+    highpass - 高通截止频率（Hz），低于该频率的谱线置零，抑制积分的低频漂移；
+               None 或 0 表示只去除直流分量
+    lowpass  - 低通截止频率（Hz），高于该频率的谱线置零，抑制微分放大的高频噪声；None 或 0 表示不限制
+
+    返回：
+    orders 为整数时返回与 data 同形状的数组；为序列时返回数组列表（顺序与 orders 一致）
+    """
+    data = np.asarray(data, dtype=np.float64)
+    single_column = (data.ndim == 1)
+    if single_column:
+        data = data.reshape(-1, 1)
+
+    single_order = np.isscalar(orders)
+    order_list = [orders] if single_order else list(orders)
+
+    N = data.shape[0]
+    spectrum = rfft(data, axis=0)
+    freq = rfftfreq(N, d=1.0 / fs)
+    jw = 2j * np.pi * freq
+
+    # 直流分量和高通截止以下的谱线全部置零
+    keep = freq > 0
+    if highpass:
+        keep &= freq >= highpass
+    if lowpass:
+        keep &= freq <= lowpass
+
+    outputs = []
+    for order in order_list:
+        factor = np.zeros(len(freq), dtype=np.complex128)
+        factor[keep] = jw[keep] ** order
+        result = irfft(spectrum * factor[:, np.newaxis], n=N, axis=0)
+        outputs.append(result[:, 0] if single_column else result)
+
+    return outputs[0] if single_order else outputs
+
+
+def integration_units(unit):
+    """
+    根据加速度单位给出积分结果的 (缩放系数, 速度单位, 位移单位)。
+    g 与 m/s^2 统一换算为 mm/s 和 μm，其它单位保持原量纲。
+    """
+    if unit == 'g':
+        return STANDARD_GRAVITY, 'mm/s', 'μm'
+    if unit in ('m/s^2', 'm/s²'):
+        return 1.0, 'mm/s', 'μm'
+    return 1.0, f"{unit}·s", f"{unit}·s²"
+
+
+def differentiation_units(unit):
+    """
+    根据位移单位给出微分结果的 (位移 -> mm 的缩放系数, 速度单位, 加速度单位)。
+    mm 与 μm 统一换算为 mm/s 和 m/s²，其它单位保持原量纲。
+    """
+    if unit == 'mm':
+        return 1.0, 'mm/s', 'm/s²'
+    if unit in ('μm', 'um'):
+        return 1e-3, 'mm/s', 'm/s²'
+    return 1.0, f"{unit}/s", f"{unit}/s²"
+
+
+def differentiate_displacement(disp_matrix, fs, unit='mm', lowpass=None):
+    """
+    将多通道位移一次性微分为速度和加速度（积分的逆运算，同一次 rfft 得到两阶）。
+
+    参数：
+    disp_matrix - 位移数据，形状 (N, C)
+    fs          - 采样频率（Hz）
+    unit        - 位移单位（决定输出单位与缩放）
+    lowpass     - 低通截止频率（Hz），None 或 0 表示不限制
+
+    返回：
+    (velocity, velocity_unit, acceleration, acceleration_unit)
+    """
+    scale, vel_unit, acc_unit = differentiation_units(unit)
+    velocity, acceleration = omega_arithmetic(
+        np.asarray(disp_matrix, dtype=np.float64) * scale, fs, (1, 2), lowpass=lowpass
+    )
+    if acc_unit == 'm/s²':
+        acceleration = acceleration * 1e-3      # mm/s² -> m/s²
+    return velocity, vel_unit, acceleration, acc_unit
+
+
+def integrate_acceleration(acc_matrix, fs, unit='g', highpass=2.0):
+    """
+    将多通道加速度一次性积分为速度和位移。
+
+    参数：
+    acc_matrix - 加速度数据，形状 (N, C)
+    fs         - 采样频率（Hz）
+    unit       - 加速度单位（决定输出单位与缩放）
+    highpass   - 高通截止频率（Hz）
+
+    返回：
+    (velocity, velocity_unit, displacement, displacement_unit)
+    """
+    scale, vel_unit, disp_unit = integration_units(unit)
+    velocity, displacement = omega_arithmetic(
+        np.asarray(acc_matrix, dtype=np.float64) * scale, fs, (-1, -2), highpass
+    )
+    if vel_unit == 'mm/s':
+        velocity = velocity * 1e3
+        displacement = displacement * 1e6
+    return velocity, vel_unit, displacement, disp_unit
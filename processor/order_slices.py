@@ -0,0 +1,151 @@
+# processor/order_slices.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from scipy.fft import rfft
+
+from .campbell import rpm_grid, binned_sums
+from .frf_estimators import get_window, frame_signals
+from .order_tracking import angle_resample, samples_per_revolution
+from .tacho import shaft_frequency, shaft_revolutions
+from .vk2 import vk2_orders
+
+ORDER_SLICE_METHODS = ('fft', 'vk2')
+
+
+def bin_by_rpm(values, rpm, rpm_step):
+    """
+    把沿最后一维排列的数值按对应转速归入 rpm_step 间隔的转速分箱并求平均（np.bincount，O(M)）。
+
+    参数：
+    values   - 形状 (..., M)
+    rpm      - 各列的转速 (M,)
+    rpm_step - 分箱宽度（rpm）；分箱边界为 rpm_step 的整数倍，不同文件的结果可直接对齐
+
+    返回：
+    (rpm_centers (B,), binned (..., B))，没有数据的箱为 NaN
+    """
+    edges = rpm_grid(rpm, rpm_step)
+    n_bins = len(edges) - 1
+    bins = np.clip(np.digitize(rpm, edges) - 1, 0, n_bins - 1)
+    sums = binned_sums(values, bins, n_bins)
+    counts = np.bincount(bins, minlength=n_bins)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        binned = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return 0.5 * (edges[:-1] + edges[1:]), binned
+
+
+def order_slices_fft(data, fs, revolutions, orders, rpm_step=50.0, resolution=0.25, overlap=0.5, window='hann'):
+    """
+    阶次跟踪 FFT 提取阶次切片：角域重采样后按转数分帧（帧长 1 / resolution 转），
+    全部通道、全部帧一次 rfft，在各阶次谱线上取幅值，帧转速取帧内平均，再按转速分箱。
+
+    返回：(rpm_centers (B,), amplitude (C, O, B))
+    """
+    orders = np.atleast_1d(np.asarray(orders, dtype=np.float64))
+    spr = samples_per_revolution(np.max(orders))
+    frame_length = int(round(spr / resolution))
+    angle_data, rev_grid = angle_resample(data, revolutions, spr)
+    if angle_data.shape[1] < frame_length:
+        return None, None
+    step = max(int(frame_length * (1.0 - overlap)), 1)
+    frames = frame_signals(angle_data, frame_length, frame_length - step)          # (C, frames, L)
+
+    win = get_window(window, frame_length)
+    lines = np.clip(np.rint(orders * frame_length / spr).astype(np.int64), 0, frame_length // 2)
+    amplitude = np.abs(rfft(frames * win, axis=-1)[..., lines]) * (2.0 / np.sum(win))   # (C, frames, O)
+
+    # 帧内平均转速 = 帧跨越的转数 / 帧持续时间；帧首末点的时刻由转数插值回时间轴
+    starts = np.arange(frames.shape[1]) * step
+    times = np.interp(rev_grid, revolutions, np.arange(len(revolutions)) / fs)
+    duration = times[starts + frame_length - 1] - times[starts]
+    frame_rpm = 60.0 * ((frame_length - 1) / spr) / duration
+    return bin_by_rpm(np.transpose(amplitude, (0, 2, 1)), frame_rpm, rpm_step)
+
+
+def _smoothed_rpm(shaft_freq, fs, seconds):
+    """逐点转速的滑动平均（累积和相减），消除逐沿转速的量化跳动后再用于分箱。"""
+    half = max(int(seconds * fs / 2), 1)
+    cumsum = np.concatenate(([0.0], np.cumsum(np.asarray(shaft_freq, dtype=np.float64))))
+    n = np.arange(len(shaft_freq))
+    lo = np.maximum(n - half, 0)
+    hi = np.minimum(n + half + 1, len(shaft_freq))
+    return (cumsum[hi] - cumsum[lo]) / (hi - lo) * 60.0
+
+
+def order_slices_vk2(data, fs, shaft_freq, orders, rpm_step=50.0, r=1000.0, filtord=1, smooth_seconds=0.1):
+    """
+    VK2 提取阶次切片：每个通道一次多右端项求解得到全部阶次的复包络，
+    逐点包络幅值（峰值）按逐点转速（smooth_seconds 内滑动平均）归入转速分箱求平均。
+
+    返回：(rpm_centers (B,), amplitude (C, O, B))
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=np.float64))
+    envelopes = np.stack([np.abs(vk2_orders(row, shaft_freq, orders, fs, r, filtord)[0]) for row in data])
+    return bin_by_rpm(envelopes, _smoothed_rpm(shaft_freq, fs, smooth_seconds), rpm_step)
+
+
+def _slice_file(names, data, tacho, fs, params):
+    """工作进程：由转速脉冲计算转角 / 轴频，再按 params['method'] 提取该文件全部通道的阶次切片。"""
+    orders = params['orders']
+    if params['method'] == 'vk2':
+        shaft_freq = shaft_frequency(tacho, fs, params['deg_per_edge'], params['threshold'])
+        if shaft_freq is None:
+            return None
+        rpm, amplitude = order_slices_vk2(data, fs, shaft_freq, orders, params['rpm_step'],
+                                          params.get('r', 1000.0), params.get('filtord', 1))
+    else:
+        revolutions = shaft_revolutions(tacho, fs, params['deg_per_edge'], params['threshold'])
+        if revolutions is None:
+            return None
+        rpm, amplitude = order_slices_fft(data, fs, revolutions, orders, params['rpm_step'],
+                                          params.get('resolution', 0.25))
+        if rpm is None:
+            return None
+    return {'channels': list(names), 'orders': list(orders), 'rpm': rpm, 'amplitude': amplitude}
+
+
+def extract_order_slices(files, params, max_workers=None):
+    """
+    批量提取 阶次 × 转速 切片：每个文件（一次升速 / 降速）作为一个任务分发到进程池。
+
+    参数：
+    files       - {文件名: (通道名列表, 数据 (C, N), 转速脉冲 (N,), 采样频率)}
+    params      - {'method': 'fft' / 'vk2', 'orders', 'rpm_step', 'deg_per_edge', 'threshold',
+                   FFT 方法的 'resolution'（转⁻¹）, VK2 方法的 'r' / 'filtord'}
+    max_workers - 进程数；1 时在当前进程内顺序计算
+
+    返回：{文件名: {'channels', 'orders', 'rpm' (B,), 'amplitude' (C, O, B)}}；转速脉冲无效的文件被跳过
+    """
+    if params.get('method', 'fft') not in ORDER_SLICE_METHODS:
+        raise ValueError(f"不支持的阶次切片方法: {params.get('method')}")
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(files) <= 1:
+        results = {name: _slice_file(*args, params) for name, args in files.items()}
+    else:
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(files))) as executor:
+            futures = {name: executor.submit(_slice_file, *args, params) for name, args in files.items()}
+            results = {name: future.result() for name, future in futures.items()}
+    return {name: res for name, res in results.items() if res is not None}
+
+
+def order_slice_table_text(slice_results):
+    """
+    把阶次切片展开为制表符分隔文本：表头为各转速分箱中心，每行一个 (文件, 通道, 阶次)，空箱留空。
+    各文件的分箱边界都是 rpm_step 的整数倍，合并为一张表时按转速对齐。
+    """
+    all_rpm = np.unique(np.concatenate([res['rpm'] for res in slice_results.values()])) \
+        if slice_results else np.array([])
+    lines = ["\t".join(["文件", "通道", "阶次"] + [f"{v:.0f}rpm" for v in all_rpm])]
+    for file_name, res in slice_results.items():
+        columns = np.searchsorted(all_rpm, res['rpm'])
+        for c, channel in enumerate(res['channels']):
+            for o, order in enumerate(res['orders']):
+                row = [""] * len(all_rpm)
+                for col, value in zip(columns, res['amplitude'][c, o]):
+                    if np.isfinite(value):
+                        row[col] = f"{value:.6e}"
+                lines.append("\t".join([file_name, channel, f"{order:g}"] + row))
+    return "\n".join(lines) + "\n"
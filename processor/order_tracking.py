@@ -0,0 +1,135 @@
+# processor/order_tracking.py
+
+import numpy as np
+from scipy.fft import rfft, rfftfreq
+
+from .frf_estimators import get_window
+
+# 每转采样点数取 最大阶次 × 2.56（与常见频谱分析仪的频宽 / 采样率比一致）
+_OVERSAMPLING = 2.56
+
+
+def samples_per_revolution(max_order):
+    """角域重采样的每转点数（取偶数）。"""
+    spr = int(np.ceil(_OVERSAMPLING * max_order))
+    return spr + spr % 2
+
+
+def angle_resample(data, revolutions, samples_per_rev):
+    """
+    把多通道时域数据重采样到等角度间隔（计算阶次跟踪）。
+
+    插值位置 (下标 + 权重) 只由转角决定，对所有通道只算一次，随后整块线性插值。
+
+    参数：
+    data            - 形状 (C, N)
+    revolutions     - 逐点累积转数 (N,)，单调递增
+    samples_per_rev - 每转点数
+
+    返回：
+    (angle_data, rev_grid)：angle_data 形状 (C, M)，rev_grid 为各角度采样点的转数 (M,)
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=np.float64))
+    revolutions = np.asarray(revolutions, dtype=np.float64)
+    n_points = int(np.floor((revolutions[-1] - revolutions[0]) * samples_per_rev)) + 1
+    rev_grid = revolutions[0] + np.arange(n_points) / samples_per_rev
+
+    upper = np.clip(np.searchsorted(revolutions, rev_grid, side='right'), 1, len(revolutions) - 1)
+    lower = upper - 1
+    span = revolutions[upper] - revolutions[lower]
+    weight = np.where(span > 0, (rev_grid - revolutions[lower]) / np.where(span > 0, span, 1.0), 0.0)
+    angle_data = data[:, lower] * (1.0 - weight) + data[:, upper] * weight
+    return angle_data, rev_grid
+
+
+def _angle_frames(angle_data, frame_length, overlap):
+    """对 (C, M) 角域数据分帧，返回 (C, frames, L) 视图；数据不足一帧时返回 None。"""
+    if angle_data.shape[1] < frame_length:
+        return None
+    step = max(int(frame_length * (1.0 - overlap)), 1)
+    frames = np.lib.stride_tricks.sliding_window_view(angle_data, frame_length, axis=-1)
+    return frames[:, ::step, :]
+
+
+def order_spectra(signals, max_order=20.0, resolution=0.1, overlap=0.5, window='hann'):
+    """
+    对多个文件的角域数据批量计算平均阶次谱。
+
+    所有文件、所有通道的帧拼成一个 (总帧数, L) 数组只做一次 rfft，
+    再用 np.add.reduceat 按 (文件, 通道) 求平均。
+
+    参数：
+    signals    - {文件名: (C, M) 角域数据}，各文件使用相同的每转点数
+    max_order  - 最大阶次
+    resolution - 阶次分辨率（帧长 = 1 / resolution 转）
+    overlap    - 帧重叠率
+    window     - 窗函数
+
+    返回：
+    (orders, spectra)：orders (O,)；spectra 为 {文件名: 幅值谱 (C, O)}（峰值幅值，已做窗的幅值修正）
+    """
+    spr = samples_per_revolution(max_order)
+    frame_length = int(round(spr / resolution))
+    win = get_window(window, frame_length)
+
+    blocks, owners, counts = [], [], []
+    for file_name, angle_data in signals.items():
+        frames = _angle_frames(np.atleast_2d(angle_data), frame_length, overlap)
+        if frames is None:
+            continue
+        n_ch, n_frames, _ = frames.shape
+        blocks.append(frames.reshape(n_ch * n_frames, frame_length))
+        owners.append((file_name, n_ch))
+        counts.extend([n_frames] * n_ch)
+
+    orders = rfftfreq(frame_length, d=1.0 / spr)
+    keep = orders <= max_order
+    orders = orders[keep]
+    if not blocks:
+        return orders, {}
+
+    spectrum = np.abs(rfft(np.vstack(blocks) * win, axis=-1)[:, keep]) * (2.0 / np.sum(win))
+    spectrum[:, 0] /= 2
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    averaged = np.add.reduceat(spectrum, starts, axis=0) / np.asarray(counts)[:, np.newaxis]
+
+    spectra, row = {}, 0
+    for file_name, n_ch in owners:
+        spectra[file_name] = averaged[row:row + n_ch]
+        row += n_ch
+    return orders, spectra
+
+
+def compute_order_tracking(files, max_order=20.0, resolution=0.1, overlap=0.5, window='hann'):
+    """
+    计算阶次跟踪：逐文件由累积转数做角域重采样，随后批量求阶次谱。
+
+    参数：
+    files - {文件名: (通道名列表, 数据 (C, N), 累积转数 (N,), 采样频率)}
+
+    返回：
+    {'orders': (O,), 'files': {文件名: {'channels', 'amplitude' (C, O), 'rpm_mean', 'rpm_max',
+                                        'revolutions', 'aliased'}}}
+    aliased 为 True 表示最高转速下 max_order 已超过 fs / 2，高阶部分可能混叠
+    """
+    spr = samples_per_revolution(max_order)
+    angle_signals, info = {}, {}
+    for file_name, (names, data, revolutions, fs) in files.items():
+        angle_data, _ = angle_resample(data, revolutions, spr)
+        angle_signals[file_name] = angle_data
+        speed = np.diff(revolutions) * fs
+        info[file_name] = {
+            'channels': list(names),
+            'rpm_mean': float(np.mean(speed) * 60.0) if len(speed) else 0.0,
+            'rpm_max': float(np.max(speed) * 60.0) if len(speed) else 0.0,
+            'revolutions': float(revolutions[-1] - revolutions[0]),
+        }
+        info[file_name]['aliased'] = max_order * info[file_name]['rpm_max'] / 60.0 > fs / 2
+
+    orders, spectra = order_spectra(angle_signals, max_order, resolution, overlap, window)
+    for file_name in list(info):
+        if file_name not in spectra:
+            info.pop(file_name)
+            continue
+        info[file_name]['amplitude'] = spectra[file_name]
+    return {'orders': orders, 'files': info}
@@ -0,0 +1,123 @@
+# processor/signal_cache.py
+
+import atexit
+import os
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+
+def cleaned_signal_key(file_name, channel_name, truncation, vk2_params):
+    """
+    清洗后时域信号的缓存键：(文件, 通道, 截断范围, VK2 参数)。
+    vk2_params 中的列表（freq_list / order_list）排序后转为元组，参数按名称排序，保证可哈希，
+    且与频率 / 阶次的填写顺序无关（去除或提取的是各成分之和，与顺序无关）。
+    """
+    if truncation is not None:
+        truncation = (truncation['start_sec'], truncation['end_sec'])
+    params = None
+    if vk2_params is not None:
+        params = tuple(sorted((k, tuple(sorted(v)) if isinstance(v, (list, tuple)) else v)
+                              for k, v in vk2_params.items()))
+    return (file_name, channel_name, truncation, params)
+
+
+class CleanedSignalCache:
+    """
+    VK2 清洗后时域信号的 LRU 缓存，按字节数限制内存占用。
+
+    超出 max_bytes 时淘汰最久未使用的条目；若给定 spill_dir，被淘汰的条目写成 .npy 文件，
+    再次命中时读回并重新放入内存。所有操作加锁，可在处理线程与界面线程间共享。
+    clear() 删除全部落盘文件；程序退出时自动调用 close()，清空缓存并删除空的落盘目录。
+    """
+    def __init__(self, max_bytes=256 * 1024 * 1024, spill_dir=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self._entries = OrderedDict()      # key -> ndarray
+        self._spilled = {}                 # key -> .npy 路径
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def get(self, key):
+        """命中返回数组（只读），未命中返回 None；已写盘的条目读回内存。"""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                return data
+            path = self._spilled.pop(key, None)
+        if path is None or not os.path.exists(path):
+            return None
+        data = np.load(path)
+        os.remove(path)
+        self.put(key, data)
+        return data
+
+    def put(self, key, data):
+        """存入一个数组；超出容量时淘汰（或写盘）最久未使用的条目。"""
+        data = np.asarray(data)
+        data.setflags(write=False)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._entries[key] = data
+            self._nbytes += data.nbytes
+            while self._nbytes > self.max_bytes and len(self._entries) > 1:
+                old_key, old_data = self._entries.popitem(last=False)
+                self._nbytes -= old_data.nbytes
+                self._spill(old_key, old_data)
+
+    def get_or_compute(self, key, compute):
+        """命中直接返回，否则调用 compute() 计算后存入；compute 返回 None 时不缓存。"""
+        data = self.get(key)
+        if data is None:
+            data = compute()
+            if data is not None:
+                data = np.asarray(data)
+                self.put(key, data)
+        return data
+
+    def invalidate(self, file_name=None, channel_name=None):
+        """清除某个通道 / 某个文件（channel_name 为 None）/ 全部（均为 None）的缓存条目及其落盘文件。"""
+        def matches(key):
+            return (file_name is None or key[0] == file_name) and (channel_name is None or key[1] == channel_name)
+
+        with self._lock:
+            for key in [k for k in self._entries if matches(k)]:
+                self._nbytes -= self._entries.pop(key).nbytes
+            for key in [k for k in self._spilled if matches(k)]:
+                path = self._spilled.pop(key)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def clear(self):
+        self.invalidate(None)
+
+    def close(self):
+        """清空缓存（含落盘文件），落盘目录为空时一并删除。"""
+        self.clear()
+        if self.spill_dir and os.path.isdir(self.spill_dir):
+            try:
+                os.rmdir(self.spill_dir)
+            except OSError:
+                pass    # 目录中还有其他实例的文件
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries) + len(self._spilled)
+
+    def _spill(self, key, data):
+        """在持锁状态下调用：把被淘汰的条目写盘（未配置 spill_dir 时直接丢弃）。"""
+        if not self.spill_dir:
+            return
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"{uuid.uuid4().hex}.npy")
+        np.save(path, data)
+        self._spilled[key] = path
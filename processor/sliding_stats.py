@@ -0,0 +1,92 @@
+# processor/sliding_stats.py
+
+import numpy as np
+from scipy.ndimage import maximum_filter1d
+
+# 累积和分段重新起算的长度（点数），限制长信号上累积和相减带来的舍入误差
+_CHUNK = 1 << 16
+
+
+def default_window(fs, seconds=0.01):
+    """时域特征曲线的窗长（默认 10 ms，至少 64 点）与步长（窗长的 1/4）。"""
+    window = max(int(fs * seconds), 64)
+    return window, max(window // 4, 1)
+
+
+def _window_sums(x, window, step, starts):
+    """
+    各窗口 [s, s + window) 内 x、x²、x³、x⁴ 之和，形状 (4, len(starts))。
+
+    按 _CHUNK 分段：每段只对本段窗口覆盖的数据（减去段内均值后）做一次累积和，
+    窗口和由累积和相减得到，总计 O(N)；分段使累积和的量级只取决于局部数据。
+    同时返回各段的中心化偏移量，供换算原点矩。
+    """
+    sums = np.empty((4, len(starts)))
+    shift = np.empty(len(starts))
+    per_chunk = max(_CHUNK // step, 1)
+    for first in range(0, len(starts), per_chunk):
+        chunk_starts = starts[first:first + per_chunk]
+        lo, hi = chunk_starts[0], chunk_starts[-1] + window
+        seg = x[lo:hi]
+        offset = np.mean(seg)
+        seg = seg - offset
+        powers = np.empty((4, len(seg) + 1))
+        powers[:, 0] = 0.0
+        np.cumsum(seg, out=powers[0, 1:])
+        np.cumsum(seg ** 2, out=powers[1, 1:])
+        np.cumsum(seg ** 3, out=powers[2, 1:])
+        np.cumsum(seg ** 4, out=powers[3, 1:])
+        local = chunk_starts - lo
+        sums[:, first:first + len(chunk_starts)] = powers[:, local + window] - powers[:, local]
+        shift[first:first + len(chunk_starts)] = offset
+    return sums, shift
+
+
+def sliding_features(x, window, step):
+    """
+    滑动窗口统计特征：一次 O(N) 计算全部基于矩的特征。
+
+    由各窗口内 x、x²、x³、x⁴ 的滑动和（分段累积和相减）换算中心矩，
+    峰值由 maximum_filter1d 取得，不逐窗口循环。偏度 / 峭度与 scipy.stats.skew、
+    kurtosis(fisher=False) 的有偏估计一致；方差为 0 的窗口两者为 NaN。
+
+    参数：
+    x      - 信号 (N,)
+    window - 窗长（点数）
+    step   - 步长（点数）
+
+    返回：
+    {'center': 窗口中心下标 (M,), 'mean', 'rms', 'std', 'peak', 'crest_factor', 'skewness', 'kurtosis'}，
+    各为 (M,)；信号短于一个窗时均为空数组
+    """
+    x = np.asarray(x, dtype=np.float64)
+    window, step = int(window), max(int(step), 1)
+    starts = np.arange(0, len(x) - window + 1, step)
+    if window <= 0 or len(starts) == 0:
+        empty = np.empty(0)
+        return {key: empty for key in ('center', 'mean', 'rms', 'std', 'peak', 'crest_factor',
+                                       'skewness', 'kurtosis')}
+
+    sums, shift = _window_sums(x, window, step, starts)
+    m1, s2, s3, s4 = sums / window                 # 相对 shift 的原点矩
+    m2 = np.maximum(s2 - m1 ** 2, 0.0)
+    m3 = s3 - 3 * m1 * s2 + 2 * m1 ** 3
+    m4 = s4 - 4 * m1 * s3 + 6 * m1 ** 2 * s2 - 3 * m1 ** 4
+
+    mean = m1 + shift
+    rms = np.sqrt(np.maximum(m2 + mean ** 2, 0.0))
+    # |x| 的滑动最大值；origin 使第 i 个输出对应窗口 [i, i + window)
+    peak = maximum_filter1d(np.abs(x), size=window, origin=-(window // 2), mode='nearest')[starts]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        skewness = np.where(m2 > 0, m3 / m2 ** 1.5, np.nan)
+        kurtosis = np.where(m2 > 0, m4 / m2 ** 2, np.nan)
+    return {
+        'center': starts + window // 2,
+        'mean': mean,
+        'rms': rms,
+        'std': np.sqrt(m2),
+        'peak': peak,
+        'crest_factor': peak / (rms + 1e-12),
+        'skewness': skewness,
+        'kurtosis': kurtosis,
+    }
@@ -0,0 +1,128 @@
+# processor/tacho.py
+
+import numpy as np
+
+# 自动回差：取信号幅度范围（1% ~ 99% 分位数之差）的该比例作为回差带宽
+_AUTO_HYSTERESIS = 0.1
+
+
+def _hysteresis_levels(signal, threshold, hysteresis):
+    """回差比较器的上下门限 (low, high)；hysteresis 为 None 时按信号幅度自动取。"""
+    if hysteresis is None:
+        p_low, p_high = np.percentile(signal, [1, 99])
+        hysteresis = _AUTO_HYSTERESIS * (p_high - p_low)
+    half = 0.5 * max(float(hysteresis), 0.0)
+    return threshold - half, threshold + half
+
+
+def hysteresis_binary(signal, low, high):
+    """
+    带回差的二值化（施密特触发器）：高于 high 置 1，低于 low 置 0，介于两者之间保持前一状态。
+    用“最近一次有效判定的下标”做前向填充，不逐点循环。开头尚无判定的点按是否高于门限中值取值。
+    """
+    signal = np.asarray(signal)
+    decided = (signal > high) | (signal < low)
+    last = np.where(decided, np.arange(len(signal)), -1)
+    np.maximum.accumulate(last, out=last)
+    state = signal[np.maximum(last, 0)] > high
+    undecided = last < 0
+    state[undecided] = signal[undecided] > 0.5 * (low + high)
+    return state
+
+
+def tacho_edge_times(signal, threshold=2.5, both_edges=True, hysteresis=None):
+    """
+    转速脉冲的跳变沿位置（亚采样点精度）。
+
+    先做带回差的二值化，再在每个跳变所在的两点之间对触发门限（上升沿为上门限、下降沿为下门限）
+    线性插值，得到小数采样点位置。
+
+    参数：
+    signal     - 转速脉冲信号 (N,)
+    threshold  - 二值化门限（回差带的中值）
+    both_edges - True 同时使用上升沿与下降沿，False 只用上升沿
+    hysteresis - 回差带宽（与信号同单位）；None 时自动取信号幅度范围的 10%，0 为无回差
+
+    返回：跳变沿位置（小数采样点，升序）
+    """
+    signal = np.asarray(signal, dtype=np.float64)
+    low, high = _hysteresis_levels(signal, threshold, hysteresis)
+    change = np.diff(hysteresis_binary(signal, low, high).astype(np.int8))
+    idx = np.flatnonzero(change if both_edges else change == 1) + 1
+    if len(idx) == 0:
+        return idx.astype(np.float64)
+
+    level = np.where(change[idx - 1] > 0, high, low)
+    before, after = signal[idx - 1], signal[idx]
+    step = after - before
+    frac = np.where(step != 0, (level - before) / np.where(step != 0, step, 1.0), 1.0)
+    return idx - 1 + np.clip(frac, 0.0, 1.0)
+
+
+def tacho_edges(signal, threshold=2.5, both_edges=True, hysteresis=None):
+    """
+    转速脉冲信号二值化后检测跳变沿。
+
+    参数同 tacho_edge_times。
+
+    返回：跳变沿所在的采样点索引（升序，即跳变后的第一个点）
+    """
+    return np.ceil(tacho_edge_times(signal, threshold, both_edges, hysteresis)).astype(np.int64)
+
+
+def shaft_frequency(signal, fs, deg_per_edge=3.0, threshold=2.5, both_edges=True, hysteresis=None):
+    """
+    由转速脉冲信号计算逐点的瞬时轴频（转/秒，即 Hz）。
+
+    与 config/自定义函数测试/转速信号转换.py 的约定一致：每个跳变沿对应 deg_per_edge 度，
+    相邻两沿之间的转速为常数 (deg_per_edge / 360) / Δt；首个沿之前与最后一个沿之后
+    分别沿用第一段与最后一段的转速。Δt 取亚采样点精度的沿间隔，用 np.diff / np.repeat
+    一次展开，不逐沿循环。
+
+    返回：
+    长度 N 的瞬时轴频数组；跳变沿少于两个时返回 None
+    """
+    N = len(signal)
+    edge_times = tacho_edge_times(signal, threshold, both_edges, hysteresis)
+    if len(edge_times) < 2:
+        return None
+
+    intervals = np.maximum(np.diff(edge_times), np.finfo(np.float64).eps)
+    speeds = (deg_per_edge / 360.0) * fs / intervals
+    # 每段覆盖的整数采样点：从本沿之后的第一个点到下一沿之后的第一个点
+    bounds = np.clip(np.ceil(edge_times).astype(np.int64), 0, N)
+    counts = np.concatenate(([bounds[0]], np.diff(bounds), [N - bounds[-1]]))
+    return np.repeat(np.concatenate(([speeds[0]], speeds, [speeds[-1]])), counts)
+
+
+def shaft_rpm(signal, fs, deg_per_edge=3.0, threshold=2.5, both_edges=True, hysteresis=None):
+    """逐点瞬时转速（rpm），参数同 shaft_frequency；跳变沿少于两个时返回 None。"""
+    speed = shaft_frequency(signal, fs, deg_per_edge, threshold, both_edges, hysteresis)
+    return None if speed is None else speed * 60.0
+
+
+def shaft_revolutions(signal, fs, deg_per_edge=3.0, threshold=2.5, both_edges=True, hysteresis=None):
+    """
+    由转速脉冲信号计算逐点的累积转数（轴转角 / 360°）。
+
+    第 i 个跳变沿处转角为 i · deg_per_edge，沿与沿之间按时间线性插值（即匀速），
+    首个沿之前与最后一个沿之后按首末段转速线性外推。沿位置为亚采样点精度。
+
+    返回：
+    长度 N 的累积转数数组（从 0 起算）；跳变沿少于两个时返回 None
+    """
+    N = len(signal)
+    edges = tacho_edge_times(signal, threshold, both_edges, hysteresis)
+    if len(edges) < 2:
+        return None
+    rev_at_edges = np.arange(len(edges)) * (deg_per_edge / 360.0)
+    n = np.arange(N)
+    revolutions = np.interp(n, edges, rev_at_edges)
+    # np.interp 在端点外取常数，这里改为按首末段斜率外推
+    first_slope = rev_at_edges[1] / (edges[1] - edges[0])
+    last_slope = (rev_at_edges[-1] - rev_at_edges[-2]) / (edges[-1] - edges[-2])
+    head = n < edges[0]
+    tail = n > edges[-1]
+    revolutions[head] = (n[head] - edges[0]) * first_slope
+    revolutions[tail] = rev_at_edges[-1] + (n[tail] - edges[-1]) * last_slope
+    return revolutions - revolutions[0]
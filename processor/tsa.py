@@ -0,0 +1,95 @@
+# processor/tsa.py
+
+import numpy as np
+
+# 每批处理的转数，限制 (通道 × 转数 × 每转点数) 中间数组的大小
+_REVS_PER_BATCH = 64
+
+
+def default_points_per_rev(revolutions):
+    """每转点数默认取不小于最慢一转采样点数的 2 的幂，保证重采样不丢失信息。"""
+    revolutions = np.asarray(revolutions, dtype=np.float64)
+    n_revs = int(np.floor(revolutions[-1] - revolutions[0]))
+    if n_revs < 1:
+        return 0
+    marks = np.searchsorted(revolutions, revolutions[0] + np.arange(n_revs + 1))
+    longest = int(np.max(np.diff(marks)))
+    return int(2 ** np.ceil(np.log2(max(longest, 8))))
+
+
+def _revolution_batch(data, revolutions, first_rev, n_revs, points_per_rev):
+    """
+    把第 first_rev ~ first_rev + n_revs - 1 转重采样为 (C, n_revs, P)：
+    所有转、所有点的插值位置由一次 searchsorted 得到，各通道共用同一组下标与权重。
+    """
+    grid = (revolutions[0] + first_rev + np.arange(n_revs)[:, np.newaxis]
+            + np.arange(points_per_rev)[np.newaxis, :] / points_per_rev)             # (R, P)
+    upper = np.clip(np.searchsorted(revolutions, grid, side='right'), 1, len(revolutions) - 1)
+    lower = upper - 1
+    span = revolutions[upper] - revolutions[lower]
+    weight = np.where(span > 0, (grid - revolutions[lower]) / np.where(span > 0, span, 1.0), 0.0)
+    return data[:, lower] * (1.0 - weight) + data[:, upper] * weight
+
+
+def time_synchronous_average(data, revolutions, fs, points_per_rev=None, revs_per_batch=_REVS_PER_BATCH):
+    """
+    时间同步平均（TSA）：按转速脉冲得到的累积转数，把每一整转重采样为固定点数，
+    在转数方向上对全部通道同时求平均，以抑制与转频不同步的成分。
+
+    分两遍按批流式处理：第一遍累加得到平均波形；第二遍逐转计算残差（该转波形 - 平均波形）统计量。
+    任一时刻只保存一批转数的重采样数据，长文件的内存占用有界。
+
+    参数：
+    data           - 形状 (C, N)
+    revolutions    - 逐点累积转数 (N,)，单调递增（见 processor.tacho.shaft_revolutions；
+                     每转一个脉冲时取 deg_per_edge=360、只用上升沿）
+    fs             - 采样频率（Hz）
+    points_per_rev - 每转点数；None 时见 default_points_per_rev
+    revs_per_batch - 每批转数
+
+    返回：
+    {'angle': 每转角度 (P,)（度）, 'average': 平均波形 (C, P), 'n_revolutions': R,
+     'rpm': 各转平均转速 (R,), 'residual_rms' / 'residual_peak' / 'residual_kurtosis': (C, R)}；
+    完整转数不足一转时返回 None
+    """
+    data = np.atleast_2d(np.asarray(data, dtype=np.float64))
+    revolutions = np.asarray(revolutions, dtype=np.float64)
+    n_revs = int(np.floor(revolutions[-1] - revolutions[0]))
+    if n_revs < 1:
+        return None
+    if points_per_rev is None:
+        points_per_rev = default_points_per_rev(revolutions)
+    points_per_rev = int(points_per_rev)
+    batches = [(start, min(revs_per_batch, n_revs - start)) for start in range(0, n_revs, revs_per_batch)]
+
+    # 第一遍：平均波形
+    total = np.zeros((data.shape[0], points_per_rev))
+    for start, count in batches:
+        total += np.sum(_revolution_batch(data, revolutions, start, count, points_per_rev), axis=1)
+    average = total / n_revs
+
+    # 第二遍：逐转残差统计
+    residual_rms = np.empty((data.shape[0], n_revs))
+    residual_peak = np.empty((data.shape[0], n_revs))
+    residual_kurtosis = np.empty((data.shape[0], n_revs))
+    for start, count in batches:
+        residual = _revolution_batch(data, revolutions, start, count, points_per_rev) - average[:, np.newaxis, :]
+        centered = residual - np.mean(residual, axis=-1, keepdims=True)
+        var = np.mean(centered ** 2, axis=-1)
+        residual_rms[:, start:start + count] = np.sqrt(np.mean(residual ** 2, axis=-1))
+        residual_peak[:, start:start + count] = np.max(np.abs(residual), axis=-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            residual_kurtosis[:, start:start + count] = np.where(
+                var > 0, np.mean(centered ** 4, axis=-1) / np.where(var > 0, var, 1.0) ** 2, 0.0)
+
+    # 各转平均转速：一转的持续时间由整转处的采样位置插值得到
+    rev_times = np.interp(revolutions[0] + np.arange(n_revs + 1), revolutions, np.arange(len(revolutions))) / fs
+    return {
+        'angle': np.arange(points_per_rev) * (360.0 / points_per_rev),
+        'average': average,
+        'n_revolutions': n_revs,
+        'rpm': 60.0 / np.diff(rev_times),
+        'residual_rms': residual_rms,
+        'residual_peak': residual_peak,
+        'residual_kurtosis': residual_kurtosis,
+    }
@@ -0,0 +1,248 @@
+# processor/uff_export.py
+
+import os
+import datetime
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+# UFF58 函数类型
+UFF_FUNC_TIME = 1
+UFF_FUNC_FRF = 4
+UFF_FUNC_SPECTRUM = 12
+
+UFF_KINDS = ('time', 'spectrum', 'frf')
+
+# 单位 -> UFF 特定数据类型 (Record 8~10)
+_SPECIFIC_DATA_TYPES = {
+    'g': 12, 'm/s^2': 12, 'm/s²': 12,
+    'mm/s': 11,
+    'mm': 8, 'μm': 8,
+    'N': 13,
+    'pa': 15,
+    'Nm': 0,        # UFF 没有扭矩专用的类型，记为 0（未知），不能归入 13（激励力）
+}
+# 单位中的非 ASCII 符号 -> ASCII 写法（Record 8~11 的单位字段）
+_ASCII_UNIT_SYMBOLS = {'²': '^2', '³': '^3', 'μ': 'u', 'µ': 'u', '°': 'deg'}
+_SPEC_TIME = 17
+_SPEC_FREQUENCY = 18
+
+# 每行数值个数与格式：(单精度, 双精度)
+_VALUE_FORMATS = {
+    'single': ('%13.5E', 6),
+    'double': ('%20.12E', 4),
+}
+
+
+def format_values(values, precision='single'):
+    """
+    把数据块格式化为 UFF58 Record 12 文本（复数按实部 / 虚部交替）。
+    整块只做一次 C 层的 % 格式化，不逐行循环。
+    """
+    values = np.asarray(values)
+    if np.iscomplexobj(values):
+        values = np.column_stack([values.real, values.imag]).ravel()
+    values = values.astype(np.float64, copy=False)
+
+    fmt, per_line = _VALUE_FORMATS[precision]
+    full_rows, remainder = divmod(len(values), per_line)
+    template = (fmt * per_line + '\n') * full_rows
+    if remainder:
+        template += fmt * remainder + '\n'
+    return template % tuple(values.tolist())
+
+
+def _ascii_unit(unit):
+    """把单位中的常见非 ASCII 符号（m/s²、μm、°）换成 ASCII 写法。"""
+    for symbol, ascii_text in _ASCII_UNIT_SYMBOLS.items():
+        unit = unit.replace(symbol, ascii_text)
+    return unit
+
+
+def _fit_bytes(text, width, pad=True):
+    """
+    按 UTF-8 字节数截断（不截断多字节字符）并补空格到恰好 width 字节。
+    头记录的定宽列按字节计，中文通道名用 %-20s 按字符补齐会使后续列错位。
+    """
+    text = str(text)
+    while len(text.encode('utf-8')) > width:
+        text = text[:-1]
+    return text + ' ' * (width - len(text.encode('utf-8'))) if pad else text
+
+
+def _ascii_records(ds, precision):
+    """Record 1 ~ 11（11 行 ASCII 头）。"""
+    is_complex = np.iscomplexobj(ds['data'])
+    if precision == 'single':
+        ord_type = 5 if is_complex else 2
+    else:
+        ord_type = 6 if is_complex else 4
+
+    lines = [
+        _fit_bytes(ds.get('id1', 'NONE'), 80, pad=False),
+        _fit_bytes(ds.get('id2', 'NONE'), 80, pad=False),
+        _fit_bytes(ds.get('id3', 'NONE'), 80, pad=False),
+        _fit_bytes(ds.get('id4', 'NONE'), 80, pad=False),
+        _fit_bytes(ds.get('id5', 'NONE'), 80, pad=False),
+        '%5i%10i%5i%10i %-10s%10i%4i %-10s%10i%4i' % (
+            ds['func_type'], ds.get('func_id', 1), 0, 0,
+            'NONE', ds.get('rsp_node', 1), ds.get('rsp_dir', 0),
+            'NONE', ds.get('ref_node', 0), ds.get('ref_dir', 0)),
+        '%10i%10i%10i%13.5E%13.5E%13.5E' % (
+            ord_type, len(ds['data']), 1, ds['x_min'], ds['dx'], 0.0),
+        '%10i%5i%5i%5i %s %s' % (
+            ds['abscissa_spec'], 0, 0, 0,
+            _fit_bytes(ds['abscissa_label'], 20), _fit_bytes(_ascii_unit(ds['abscissa_unit']), 20)),
+        '%10i%5i%5i%5i %s %s' % (
+            ds['ordinate_spec'], 0, 0, 0,
+            _fit_bytes(ds['ordinate_label'], 20), _fit_bytes(_ascii_unit(ds['ordinate_unit']), 20)),
+        '%10i%5i%5i%5i %s %s' % (
+            ds.get('denominator_spec', 0), 0, 0, 0,
+            _fit_bytes(ds.get('denominator_label', 'NONE'), 20),
+            _fit_bytes(_ascii_unit(ds.get('denominator_unit', 'NONE')), 20)),
+        '%10i%5i%5i%5i %-20s %-20s' % (0, 0, 0, 0, 'NONE', 'NONE'),
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def write_uff58(file_path, datasets, binary=False, precision='single'):
+    """
+    把多个数据集写入一个 UFF58 文件。
+
+    参数：
+    file_path - 输出路径
+    datasets  - 数据集字典列表（见 datasets_from_file_result）
+    binary    - True 写 58b 二进制变体（小端 IEEE 754），False 写 ASCII
+    precision - 'single' 或 'double'
+    """
+    with open(file_path, 'wb') as fh:
+        for ds in datasets:
+            header = _ascii_records(ds, precision).encode('utf-8')
+            if binary:
+                dtype = '<f4' if precision == 'single' else '<f8'
+                data = np.asarray(ds['data'])
+                if np.iscomplexobj(data):
+                    data = np.column_stack([data.real, data.imag]).ravel()
+                payload = np.ascontiguousarray(data, dtype=dtype).tobytes()
+                fh.write(b'%6i\n' % -1)
+                fh.write(b'%6i%1s%6i%6i%12i%12i%6i%6i%12i%12i\n'
+                         % (58, b'b', 1, 2, 11, len(payload), 0, 0, 0, 0))
+                fh.write(header)
+                fh.write(payload)
+                fh.write(b'\n%6i\n' % -1)
+            else:
+                fh.write(b'%6i\n%6i\n' % (-1, 58))
+                fh.write(header)
+                fh.write(format_values(ds['data'], precision).encode('ascii'))
+                fh.write(b'%6i\n' % -1)
+    return file_path
+
+
+def datasets_from_file_result(file_entry, sampling_rate, kinds=UFF_KINDS, estimator='H1', frf_items=None):
+    """
+    把 ProcessingResults.files 中的一个条目转换为 UFF58 数据集列表。
+    原始条目读取 fft_results / frf_results，截断条目读取 channels。
+    通道按出现顺序编号为节点 1, 2, ...；FRF 的参考节点取输入通道的编号。
+
+    frf_items - 要导出的 FRF 列表；None 时原始条目取 frf_results，截断条目不导出 FRF
+                （截断条目的 FRF 按当前估计参数由调用方计算后传入）
+    """
+    file_name = file_entry['file_name']
+    date = datetime.datetime.now().strftime('%d-%b-%y %H:%M:%S')
+    fs = file_entry.get('sampling_rate', sampling_rate)
+
+    if file_entry.get('is_truncated', False):
+        channels = [(name, info.get('data'), info['fft_result'])
+                    for name, info in file_entry.get('channels', {}).items()]
+    else:
+        channels = [(e['fft_result'].name, e.get('data_converted'), e['fft_result'])
+                    for e in file_entry.get('fft_results', [])]
+        if frf_items is None:
+            frf_items = file_entry.get('frf_results', [])
+    frf_items = frf_items or []
+
+    node_of = {name: k + 1 for k, (name, _, _) in enumerate(channels)}
+    datasets = []
+    func_id = 1
+
+    for name, data, fft_result in channels:
+        unit = fft_result.unit
+        spec = _SPECIFIC_DATA_TYPES.get(unit, 0)
+        common = {
+            'id1': name, 'id2': file_name, 'id3': date, 'id5': unit,
+            'rsp_node': node_of[name], 'ordinate_spec': spec,
+            'ordinate_label': name, 'ordinate_unit': unit,
+        }
+        if 'time' in kinds and data is not None:
+            datasets.append(dict(common, **{
+                'func_type': UFF_FUNC_TIME, 'func_id': func_id, 'id4': 'Time Response',
+                'data': np.asarray(data), 'x_min': 0.0, 'dx': 1.0 / fs,
+                'abscissa_spec': _SPEC_TIME, 'abscissa_label': 'Time', 'abscissa_unit': 's',
+            }))
+            func_id += 1
+        if 'spectrum' in kinds:
+            freq = fft_result.freq
+            datasets.append(dict(common, **{
+                'func_type': UFF_FUNC_SPECTRUM, 'func_id': func_id, 'id4': 'Spectrum',
+                'data': fft_result.amplitude * np.exp(1j * fft_result.phase),
+                'x_min': float(freq[0]), 'dx': float(freq[1] - freq[0]) if len(freq) > 1 else 0.0,
+                'abscissa_spec': _SPEC_FREQUENCY, 'abscissa_label': 'Frequency', 'abscissa_unit': 'Hz',
+            }))
+            func_id += 1
+
+    if 'frf' in kinds:
+        units = {name: fft_result.unit for name, _, fft_result in channels}
+        for item in frf_items:
+            H = item.get('estimators', {}).get(estimator)
+            if H is None:
+                H = item['H_f_magnitude'] * np.exp(1j * item['H_f_phase'])
+            freq = item['freq']
+            ref_name = item.get('ref_name', '')
+            datasets.append({
+                'func_type': UFF_FUNC_FRF, 'func_id': func_id,
+                'id1': f"{item['name']} / {ref_name}", 'id2': file_name, 'id3': date,
+                'id4': f"FRF {estimator}", 'id5': f"{units.get(item['name'], '')}/{units.get(ref_name, '')}",
+                'rsp_node': node_of.get(item['name'], 0), 'ref_node': node_of.get(ref_name, 0),
+                'data': H, 'x_min': float(freq[0]), 'dx': float(freq[1] - freq[0]),
+                'abscissa_spec': _SPEC_FREQUENCY, 'abscissa_label': 'Frequency', 'abscissa_unit': 'Hz',
+                'ordinate_spec': _SPECIFIC_DATA_TYPES.get(units.get(item['name']), 0),
+                'ordinate_label': item['name'], 'ordinate_unit': units.get(item['name'], ''),
+                'denominator_spec': _SPECIFIC_DATA_TYPES.get(units.get(ref_name), 0),
+                'denominator_label': ref_name, 'denominator_unit': units.get(ref_name, ''),
+            })
+            func_id += 1
+
+    return datasets
+
+
+def _uff_file_name(file_name, binary):
+    base = os.path.splitext(os.path.basename(file_name))[0] if file_name.endswith('.txt') else file_name
+    return f"{base}.{'uff' if not binary else 'ufb'}"
+
+
+def export_processing_results(processing_results, sampling_rate, output_folder, kinds=UFF_KINDS,
+                              binary=False, precision='single', estimator='H1', max_workers=None,
+                              frf_items=None):
+    """
+    把 ProcessingResults 中每个文件（所有通道的时域、频谱、FRF）批量写成 UFF58，每个源文件一个 UFF 文件。
+    ASCII 格式化是 CPU 密集的，用进程池并行；二进制写出主要是 I/O，用线程池。
+
+    frf_items - {文件名: FRF 列表}，覆盖对应条目的 FRF（截断条目须由此传入，见 datasets_from_file_result）
+
+    返回：写出的文件路径列表
+    """
+    os.makedirs(output_folder, exist_ok=True)
+    jobs = []
+    for file_entry in processing_results.files:
+        datasets = datasets_from_file_result(file_entry, sampling_rate, kinds, estimator,
+                                             (frf_items or {}).get(file_entry['file_name']))
+        if datasets:
+            path = os.path.join(output_folder, _uff_file_name(file_entry['file_name'], binary))
+            jobs.append((path, datasets))
+    if not jobs:
+        return []
+
+    executor_cls = ThreadPoolExecutor if binary or len(jobs) == 1 else ProcessPoolExecutor
+    with executor_cls(max_workers=max_workers) as executor:
+        futures = [executor.submit(write_uff58, path, datasets, binary, precision) for path, datasets in jobs]
+        return [future.result() for future in futures]
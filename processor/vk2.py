@@ -1,58 +1,251 @@
 # vk2.py
 
+import warnings
+from functools import lru_cache
+
 import numpy as np
+from scipy.linalg import LinAlgError, cholesky_banded, cho_solve_banded, solveh_banded
 from scipy.sparse import diags, eye
-from scipy.sparse.linalg import spsolve
+from scipy.sparse.linalg import splu
+
+# 差分算子系数（filtord 1：二阶差分；filtord 2：三阶差分）
+_DIFF_COEFFS = {
+    1: np.array([1.0, -2.0, 1.0]),
+    2: np.array([1.0, -3.0, 3.0, -1.0]),
+}
+
+VK2_SOLVERS = ('banded', 'sparse')
+
+# 联合求解的 Tikhonov 正则项 μ·||z||²：成分间隔小于滤波器带宽时法方程接近奇异，μ 保证其正定
+_JOINT_RIDGE = 1e-6
+# 联合求解的条件检查：任一成分的重建幅值（RMS）超过信号 RMS 的该倍数，视为病态（成分间大幅相消）
+_JOINT_GAIN_LIMIT = 2.0
+
+
+def _difference_operator(N, filtord):
+    """filtord 阶结构方程对应的差分矩阵 A（(N - filtord - 1) × N）。"""
+    c = _DIFF_COEFFS[filtord]
+    NR = N - len(c) + 1
+    return diags([np.full(NR, v) for v in c], np.arange(len(c)), shape=(NR, N))
 
-def vk2(y, f, fs, r, filtord):
+
+def vk2_bandwidth(fs, r, filtord):
+    """返回 (bw, T)：滤波器 -3 dB 带宽（Hz）与 10% - 90% 过渡时间。"""
+    if filtord == 1:
+        return fs / (2 * np.pi) * (1.58 * r ** -0.5), 2.85 * r ** 0.5
+    return fs / (2 * np.pi) * (1.70 * r ** (-1/3)), 2.80 * r ** (1/3)
+
+
+def banded_system(N, r, filtord):
     """
-    Vold-Kalman 二代滤波器，用于提取单个频率成分。
-    
+    直接按解析式构造 AA = r²·AᵀA + I 的上三角带状存储（solveh_banded / cholesky_banded 的 'upper' 格式），
+    形状 (p + 1, N)，p = filtord + 1 为半带宽；只写入各条带，O(N) 时间与内存。
+
+    (AᵀA)[i, i+d] = Σ_m c[m]·c[m+d]，求和只取差分行 k = i - m 落在 [0, N - p) 内的项，
+    因此首尾 p 个点的对角元比内部小。
+    """
+    c = _DIFF_COEFFS[filtord]
+    p = len(c) - 1
+    NR = N - p
+    ab = np.zeros((p + 1, N))
+    for d in range(p + 1):
+        row = ab[p - d]
+        for m in range(p + 1 - d):
+            # 元素 (i, i+d) 存在 ab[p - d, i + d]，i ∈ [m, NR + m)
+            row[m + d:NR + m + d] += c[m] * c[m + d]
+    ab *= r * r
+    ab[p] += 1.0
+    return ab
+
+
+@lru_cache(maxsize=4)
+def _banded_factor(N, r, filtord):
+    """AA 对称正定，带状 Cholesky 分解一次后缓存（只存 (p + 1) × N 个数）。"""
+    return cholesky_banded(banded_system(N, r, filtord), lower=False)
+
+
+@lru_cache(maxsize=4)
+def _factorized_system(N, r, filtord):
+    """
+    AA = r²·AᵀA + I 只与 (N, r, filtord) 有关，与频率无关；
+    分解一次后缓存，同长度信号的多个频率 / 多个通道复用同一个 LU 分解。
+    """
+    A = _difference_operator(N, filtord)
+    AA = (r * r * A.T @ A + eye(N, format='csc')).tocsc()
+    return splu(AA)
+
+
+def vk2_multi(y, f, fs, r, filtord, solver='banded', joint=False):
+    """
+    一次求解多个频率成分的 Vold-Kalman 二代滤波（多右端项）。
+
     参数：
     y       - 数据向量，长度为 N
-    f       - 频率向量（Hz），长度为 N
+    f       - 频率矩阵（Hz），形状 (K, N)，每行为一条频率轨迹
     fs      - 采样频率（Hz）
     r       - 权重因子（正数）
     filtord - 滤波器阶数，1 或 2
+    solver  - 'banded'：带状 Cholesky（线性时间 / 内存）；'sparse'：通用稀疏 LU
+    joint   - True 时各成分联合求解（见 _solve_joint），相近频率之间不再重复计入能量；
+              联合求解病态时发出 RuntimeWarning 并改用独立求解
 
     返回：
-    x   - 提取的频率成分的复包络
+    x   - 各频率成分的复包络，形状 (K, N)
     bw  - 滤波器 -3 dB 带宽（Hz）
     T   - 滤波器的 10% - 90% 过渡时间
-    xr  - 重建的信号（实部）
+    xr  - 各频率成分重建的信号（实部），形状 (K, N)
     """
-    y = np.asarray(y).flatten()
+    y = np.asarray(y, dtype=np.float64).flatten()
     N = len(y)
-    f = np.asarray(f).flatten()
-    if len(f) != N:
+    f = np.atleast_2d(np.asarray(f, dtype=np.float64))
+    if f.shape[1] != N:
         raise ValueError('f 和 y 的长度必须相同')
+
+    # 相位累积：θ_k(n) = Σ f_k · dt（单位：周）
+    cycles = np.cumsum(f, axis=1) / fs
+    x, xr = _solve_envelopes(y, cycles, r, filtord, solver, joint)
+    bw, T = vk2_bandwidth(fs, r, filtord)
+    return x, bw, T, xr
+
+
+def _solve_envelopes(y, cycles, r, filtord, solver, joint=False):
+    """
+    给定各成分的累积相位 cycles (K, N)（单位：周），解出复包络 x (K, N) 与重建信号 xr (K, N)。
+    独立求解时系数矩阵为实矩阵：解调后的实部、虚部作为 2K 个实右端项一次回代。
+    """
     if filtord not in [1, 2]:
         raise ValueError('filtord 必须为 1 或 2')
-        return None
-    
-    dt = 1 / fs
-    if filtord == 1:
-        NR = N - 2
-        e = np.ones(NR)
-        data = np.vstack([e, -2*e, e])
-        offsets = np.array([0, 1, 2])
-        A = diags(data, offsets, shape=(NR, N))
-        bw = fs / (2 * np.pi) * (1.58 * r ** -0.5)
-        T = 2.85 * r ** 0.5
-    elif filtord == 2:
-        NR = N - 3
-        e = np.ones(NR)
-        data = np.vstack([e, -3*e, 3*e, -e])
-        offsets = np.array([0, 1, 2, 3])
-        A = diags(data, offsets, shape=(NR, N))
-        bw = fs / (2 * np.pi) * (1.70 * r ** (-1/3))
-        T = 2.80 * r ** (1/3)
-    
-    AA = r * r * A.T @ A + eye(N, format='csc')
-    jay = 1j
-    ejth = np.exp(jay * 2 * np.pi * np.cumsum(f) * dt)
+    if solver not in VK2_SOLVERS:
+        raise ValueError(f'未知的求解器: {solver}')
+
+    K, N = cycles.shape
+    ejth = np.exp(1j * 2 * np.pi * cycles)                         # (K, N)
+    if joint and K > 1:
+        x = _solve_joint(y, ejth, r, filtord)
+        if x is not None:
+            return x, np.real(x * ejth)
     yy = np.conj(ejth) * y
-    x = 2 * spsolve(AA, yy)
+
+    rhs = np.empty((N, 2 * K))
+    rhs[:, :K] = yy.real.T
+    rhs[:, K:] = yy.imag.T
+    if solver == 'banded':
+        sol = cho_solve_banded((_banded_factor(N, float(r), filtord), False), rhs,
+                               overwrite_b=True, check_finite=False)
+    else:
+        sol = _factorized_system(N, float(r), filtord).solve(rhs)
+    x = 2 * (sol[:, :K] + 1j * sol[:, K:]).T
     xr = np.real(x * ejth)
+    return x, xr
+
+
+def joint_banded_system(ejth, r, filtord):
+    """
+    多成分联合 VK2 的 Hermitian 块带状矩阵（上三角带状存储，未知量按 (采样点, 成分) 交错排列）。
+
+    最小化 ||y - Σ_k c_k·z_k||² + r² Σ_k ||A z_k||²（c_k = e^{jθ_k}，忽略负频率镜像项），法方程为：
+        (r²·AᵀA + I) z_k + Σ_{l≠k} diag(conj(c_k)·c_l) z_l = conj(c_k)·y
+    交错排列后第 n 个对角块为 r²(AᵀA)_nn·I + v_n v_nᴴ（v_n = conj(c(n))），相邻采样点之间只有
+    r²(AᵀA)_{n,n+d}·I 的对角耦合，总半带宽 u = K(p + 1) - 1。
+
+    参数：
+    ejth - 各成分的 e^{jθ}，形状 (K, N)
+
+    返回：形状 (u + 1, N·K) 的复数带状矩阵
+    """
+    K, N = ejth.shape
+    base = banded_system(N, r, filtord)              # (p + 1, N)，对角线已含 I
+    p = base.shape[0] - 1
+    u = K * (p + 1) - 1
+    ab = np.zeros((u + 1, N * K), dtype=np.complex128)
+
+    # 采样点之间的耦合：(n - d, k) 与 (n, k)，位于第 u - d·K 条带
+    for d in range(p + 1):
+        ab[u - d * K].reshape(N, K)[:] = base[p - d][:, np.newaxis]
+
+    # 同一采样点内成分之间的耦合 conj(c_k)·c_l（k < l），位于第 u - (l - k) 条带
+    C = ejth.T                                        # (N, K)
+    for s in range(1, K):
+        ab[u - s].reshape(N, K)[:, s:] = np.conj(C[:, :K - s]) * C[:, s:]
+    return ab
+
+
+def _solve_joint(y, ejth, r, filtord):
+    """
+    联合求解全部成分的复包络：一次 Hermitian 带状 Cholesky（solveh_banded），
+    代价随 N 线性增长，随成分数 K 约按 K³ 增长。
+
+    对角线加 _JOINT_RIDGE 正则。分解失败（LinAlgError）或解未通过 _JOINT_GAIN_LIMIT 条件检查时
+    发出 RuntimeWarning 并返回 None，由调用方改用独立求解。
+    """
+    K, N = ejth.shape
+    ab = joint_banded_system(ejth, float(r), filtord)
+    ab[-1] += _JOINT_RIDGE
+    rhs = (np.conj(ejth) * y).T.reshape(N * K)       # 交错排列：索引 n·K + k
+    try:
+        z = solveh_banded(ab, rhs, overwrite_ab=True, overwrite_b=True, lower=False, check_finite=False)
+    except LinAlgError:
+        warnings.warn("VK2 联合求解矩阵非正定（成分间隔远小于滤波器带宽），已改用独立求解", RuntimeWarning)
+        return None
+    x = 2 * z.reshape(N, K).T
+    y_rms = np.sqrt(np.mean(y ** 2))
+    component_rms = np.sqrt(np.mean(np.real(x * ejth) ** 2, axis=1))
+    if not np.all(np.isfinite(component_rms)) or np.any(component_rms > _JOINT_GAIN_LIMIT * y_rms):
+        warnings.warn("VK2 联合求解病态（成分间隔远小于滤波器带宽），已改用独立求解", RuntimeWarning)
+        return None
+    return x
+
+
+def vk2_orders(y, shaft_freq, orders, fs, r, filtord, solver='banded', joint=False):
+    """
+    阶次跟踪 VK2：按瞬时轴频同时提取多个阶次成分。
+
+    轴的累积转数只计算一次，第 k 个阶次的相位为 orders[k] · 转数，
+    全部阶次共用同一个分解、一次多右端项求解。
+
+    参数：
+    y          - 数据向量，长度为 N
+    shaft_freq - 瞬时轴频（转/秒），长度为 N（见 processor.tacho.shaft_frequency）
+    orders     - 阶次列表，长度 K
+    fs         - 采样频率（Hz）
+    r, filtord, solver, joint - 同 vk2_multi
+
+    返回：
+    x, bw, T, xr：含义同 vk2_multi，x / xr 形状 (K, N)
+    """
+    y = np.asarray(y, dtype=np.float64).flatten()
+    shaft_freq = np.asarray(shaft_freq, dtype=np.float64).flatten()
+    if len(shaft_freq) != len(y):
+        raise ValueError('shaft_freq 和 y 的长度必须相同')
+    orders = np.atleast_1d(np.asarray(orders, dtype=np.float64))
+
+    revolutions = np.cumsum(shaft_freq) / fs
+    x, xr = _solve_envelopes(y, orders[:, np.newaxis] * revolutions[np.newaxis, :], r, filtord, solver, joint)
+    bw, T = vk2_bandwidth(fs, r, filtord)
     return x, bw, T, xr
 
+
+def vk2(y, f, fs, r, filtord, solver='banded'):
+    """
+    Vold-Kalman 二代滤波器，用于提取单个频率成分。
+    
+    参数：
+    y       - 数据向量，长度为 N
+    f       - 频率向量（Hz），长度为 N
+    fs      - 采样频率（Hz）
+    r       - 权重因子（正数）
+    filtord - 滤波器阶数，1 或 2
+    solver  - 'banded' 或 'sparse'，见 vk2_multi
+
+    返回：
+    x   - 提取的频率成分的复包络
+    bw  - 滤波器 -3 dB 带宽（Hz）
+    T   - 滤波器的 10% - 90% 过渡时间
+    xr  - 重建的信号（实部）
+    """
+    y = np.asarray(y).flatten()
+    f = np.asarray(f).flatten()
+    if len(f) != len(y):
+        raise ValueError('f 和 y 的长度必须相同')
+    x, bw, T, xr = vk2_multi(y, f[np.newaxis, :], fs, r, filtord, solver)
+    return x[0], bw, T, xr[0]
@@ -0,0 +1,179 @@
+# processor/vk2_batch.py
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .vk2 import vk2_multi, vk2_orders
+from .vk2_block import vk2_blockwise
+
+VK2_CHANNEL_SUFFIX = '_VK2'
+
+
+def _block_size(data, fs, vk2_params):
+    """
+    分块求解的核心段点数，0 表示整体求解。联合求解（joint）不支持分块（见 vk2_blockwise），
+    此时发出 RuntimeWarning 并整体求解。
+    """
+    block_size = int(vk2_params.get('block_seconds', 0) * fs)
+    if not 0 < block_size < len(data):
+        return 0
+    if vk2_params.get('joint', False):
+        warnings.warn("VK2 联合求解不支持分块，已整体求解", RuntimeWarning)
+        return 0
+    return block_size
+
+
+def remove_frequencies(data, fs, vk2_params):
+    """
+    从信号中去除 vk2_params['freq_list'] 中的固定频率（全部频率一次多右端项求解；
+    block_seconds > 0 时分块重叠求解，block_workers 为分块求解的进程数；joint 为 True 时各频率联合求解，
+    此时不分块）。
+    """
+    freq_list = vk2_params.get('freq_list', None)
+    r = vk2_params.get('r', 1000)
+    filtord = vk2_params.get('filtord', 1)
+
+    if freq_list is None:
+        raise ValueError("需要提供要去除的频率列表 freq_list")
+
+    N = len(data)
+    if len(freq_list) == 0:
+        return np.asarray(data, dtype=np.float64).copy()
+
+    block_size = _block_size(data, fs, vk2_params)
+    if block_size:
+        extracted_components = vk2_blockwise(data, fs, r, filtord, freqs=freq_list, block_size=block_size,
+                                             tol=vk2_params.get('block_tol', 1e-6),
+                                             max_workers=vk2_params.get('block_workers'))
+        return data - extracted_components
+
+    # 独立求解时所有频率共用同一个系数矩阵，一次分解、多右端项求解
+    f_matrix = np.repeat(np.asarray(freq_list, dtype=np.float64)[:, np.newaxis], N, axis=1)
+    x, bw, T, xr = vk2_multi(data, f_matrix, fs, r, filtord, joint=vk2_params.get('joint', False))
+    return data - np.sum(xr, axis=0)
+
+
+def track_orders(data, fs, shaft_freq, vk2_params):
+    """
+    按瞬时轴频提取（order_action='extract'）或去除（'remove'）vk2_params['order_list'] 中的阶次。
+    """
+    order_list = vk2_params.get('order_list', None)
+    r = vk2_params.get('r', 1000)
+    filtord = vk2_params.get('filtord', 1)
+    action = vk2_params.get('order_action', 'remove')
+
+    if not order_list:
+        raise ValueError("需要提供要跟踪的阶次列表 order_list")
+    if len(shaft_freq) != len(data):
+        raise ValueError("轴频序列与信号长度不一致")
+
+    block_size = _block_size(data, fs, vk2_params)
+    if block_size:
+        components = vk2_blockwise(data, fs, r, filtord, shaft_freq=shaft_freq, orders=order_list,
+                                   block_size=block_size, tol=vk2_params.get('block_tol', 1e-6),
+                                   max_workers=vk2_params.get('block_workers'))
+    else:
+        # 独立求解时全部阶次共用一次分解、一次多右端项求解
+        x, bw, T, xr = vk2_orders(data, shaft_freq, order_list, fs, r, filtord,
+                                  joint=vk2_params.get('joint', False))
+        components = np.sum(xr, axis=0)
+
+    if action == 'extract':
+        return components
+    return data - components
+
+
+def clean_signal(data, fs, vk2_params, shaft_freq=None):
+    """按 vk2_params['mode'] 做固定频率去除或阶次跟踪。"""
+    if vk2_params.get('mode') == 'order':
+        return track_orders(data, fs, shaft_freq, vk2_params)
+    return remove_frequencies(data, fs, vk2_params)
+
+
+def _clean_shared_row(buf_in, buf_out, shape, row, shaft_row, fs, vk2_params):
+    data_in = np.ndarray(shape, dtype=np.float64, buffer=buf_in)
+    data_out = np.ndarray((shape[0] - (shaft_row is not None), shape[1]), dtype=np.float64, buffer=buf_out)
+    shaft = None if shaft_row is None else data_in[shaft_row]
+    # VK2 只读取输入，直接在共享内存视图上计算
+    data_out[row] = clean_signal(data_in[row], fs, vk2_params, shaft)
+
+
+def _vk2_worker(in_name, out_name, shape, row, shaft_row, fs, vk2_params):
+    """
+    工作进程：按名称挂接共享内存，读取第 row 行信号（阶次模式另读 shaft_row 行轴频），
+    清洗结果直接写入输出共享内存的同一行，不经过 pickle 传递数组。
+
+    返回：(row, 求解过程中的 RuntimeWarning 文本列表)
+    """
+    shm_in = shared_memory.SharedMemory(name=in_name)
+    shm_out = shared_memory.SharedMemory(name=out_name)
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', RuntimeWarning)
+            _clean_shared_row(shm_in.buf, shm_out.buf, shape, row, shaft_row, fs, vk2_params)
+    finally:
+        shm_in.close()
+        shm_out.close()
+    return row, [str(w.message) for w in caught if issubclass(w.category, RuntimeWarning)]
+
+
+def run_vk2_batch(file_channels, fs, vk2_params, shaft_by_file=None, max_workers=None, messages=None):
+    """
+    VK2 批处理：把 文件 × 通道 分发到进程池，数组经共享内存传递。
+
+    参数：
+    file_channels - {文件名: (通道名列表, 数据 (C, N))}
+    fs            - 采样频率（Hz）
+    vk2_params    - 同 clean_signal
+    shaft_by_file - 阶次模式下 {文件名: 瞬时轴频 (N,)}
+    max_workers   - 进程数
+    messages      - 可选列表：追加各任务的求解警告 (文件名, 通道名, 文本)（如联合求解改用独立求解）
+
+    返回：{文件名: {通道名: 清洗后数据 (N,)}}
+    """
+    shaft_by_file = shaft_by_file or {}
+    # 已按通道并行，分块求解不再嵌套进程池
+    vk2_params = dict(vk2_params, block_workers=1)
+    order_mode = vk2_params.get('mode') == 'order'
+    segments = []          # (文件名, 通道名列表, shm_in, shm_out, shape, shaft_row)
+    try:
+        for file_name, (names, data) in file_channels.items():
+            data = np.atleast_2d(np.asarray(data, dtype=np.float64))
+            if data.size == 0 or (order_mode and file_name not in shaft_by_file):
+                continue
+            rows = [data]
+            if order_mode:
+                rows.append(np.asarray(shaft_by_file[file_name], dtype=np.float64)[np.newaxis, :])
+            block = np.vstack(rows)
+
+            shm_in = shared_memory.SharedMemory(create=True, size=block.nbytes)
+            np.ndarray(block.shape, dtype=np.float64, buffer=shm_in.buf)[:] = block
+            shm_out = shared_memory.SharedMemory(create=True, size=data.nbytes)
+            segments.append((file_name, list(names), shm_in, shm_out, block.shape,
+                             data.shape[0] if order_mode else None))
+
+        jobs = [(seg, row) for seg in segments for row in range(len(seg[1]))]
+        max_workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(max_workers, max(len(jobs), 1))) as executor:
+            futures = [executor.submit(_vk2_worker, seg[2].name, seg[3].name, seg[4], row, seg[5], fs, vk2_params)
+                       for seg, row in jobs]
+            for (seg, row), future in zip(jobs, futures):
+                _, job_warnings = future.result()
+                if messages is not None:
+                    messages.extend((seg[0], seg[1][row], text) for text in dict.fromkeys(job_warnings))
+
+        cleaned = {}
+        for file_name, names, shm_in, shm_out, shape, shaft_row in segments:
+            out = np.ndarray((len(names), shape[1]), dtype=np.float64, buffer=shm_out.buf)
+            cleaned[file_name] = {name: out[k].copy() for k, name in enumerate(names)}
+            del out
+        return cleaned
+    finally:
+        for _, _, shm_in, shm_out, _, _ in segments:
+            for shm in (shm_in, shm_out):
+                shm.close()
+                shm.unlink()
@@ -0,0 +1,84 @@
+# test/bench_vk2.py
+# VK2 求解器基准：原始 spsolve 实现 vs 带状 Cholesky 实现，N = 1e4 ~ 1e7。
+# 用法：python test/bench_vk2.py [--max-sparse 1e6] [--orders 1] [--filtord 1] [--r 1000]
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+import numpy as np
+from scipy.sparse import diags, eye
+from scipy.sparse.linalg import spsolve
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from processor.vk2 import vk2_multi, _banded_factor
+
+
+def vk2_spsolve(y, f, fs, r, filtord):
+    """改造前的实现：每个频率重新构造 CSC 矩阵并 spsolve。"""
+    N = len(y)
+    if filtord == 1:
+        e = np.ones(N - 2)
+        A = diags(np.vstack([e, -2*e, e]), np.array([0, 1, 2]), shape=(N - 2, N))
+    else:
+        e = np.ones(N - 3)
+        A = diags(np.vstack([e, -3*e, 3*e, -e]), np.array([0, 1, 2, 3]), shape=(N - 3, N))
+    AA = r * r * A.T @ A + eye(N, format='csc')
+    ejth = np.exp(1j * 2 * np.pi * np.cumsum(f) / fs)
+    x = 2 * spsolve(AA, np.conj(ejth) * y)
+    return x, np.real(x * ejth)
+
+
+def measure(func):
+    """返回 (结果, 耗时 s, Python 侧峰值内存 MB)。"""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="VK2 求解器基准")
+    parser.add_argument('--sizes', type=float, nargs='+', default=[1e4, 1e5, 1e6, 1e7])
+    parser.add_argument('--max-sparse', type=float, default=1e6,
+                        help="超过该长度不再运行 spsolve 基准（内存 / 时间过大）")
+    parser.add_argument('--orders', type=int, default=1, help="同时提取的频率个数")
+    parser.add_argument('--filtord', type=int, default=1, choices=[1, 2])
+    parser.add_argument('--r', type=float, default=1000.0)
+    parser.add_argument('--fs', type=float, default=25600.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    freqs = 50.0 * np.arange(1, args.orders + 1)
+    print(f"filtord={args.filtord}  r={args.r:g}  fs={args.fs:g}  频率数={args.orders}")
+    print(f"{'N':>10} {'spsolve(s)':>11} {'MB':>8} {'banded(s)':>10} {'MB':>8} {'加速':>7} {'相对误差':>10}")
+
+    for n in args.sizes:
+        N = int(n)
+        t = np.arange(N) / args.fs
+        y = np.sum(np.sin(2 * np.pi * freqs[:, np.newaxis] * t), axis=0) + 0.1 * rng.standard_normal(N)
+        f_matrix = np.repeat(freqs[:, np.newaxis], N, axis=1)
+
+        _banded_factor.cache_clear()
+        (x_band, _, _, _), t_band, m_band = measure(
+            lambda: vk2_multi(y, f_matrix, args.fs, args.r, args.filtord, solver='banded'))
+
+        if N <= args.max_sparse:
+            x_ref, t_ref, m_ref = measure(
+                lambda: np.vstack([vk2_spsolve(y, f_matrix[k], args.fs, args.r, args.filtord)[0]
+                                   for k in range(len(freqs))]))
+            err = np.max(np.abs(x_band - x_ref)) / np.max(np.abs(x_ref))
+            print(f"{N:>10d} {t_ref:>11.3f} {m_ref:>8.1f} {t_band:>10.3f} {m_band:>8.1f} "
+                  f"{t_ref / t_band:>6.1f}x {err:>10.2e}")
+        else:
+            print(f"{N:>10d} {'-':>11} {'-':>8} {t_band:>10.3f} {m_band:>8.1f} {'-':>7} {'-':>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -6,6 +6,7 @@ from model.data_models import SensorSettings
 import pyaudio
 import wave
 import os
+import numpy as np
 
 import threading
 import aisuite as ai
@@ -1180,7 +1181,8 @@ class SensorSettingsDialog(tk.Toplevel):
                 '扭矩传感器': 0.02,   # V/Nm
                 '力台传感器': 0.00667,# V/N
                 '空载信号': 1,        # 灵敏度为 1
-                '力锤': 1             # V/N
+                '力锤': 1,            # V/N
+                '转速': {'a': 3.0, 'b': 2.5}  # a: 每沿角度 (°)，b: 触发门限 (V)
                 }
         default_units = {
                 '加速度': 'g',
@@ -1190,17 +1192,17 @@ class SensorSettingsDialog(tk.Toplevel):
                 '扭矩传感器': 'Nm',
                 '力台传感器': 'N',
                 '空载信号': 'V',
-                '力锤': 'N'
+                '力锤': 'N',
+                '转速': 'V'
                 }
-        sensor_types = ['加速度', '电涡流', '力环', '脉动压力传感器', '扭矩传感器', '力台传感器', '空载信号', '力锤']
+        sensor_types = ['加速度', '电涡流', '力环', '脉动压力传感器', '扭矩传感器', '力台传感器', '空载信号', '力锤', '转速']
 
         self.sensor_type_vars = []
         self.sensitivity_vars = []
         self.name_vars = []
         self.a_vars = []
         self.b_vars = []
-
-        self.ref_channel_var = tk.IntVar(value=-1)  # 默认不选中任何参考通道
+        self.ref_vars = []  # 每个通道一个勾选框，可选多个参考通道（多参考 FRF）
 
         # 添加表头
         tk.Label(self, text="通道").grid(row=0, column=0)
@@ -1217,11 +1219,12 @@ class SensorSettingsDialog(tk.Toplevel):
             name_var = tk.StringVar(value='加速度{}'.format(i+1))
             a_var = tk.StringVar(value='')
             b_var = tk.StringVar(value='')
+            ref_var = tk.BooleanVar(value=False)  # 默认不选中任何参考通道
 
             def set_defaults(i=i):
                 sensor_type = self.sensor_type_vars[i].get()
                 default_sensitivity = default_sensitivities.get(sensor_type, 1)
-                if sensor_type == '脉动压力传感器':
+                if sensor_type in ('脉动压力传感器', '转速'):
                     self.sensitivity_vars[i].set('')
                     self.a_vars[i].set(str(default_sensitivity.get('a', 1)))
                     self.b_vars[i].set(str(default_sensitivity.get('b', 0)))
@@ -1241,6 +1244,7 @@ class SensorSettingsDialog(tk.Toplevel):
             self.name_vars.append(name_var)
             self.a_vars.append(a_var)
             self.b_vars.append(b_var)
+            self.ref_vars.append(ref_var)
             set_defaults(i)
 
             # 创建控件
@@ -1250,7 +1254,7 @@ class SensorSettingsDialog(tk.Toplevel):
             tk.Entry(self, textvariable=name_var).grid(row=i+1, column=3)
             tk.Entry(self, textvariable=a_var).grid(row=i+1, column=4)
             tk.Entry(self, textvariable=b_var).grid(row=i+1, column=5)
-            tk.Radiobutton(self, variable=self.ref_channel_var, value=i).grid(row=i+1, column=6)
+            tk.Checkbutton(self, variable=ref_var).grid(row=i+1, column=6)
 
         # 添加按钮
         button_frame = tk.Frame(self)
@@ -1276,8 +1280,7 @@ class SensorSettingsDialog(tk.Toplevel):
                     self.name_vars[i].set(setting['name'])
                     self.a_vars[i].set(str(setting.get('a', '')))
                     self.b_vars[i].set(str(setting.get('b', '')))
-                    if setting.get('is_reference', False):
-                        self.ref_channel_var.set(i)
+                    self.ref_vars[i].set(bool(setting.get('is_reference', False)))
             except Exception as e:
                 messagebox.showerror("错误", f"导入参数时发生错误：{e}")
 
@@ -1291,7 +1294,7 @@ class SensorSettingsDialog(tk.Toplevel):
             name = self.name_vars[i].get()
             a = self.a_vars[i].get()
             b = self.b_vars[i].get()
-            is_reference = (i == self.ref_channel_var.get())
+            is_reference = self.ref_vars[i].get()
             setting = {
                     'sensor_type': sensor_type,
                     'sensitivity': sensitivity,
@@ -1321,15 +1324,16 @@ class SensorSettingsDialog(tk.Toplevel):
                 '扭矩传感器': 'Nm',
                 '力台传感器': 'N',
                 '空载信号': 'V',
-                '力锤': 'N'
+                '力锤': 'N',
+                '转速': 'V'
                 }
         for i in range(self.num_channels):
             sensor_type = self.sensor_type_vars[i].get()
             sensitivity = self.sensitivity_vars[i].get()
             name = self.name_vars[i].get()
             unit = default_units[sensor_type]
-            is_reference = (i == self.ref_channel_var.get())
-            if sensor_type == '脉动压力传感器':
+            is_reference = self.ref_vars[i].get()
+            if sensor_type in ('脉动压力传感器', '转速'):
                 a = self.a_vars[i].get()
                 b = self.b_vars[i].get()
                 try:
@@ -1338,6 +1342,9 @@ class SensorSettingsDialog(tk.Toplevel):
                 except ValueError:
                     messagebox.showwarning("警告", "参数 a 和 b 必须是数字！")
                     return
+                if sensor_type == '转速' and a <= 0:
+                    messagebox.showwarning("警告", "转速通道的参数 a（每沿角度）必须为正数！")
+                    return
                 settings.append(SensorSettings(sensor_type, None, unit, name, a, b, is_reference))
             else:
                 if sensitivity == '':
@@ -1352,3 +1359,180 @@ class SensorSettingsDialog(tk.Toplevel):
         self.settings = settings
         self.destroy()
 
+
+
+class ModalResultsDialog(tk.Toplevel):
+    """
+    模态识别结果表：每行一个 (文件, 方法, 阶次)，显示固有频率和阻尼比；
+    各通道振型随导出的完整表格一起保存。
+    """
+    def __init__(self, parent, rows, export_callback):
+        super().__init__(parent)
+        self.title("模态参数识别结果")
+        self.export_callback = export_callback
+        self._create_widgets(rows)
+
+    def _create_widgets(self, rows):
+        columns = ("文件", "输入", "方法", "阶次", "频率(Hz)", "阻尼比(%)")
+        frame = tk.Frame(self)
+        frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        tree = ttk.Treeview(frame, columns=columns, show='headings', height=15)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=90 if col not in ("文件",) else 220, anchor=tk.CENTER)
+        scrollbar = tk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 表格行按通道展开，这里每个 (文件, 方法, 阶次) 只显示一行
+        shown = set()
+        for file_name, ref_name, method, k, fn, zeta, *_ in rows:
+            key = (file_name, method, k)
+            if key in shown:
+                continue
+            shown.add(key)
+            tree.insert('', tk.END, values=(file_name, ref_name, method, k, f"{fn:.3f}", f"{zeta * 100:.3f}"))
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(pady=5)
+        tk.Button(button_frame, text="导出表格", command=self.on_export).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="关闭", command=self.destroy).pack(side=tk.LEFT, padx=5)
+
+    def on_export(self):
+        file_path = filedialog.asksaveasfilename(title="导出模态参数", defaultextension=".txt",
+                                                 filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")])
+        if file_path:
+            try:
+                self.export_callback(file_path)
+                messagebox.showinfo("成功", "模态参数已导出！")
+            except Exception as e:
+                messagebox.showerror("错误", f"导出模态参数时发生错误：{e}")
+
+
+class OdsResultsDialog(tk.Toplevel):
+    """
+    ODS 结果表：每行一个 (文件, 测点)，列为各频率的幅值 (RMS) 与相对参考通道的相位。
+    """
+    def __init__(self, parent, ods_results, export_callback):
+        super().__init__(parent)
+        self.title("工作变形 (ODS)")
+        self.export_callback = export_callback
+        self._create_widgets(ods_results)
+
+    def _create_widgets(self, ods_results):
+        columns = ["文件", "测点"]
+        for label, freq in zip(ods_results['labels'], ods_results['frequencies']):
+            columns += [f"{label}({freq:.1f}Hz)幅值", f"{label}相位(deg)"]
+        frame = tk.Frame(self)
+        frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        tree = ttk.Treeview(frame, columns=columns, show='headings', height=15)
+        for col in columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=200 if col == "文件" else 110, anchor=tk.CENTER)
+        scrollbar = tk.Scrollbar(frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        for file_name, res in ods_results['files'].items():
+            for ch, row in zip(res['channels'], res['table']):
+                values = [file_name, ch]
+                for value in row:
+                    values += [f"{abs(value):.4g}", f"{np.degrees(np.angle(value)):.1f}"]
+                tree.insert('', tk.END, values=values)
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(pady=5)
+        tk.Button(button_frame, text="导出表格", command=self.on_export).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="关闭", command=self.destroy).pack(side=tk.LEFT, padx=5)
+
+    def on_export(self):
+        file_path = filedialog.asksaveasfilename(title="导出 ODS", defaultextension=".txt",
+                                                 filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")])
+        if file_path:
+            try:
+                self.export_callback(file_path)
+                messagebox.showinfo("成功", "ODS 已导出！")
+            except Exception as e:
+                messagebox.showerror("错误", f"导出 ODS 时发生错误：{e}")
+
+
+class FrameTransformDialog(tk.Toplevel):
+    """
+    旋转坐标系 → 静止坐标系变换：选择成对的力环 x / y 通道（按选择顺序一一配对）、转速通道与角度偏置，
+    结果 Fx / Fy 作为新通道写回，替代逐个执行 Fx0.py / Fy30.py 一类的自定义脚本。
+    """
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.controller = parent.controller
+        self.title("坐标变换（旋转 → 静止）")
+        self.tacho_channel_var = tk.StringVar(value=parent.tacho_channel_var.get())
+        self.deg_per_edge_var = tk.StringVar(value=parent.tacho_deg_per_edge_var.get())
+        self.threshold_var = tk.StringVar(value=parent.tacho_threshold_var.get())
+        self.offsets_var = tk.StringVar(value="0,30,60,90,120,150")
+        self._create_widgets(parent.channel_options)
+
+    def _create_widgets(self, channel_options):
+        # 力环通道优先列出
+        force_ring = [s.name for s in (self.controller.params.sensor_settings if self.controller.params else [])
+                      if s.sensor_type == '力环']
+        ordered = [c for c in channel_options if c in force_ring] + [c for c in channel_options if c not in force_ring]
+
+        list_frame = tk.Frame(self)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.listboxes = []
+        for col, label in enumerate(("x 通道 (可多选):", "y 通道 (可多选):")):
+            tk.Label(list_frame, text=label).grid(row=0, column=col, sticky=tk.W, padx=5)
+            listbox = tk.Listbox(list_frame, selectmode=tk.MULTIPLE, exportselection=False, height=10, width=25)
+            listbox.grid(row=1, column=col, padx=5, sticky='nsew')
+            for ch_name in ordered:
+                listbox.insert(tk.END, ch_name)
+            self.listboxes.append(listbox)
+        tk.Label(list_frame, text="x / y 通道按列表顺序一一配对").grid(row=2, column=0, columnspan=2, sticky=tk.W, padx=5)
+
+        param_frame = tk.Frame(self)
+        param_frame.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(param_frame, text="转速通道:").grid(row=0, column=0, sticky=tk.W)
+        ttk.Combobox(param_frame, textvariable=self.tacho_channel_var, values=channel_options,
+                     state='readonly', width=15).grid(row=0, column=1, columnspan=3, sticky=tk.W)
+        tk.Label(param_frame, text="每沿角度(°):").grid(row=1, column=0, sticky=tk.W)
+        tk.Entry(param_frame, textvariable=self.deg_per_edge_var, width=6).grid(row=1, column=1, sticky=tk.W)
+        tk.Label(param_frame, text="阈值:").grid(row=1, column=2, sticky=tk.W)
+        tk.Entry(param_frame, textvariable=self.threshold_var, width=6).grid(row=1, column=3, sticky=tk.W)
+        tk.Label(param_frame, text="角度偏置(°,逗号分隔):").grid(row=2, column=0, sticky=tk.W)
+        tk.Entry(param_frame, textvariable=self.offsets_var, width=25).grid(row=2, column=1, columnspan=3, sticky=tk.W)
+
+        button_frame = tk.Frame(self)
+        button_frame.pack(pady=10)
+        tk.Button(button_frame, text="确定(创建通道)", command=self.on_ok).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="取消", command=self.destroy).pack(side=tk.LEFT, padx=5)
+
+    def on_ok(self):
+        x_channels = [self.listboxes[0].get(i) for i in self.listboxes[0].curselection()]
+        y_channels = [self.listboxes[1].get(i) for i in self.listboxes[1].curselection()]
+        if not x_channels or len(x_channels) != len(y_channels):
+            messagebox.showwarning("警告", "请选择数量相同的 x / y 通道！")
+            return
+        tacho_channel = self.tacho_channel_var.get()
+        if not tacho_channel:
+            messagebox.showwarning("警告", "请选择转速通道！")
+            return
+        try:
+            deg_per_edge = float(self.deg_per_edge_var.get())
+            threshold = float(self.threshold_var.get())
+            offsets = [float(o) for o in self.offsets_var.get().split(',') if o.strip()]
+        except ValueError:
+            messagebox.showwarning("警告", "每沿角度、阈值和角度偏置必须是数字！")
+            return
+        if deg_per_edge <= 0 or not offsets:
+            messagebox.showwarning("警告", "每沿角度必须为正数，且至少需要一个角度偏置！")
+            return
+
+        count = self.controller.create_frame_transform_channels(
+            list(zip(x_channels, y_channels)), tacho_channel, offsets, deg_per_edge, threshold)
+        if count == 0:
+            messagebox.showwarning("警告", "没有生成任何通道，请查看日志！")
+            return
+        messagebox.showinfo("成功", f"已生成 {count} 个坐标变换通道！")
+        self.destroy()
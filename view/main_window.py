@@ -4,6 +4,7 @@ import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.patches import Rectangle
 import numpy as np
 from matplotlib.font_manager import FontProperties
 import os
@@ -17,8 +18,10 @@ from pyoma2.algorithms.fdd import FDD
 from pyoma2.algorithms.ssi import SSIdat
 
 
-from .dialogs import UserDefineDialog, SensorSettingsDialog, OmaParamDialog
+from .dialogs import (UserDefineDialog, SensorSettingsDialog, OmaParamDialog, ModalResultsDialog, OdsResultsDialog,
+                      FrameTransformDialog)
 from model.data_models import SensorSettings
+from processor.feature_store import DEFAULT_ENVELOPE_BAND, track_times
 
 # 用户配置文件路径：放在项目根目录，保存上一次启动时的数据处理主界面的常用参数
 _BASE_DIR = os.path.dirname(os.path.dirname(__file__))
@@ -26,7 +29,7 @@ USER_SETTINGS_FILE = os.path.join(_BASE_DIR, "user_settings.json")
 
 class MainWindow(tk.Tk):
     """
-    主界面: 包含 Notebook, 数据处理, 频谱分析, 时域信号, 频响函数, 工作模态(OMA) 五个 Tab,
+    主界面: 包含 Notebook, 数据处理, 频谱分析, 时域信号, 频响函数, 工作模态(OMA), 阶次分析 等 Tab,
     以及用户自定义脚本等。
     """
     def __init__(self, controller):
@@ -96,6 +99,18 @@ class MainWindow(tk.Tk):
         self.output_folder_var = tk.StringVar()
         self.filename_prefix_var = tk.StringVar(value="激励")
         self.sampling_rate_var = tk.StringVar(value="25600")
+        # 加速度频域积分 (速度/位移) 变量
+        self.integrate_accel_var = tk.BooleanVar(value=False)
+        self.integration_highpass_var = tk.StringVar(value="2.0")
+        # 位移（电涡流）频域微分 (速度/加速度) 变量，低通截止 0 表示不限制
+        self.differentiate_disp_var = tk.BooleanVar(value=False)
+        self.differentiation_lowpass_var = tk.StringVar(value="0")
+        # FRF 帧平均的帧长（点）
+        self.frf_nperseg_var = tk.StringVar(value="4096")
+        # 力锤试验模式
+        self.impact_test_var = tk.BooleanVar(value=False)
+        self.impact_record_time_var = tk.StringVar(value="1.0")
+        self.impact_trigger_level_var = tk.StringVar(value="0.1")
         # 频谱分析变量
         self.freq_lower_display_var = tk.StringVar(value="1")
         self.freq_upper_display_var = tk.StringVar(value="500")
@@ -107,6 +122,8 @@ class MainWindow(tk.Tk):
         self.add_frequency_markers_var_spectrum = tk.BooleanVar()
         self.shaft_frequency_var_spectrum = tk.StringVar()
         self.blade_number_var_spectrum = tk.StringVar()
+        # ODS 参考通道（频率取上面的轴频 / 叶频标记）
+        self.ods_ref_var = tk.StringVar()
         self.reference_value_var_spectrum = tk.StringVar(value="1e-5")
         self.y_axis_db_var_spectrum = tk.BooleanVar()
         self.y_axis_scale_log_var_spectrum = tk.BooleanVar()
@@ -114,7 +131,41 @@ class MainWindow(tk.Tk):
         self.freq_to_remove_var = tk.StringVar(value="50,120")
         self.vk2_r_var = tk.StringVar(value="1000")
         self.vk2_filtord_var = tk.StringVar(value="1")
+        # 分块重叠求解的块长（秒），0 为整体求解
+        self.vk2_block_seconds_var = tk.StringVar(value="0")
+        # 多频率 / 多阶次联合求解（相近成分不重复计入能量）
+        self.vk2_joint_var = tk.BooleanVar(value=False)
         self.apply_freq_removal_var = tk.BooleanVar()
+        # 阶次跟踪 VK2：去除对象为 'frequency'（固定频率）或 'order'（按转速通道跟踪阶次）
+        self.vk2_mode_var = tk.StringVar(value="frequency")
+        self.order_list_var = tk.StringVar(value="1,2")
+        self.order_action_var = tk.StringVar(value="remove")
+        self.tacho_channel_var = tk.StringVar()
+        self.tacho_deg_per_edge_var = tk.StringVar(value="3.0")
+        self.tacho_threshold_var = tk.StringVar(value="2.5")
+        # 阶次分析变量（转速通道与脉冲参数与频谱页的阶次跟踪共用）
+        self.file_var_order = tk.StringVar()
+        self.channel_var_order = tk.StringVar()
+        self.order_max_var = tk.StringVar(value="20")
+        self.order_resolution_var = tk.StringVar(value="0.1")
+        self.order_all_files_var = tk.BooleanVar(value=False)
+        self.order_db_var = tk.BooleanVar(value=False)
+        # 瀑布图 / 坎贝尔图变量
+        self.order_plot_mode_var = tk.StringVar(value="spectrum")
+        self.campbell_nperseg_var = tk.StringVar(value="4096")
+        self.campbell_rpm_step_var = tk.StringVar(value="50")
+        self.campbell_axis_var = tk.StringVar(value="frequency")
+        self.campbell_order_lines_var = tk.StringVar(value="1,2,3")
+        self.campbell_ax = None
+        self.campbell_full_limits = None
+        # 时间同步平均变量
+        self.tsa_keyphasor_var = tk.BooleanVar(value=False)
+        self.tsa_points_var = tk.StringVar(value="")
+        # 阶次切片变量
+        self.slice_orders_var = tk.StringVar(value="1,2,3")
+        self.slice_rpm_step_var = tk.StringVar(value="50")
+        self.slice_method_var = tk.StringVar(value="fft")
+        self.campbell_zoom = None     # 框选缩放状态：{'start', 'rect', 'bg'}
         # 切分分析变量
         self.segment_mode_var = tk.BooleanVar(value=False)  # 是否启用切分模式
         self.segment_length_var = tk.StringVar(value="1.0")  # 切分长度（秒）
@@ -152,6 +203,8 @@ class MainWindow(tk.Tk):
         self.time_freq_type_var = tk.StringVar(value="STFT")
         # 时域特征指标选择
         self.time_feature_type_var = tk.StringVar(value="峭度")
+        # 滑动窗口统计特征的窗长（毫秒）
+        self.time_feature_window_var = tk.StringVar(value="10")
         # 增强包络的带通滤波范围
         self.envelope_bandpass_low_var = tk.StringVar(value="500")
         self.envelope_bandpass_high_var = tk.StringVar(value="5000")
@@ -184,6 +237,15 @@ class MainWindow(tk.Tk):
         self.blade_number_var_frf = tk.StringVar()
         self.y_axis_db_var_frf = tk.BooleanVar()
         self.y_axis_scale_log_var_frf = tk.BooleanVar()
+        # FRF 估计器选择与相干函数叠加显示
+        self.frf_estimator_var = tk.StringVar(value="H1")
+        self.show_coherence_var_frf = tk.BooleanVar(value=False)
+        # 多参考 FRF 矩阵的输入（参考）通道选择
+        self.ref_var_frf = tk.StringVar()
+        self.ref_options_frf = []
+        # 模态参数识别
+        self.modal_n_modes_var = tk.StringVar(value="3")
+        self.show_modal_fit_var_frf = tk.BooleanVar(value=False)
 
         # 通道选择变量
         self.channel_var_spectrum = tk.StringVar()
@@ -324,6 +386,13 @@ class MainWindow(tk.Tk):
     def _on_channel_selected_frf(self, event=None):
         self._sync_channel_selection('frf')
 
+    def _envelope_band(self):
+        """增强包络的带通范围 (下限, 上限)；输入无效时使用默认范围。"""
+        try:
+            return float(self.envelope_bandpass_low_var.get()), float(self.envelope_bandpass_high_var.get())
+        except ValueError:
+            return DEFAULT_ENVELOPE_BAND
+
     def _on_feature_type_changed(self, event=None):
         """当时域特征类型改变时，显示/隐藏带通滤波范围输入框"""
         feature_type = self.time_feature_type_var.get()
@@ -357,6 +426,11 @@ class MainWindow(tk.Tk):
         self.oma_tab = ttk.Frame(self.notebook)
         self.notebook.add(self.oma_tab, text='工作模态(OMA)')
         self.create_oma_widgets(self.oma_tab)
+
+        # 阶次分析选项卡
+        self.order_tab = ttk.Frame(self.notebook)
+        self.notebook.add(self.order_tab, text='阶次分析')
+        self.create_order_widgets()
         
         # Global Params 选项卡
         self.global_params_tab = ttk.Frame(self.notebook)
@@ -372,6 +446,7 @@ class MainWindow(tk.Tk):
         self.notebook.tab(2, state='disabled')  # 频谱分析
         self.notebook.tab(3, state='disabled')  # 频响函数
         self.notebook.tab(4, state='disabled')  # 工作模态(OMA)
+        self.notebook.tab(5, state='disabled')  # 阶次分析
 
     def enable_visualization_tabs(self):
         # 启用可视化选项卡 (注意索引变化)
@@ -379,6 +454,7 @@ class MainWindow(tk.Tk):
         self.notebook.tab(2, state='normal')  # 频谱分析
         self.notebook.tab(3, state='normal')  # 频响函数
         self.notebook.tab(4, state='normal')  # 工作模态(OMA)
+        self.notebook.tab(5, state='normal')  # 阶次分析
 
     def create_processing_widgets(self):
         # 创建数据处理页的组件
@@ -402,19 +478,56 @@ class MainWindow(tk.Tk):
         tk.Label(frame, text="采样率:").grid(row=3, column=0, sticky=tk.W, padx=5, pady=5)
         tk.Entry(frame, textvariable=self.sampling_rate_var, width=20).grid(row=3, column=1, padx=5, pady=5, sticky=tk.W)
 
+        # 加速度积分 / 位移微分 (omega 算法)
+        omega_frame = tk.Frame(frame)
+        omega_frame.grid(row=4, column=1, padx=5, pady=5, sticky=tk.W)
+        integrate_frame = tk.Frame(omega_frame)
+        integrate_frame.pack(anchor=tk.W)
+        tk.Checkbutton(integrate_frame, text="加速度积分为速度/位移",
+                       variable=self.integrate_accel_var).pack(side=tk.LEFT)
+        tk.Label(integrate_frame, text="高通截止(Hz):").pack(side=tk.LEFT, padx=5)
+        tk.Entry(integrate_frame, textvariable=self.integration_highpass_var, width=8).pack(side=tk.LEFT)
+        tk.Label(integrate_frame, text="FRF帧长(点):").pack(side=tk.LEFT, padx=5)
+        tk.Entry(integrate_frame, textvariable=self.frf_nperseg_var, width=8).pack(side=tk.LEFT)
+        differentiate_frame = tk.Frame(omega_frame)
+        differentiate_frame.pack(anchor=tk.W)
+        tk.Checkbutton(differentiate_frame, text="位移(电涡流)微分为速度/加速度",
+                       variable=self.differentiate_disp_var).pack(side=tk.LEFT)
+        tk.Label(differentiate_frame, text="低通截止(Hz，0为不限):").pack(side=tk.LEFT, padx=5)
+        tk.Entry(differentiate_frame, textvariable=self.differentiation_lowpass_var, width=8).pack(side=tk.LEFT)
+
+        # 力锤试验：敲击检测、加窗与多次平均
+        impact_frame = tk.Frame(frame)
+        impact_frame.grid(row=5, column=1, padx=5, pady=5, sticky=tk.W)
+        tk.Checkbutton(impact_frame, text="力锤试验模式",
+                       variable=self.impact_test_var).pack(side=tk.LEFT)
+        tk.Label(impact_frame, text="记录时长(s):").pack(side=tk.LEFT, padx=5)
+        tk.Entry(impact_frame, textvariable=self.impact_record_time_var, width=8).pack(side=tk.LEFT)
+        tk.Label(impact_frame, text="触发阈值(相对峰值):").pack(side=tk.LEFT, padx=5)
+        tk.Entry(impact_frame, textvariable=self.impact_trigger_level_var, width=8).pack(side=tk.LEFT)
+
         # 开始处理按钮
-        tk.Button(frame, text="开始处理", command=self.start_processing).grid(row=4, column=1, pady=10)
+        tk.Button(frame, text="开始处理", command=self.start_processing).grid(row=6, column=1, pady=10)
 
         # === 新增: 用户自定义按钮 ===
         # 仅在处理完成后再启用；可先默认 state='disabled'，处理完成后由 controller 启用
         self.user_define_btn = tk.Button(frame, text="用户自定义", state='disabled',
                                          command=self.open_user_define_dialog)
-        self.user_define_btn.grid(row=4, column=2, padx=5, pady=10)
+        self.user_define_btn.grid(row=6, column=2, padx=5, pady=10)
+
+        # 旋转 → 静止坐标变换（由转速通道得到瞬时转角），处理完成后启用
+        self.frame_transform_btn = tk.Button(frame, text="坐标变换", state='disabled',
+                                             command=self.open_frame_transform_dialog)
+        self.frame_transform_btn.grid(row=6, column=3, padx=5, pady=10)
+
+        # 批量导出 UFF58（时域 / 频谱 / FRF），处理完成后启用
+        self.export_uff_btn = tk.Button(frame, text="导出UFF", state='disabled', command=self.export_uff)
+        self.export_uff_btn.grid(row=6, column=0, padx=5, pady=10)
         # （示例把它放在与"开始处理"同一行，也可自行调整 row/column）
 
         # 日志显示
         self.log_text = scrolledtext.ScrolledText(frame, width=70, height=15)
-        self.log_text.grid(row=5, column=0, columnspan=3, padx=5, pady=5)
+        self.log_text.grid(row=7, column=0, columnspan=3, padx=5, pady=5)
 
     def select_input_folder(self):
         folder_selected = filedialog.askdirectory()
@@ -440,8 +553,20 @@ class MainWindow(tk.Tk):
         """
         if enabled:
             self.user_define_btn.config(state='normal')
+            self.export_uff_btn.config(state='normal')
+            self.frame_transform_btn.config(state='normal')
         else:
             self.user_define_btn.config(state='disabled')
+            self.export_uff_btn.config(state='disabled')
+            self.frame_transform_btn.config(state='disabled')
+
+    def export_uff(self):
+        """选择输出文件夹与格式，把全部结果批量导出为 UFF58。"""
+        folder = filedialog.askdirectory(title="选择 UFF 输出文件夹")
+        if not folder:
+            return
+        binary = messagebox.askyesno("UFF 格式", "是否导出为二进制 UFF58b？\n（选择\"否\"导出 ASCII UFF58）")
+        self.controller.export_uff(folder, binary=binary, estimator=self.frf_estimator_var.get())
 
     def open_user_define_dialog(self):
         """
@@ -460,6 +585,14 @@ class MainWindow(tk.Tk):
         # 如果需要更新界面，可以再调用 self.update_visualization_options(...)
         # 但控制器里通常会自动调用
 
+    def open_frame_transform_dialog(self):
+        """打开旋转 → 静止坐标变换对话框，结果由 Controller 作为新通道写回。"""
+        if self.controller.processing_results is None:
+            messagebox.showwarning("警告", "请先完成数据处理。")
+            return
+        dialog = FrameTransformDialog(self)
+        self.wait_window(dialog)
+
     def bind_copy_paste(self, root):
         for widget in root.winfo_children():
             if isinstance(widget, tk.Entry):
@@ -549,6 +682,35 @@ class MainWindow(tk.Tk):
         tk.Label(vk2_params_frame, text="滤波器阶数 filtord:").grid(row=1, column=0)
         tk.Entry(vk2_params_frame, textvariable=self.vk2_filtord_var, width=10).grid(row=1, column=1)
 
+        tk.Label(vk2_params_frame, text="分块长度 (s, 0=整体):").grid(row=2, column=0)
+        tk.Entry(vk2_params_frame, textvariable=self.vk2_block_seconds_var, width=10).grid(row=2, column=1)
+        tk.Checkbutton(vk2_params_frame, text="多成分联合求解", variable=self.vk2_joint_var).grid(row=3, column=0, columnspan=2, sticky=tk.W)
+
+        # 阶次跟踪：由转速脉冲通道得到瞬时轴频，按阶次提取 / 去除
+        mode_frame = tk.Frame(self.freq_removal_frame)
+        mode_frame.pack(anchor=tk.W, padx=5, pady=2)
+        tk.Radiobutton(mode_frame, text="固定频率", variable=self.vk2_mode_var, value="frequency").pack(side=tk.LEFT)
+        tk.Radiobutton(mode_frame, text="阶次跟踪", variable=self.vk2_mode_var, value="order").pack(side=tk.LEFT)
+
+        order_frame = tk.Frame(self.freq_removal_frame)
+        order_frame.pack(anchor=tk.W, padx=5, pady=2)
+        tk.Label(order_frame, text="转速通道:").grid(row=0, column=0, sticky=tk.W)
+        self.tacho_channel_menu = ttk.Combobox(order_frame, textvariable=self.tacho_channel_var,
+                                               values=self.channel_options, state='readonly', width=12)
+        self.tacho_channel_menu.grid(row=0, column=1, columnspan=2, sticky=tk.W)
+        tk.Label(order_frame, text="每沿角度(°):").grid(row=1, column=0, sticky=tk.W)
+        tk.Entry(order_frame, textvariable=self.tacho_deg_per_edge_var, width=6).grid(row=1, column=1, sticky=tk.W)
+        tk.Label(order_frame, text="阈值:").grid(row=1, column=2, sticky=tk.W)
+        tk.Entry(order_frame, textvariable=self.tacho_threshold_var, width=6).grid(row=1, column=3, sticky=tk.W)
+        tk.Label(order_frame, text="阶次 (逗号分隔):").grid(row=2, column=0, sticky=tk.W)
+        tk.Entry(order_frame, textvariable=self.order_list_var, width=12).grid(row=2, column=1, columnspan=2, sticky=tk.W)
+        tk.Radiobutton(order_frame, text="去除", variable=self.order_action_var, value="remove").grid(row=3, column=0, sticky=tk.W)
+        tk.Radiobutton(order_frame, text="仅保留", variable=self.order_action_var, value="extract").grid(row=3, column=1, sticky=tk.W)
+
+        # 按当前 VK2 设置清洗全部文件 × 通道，结果作为 “_VK2” 新通道写回
+        tk.Button(self.freq_removal_frame, text="批量清洗全部通道",
+                  command=self.controller.run_vk2_batch).pack(anchor=tk.W, padx=5, pady=5)
+
         # 频率显示范围
         tk.Label(control_frame, text="频率显示范围 (Hz):").pack(anchor=tk.W, padx=5, pady=5)
         freq_display_frame = tk.Frame(control_frame)
@@ -593,6 +755,15 @@ class MainWindow(tk.Tk):
         tk.Label(freq_marker_frame, text="叶片数:").pack(side=tk.LEFT)
         tk.Entry(freq_marker_frame, textvariable=self.blade_number_var_spectrum, width=10).pack(side=tk.LEFT)
 
+        # 工作变形 (ODS)：在上述标记频率处提取全部测点的幅值 / 相位
+        ods_frame = tk.Frame(control_frame)
+        ods_frame.pack(anchor=tk.W, padx=5, pady=5)
+        tk.Label(ods_frame, text="ODS参考:").pack(side=tk.LEFT)
+        self.ods_ref_menu = ttk.Combobox(ods_frame, textvariable=self.ods_ref_var, values=self.channel_options,
+                                         state='readonly', width=12)
+        self.ods_ref_menu.pack(side=tk.LEFT, padx=2)
+        tk.Button(ods_frame, text="提取 ODS", command=self.run_ods_extraction).pack(side=tk.LEFT, padx=5)
+
         # ====== 切分分析区域 ======
         ttk.Separator(control_frame, orient='horizontal').pack(fill='x', padx=5, pady=10)
         tk.Label(control_frame, text="── 切分分析 ──", font=('TkDefaultFont', 9, 'bold')).pack(anchor=tk.W, padx=5)
@@ -666,6 +837,33 @@ class MainWindow(tk.Tk):
         self.canvas_spectrum_analysis = FigureCanvasTkAgg(self.figure_spectrum_analysis, master=plot_frame)
         self.canvas_spectrum_analysis.get_tk_widget().pack(fill=tk.BOTH, expand=True)
 
+    def run_ods_extraction(self):
+        """在频率标记（1x/2x 轴频、叶频）处对全部文件提取 ODS，并以表格显示。"""
+        ref_name = self.ods_ref_var.get()
+        if not ref_name:
+            messagebox.showwarning("警告", "请选择 ODS 参考通道！")
+            return
+        try:
+            shaft_frequency = float(self.shaft_frequency_var_spectrum.get())
+            blade_number = int(self.blade_number_var_spectrum.get())
+        except ValueError:
+            messagebox.showwarning("警告", "轴频必须是数字，叶片数必须是整数！")
+            return
+
+        markers = [
+                ('1x轴频', shaft_frequency),
+                ('2x轴频', shaft_frequency * 2),
+                ('1x叶频', shaft_frequency * blade_number),
+                ('2x叶频', shaft_frequency * blade_number * 2)
+                ]
+        ods_results = self.controller.extract_ods(
+            ref_name, [f for _, f in markers], [label for label, _ in markers]
+        )
+        if not ods_results:
+            messagebox.showwarning("警告", "未能提取 ODS，请检查参考通道与处理结果！")
+            return
+        OdsResultsDialog(self, ods_results, self.controller.export_ods)
+
     def toggle_freq_removal_options(self):
         if self.apply_freq_removal_var.get():
             self.freq_removal_frame.pack(anchor=tk.W, padx=5, pady=5)
@@ -819,8 +1017,8 @@ class MainWindow(tk.Tk):
             messagebox.showwarning("警告", "请选择文件和通道！")
             return
 
-        # 获取时域数据
-        time_data = self.controller.get_time_domain_data(selected_file, selected_channel)
+        # 获取时域数据（勾选频率去除时为缓存的 VK2 清洗结果）
+        time_data = self.controller.get_cleaned_time_data(selected_file, selected_channel, use_truncation=False)
         if time_data is None:
             messagebox.showwarning("警告", "未找到对应的时域数据！")
             return
@@ -1019,8 +1217,8 @@ class MainWindow(tk.Tk):
         segment_time_vector = None  # 用于存储当前段的时间向量
 
         if segment_mode:
-            # 切分模式：从时域数据计算当前段的频谱
-            time_data = self.controller.get_time_domain_data(selected_file, selected_channel)
+            # 切分模式：从时域数据（勾选频率去除时为缓存的 VK2 清洗结果）计算当前段的频谱
+            time_data = self.controller.get_cleaned_time_data(selected_file, selected_channel, use_truncation=False)
             if time_data is None:
                 messagebox.showwarning("警告", "未找到对应的时域数据！")
                 return
@@ -1268,10 +1466,11 @@ class MainWindow(tk.Tk):
         if file_path:
             try:
                 # 将频率和幅值数据保存到文本文件
+                # 整列一次格式化，避免逐行拼接字符串
+                values = np.column_stack([self.current_freq_data, self.current_amplitude_data]).ravel()
                 with open(file_path, 'w', encoding='utf-8') as f:
                     f.write("频率(Hz)\t幅值\n")
-                    for freq, amp in zip(self.current_freq_data, self.current_amplitude_data):
-                        f.write(f"{freq}\t{amp}\n")
+                    f.write(("%s\t%s\n" * (len(values) // 2)) % tuple(values.tolist()))
                 messagebox.showinfo("成功", "数据已成功保存！")
             except Exception as e:
                 messagebox.showerror("错误", f"保存数据时发生错误：{e}")
@@ -1351,6 +1550,9 @@ class MainWindow(tk.Tk):
                                                values=feature_options, state='readonly', width=12)
         self.time_feature_menu.pack(side=tk.LEFT)
         self.time_feature_menu.bind('<<ComboboxSelected>>', self._on_feature_type_changed)
+        tk.Label(time_feature_frame, text="窗长(ms):").pack(side=tk.LEFT, padx=(5, 0))
+        tk.Entry(time_feature_frame, textvariable=self.time_feature_window_var, width=6).pack(side=tk.LEFT)
+        tk.Button(time_feature_frame, text="导出特征", command=self.export_feature_tracks).pack(side=tk.LEFT, padx=5)
 
         # 增强包络的带通滤波范围（默认隐藏）
         self.bandpass_frame = tk.Frame(control_frame)
@@ -1482,174 +1684,83 @@ class MainWindow(tk.Tk):
         feature_type = self.time_feature_type_var.get()
 
         try:
-            from scipy.stats import kurtosis, skew
-            from scipy.signal import hilbert
-
-            n_samples = len(data_segment)
+            # 整个通道的特征曲线由 controller.feature_store 预先计算，这里只取显示范围内的部分
+            window_seconds = float(self.time_feature_window_var.get()) / 1000.0
+            if window_seconds <= 0:
+                raise ValueError("窗长必须大于 0")
+            entry = self.controller.get_feature_tracks(selected_file, selected_channel, window_seconds,
+                                                       self._envelope_band())
+            if entry is None:
+                raise ValueError("未找到特征曲线")
+            all_times = track_times(entry, sampling_rate)
+            lo = np.searchsorted(all_times, time_absolute_start, side='left')
+            hi = np.searchsorted(all_times, time_absolute_end, side='right')
+            feature_times = all_times[lo:hi]
+            features = {key: values[lo:hi] for key, values in entry['tracks'].items()}
+            has_values = len(feature_times) > 0
 
             if feature_type == "TKEO":
-                # ====== Teager-Kaiser 能量算子 ======
-                # TKEO[n] = x[n]^2 - x[n-1] * x[n+1]
+                # ====== Teager-Kaiser 能量算子（平滑后的 |TKEO|）======
                 # 对冲击极其敏感，响应尖锐
-                tkeo = np.zeros(n_samples)
-                tkeo[1:-1] = data_segment[1:-1]**2 - data_segment[:-2] * data_segment[2:]
-                tkeo[0] = tkeo[1]
-                tkeo[-1] = tkeo[-2]
-
-                # 平滑处理（滑动平均）
-                smooth_window = max(int(sampling_rate * 0.002), 10)  # 2ms 窗口
-                kernel = np.ones(smooth_window) / smooth_window
-                tkeo_smooth = np.convolve(np.abs(tkeo), kernel, mode='same')
-
-                ax_kurtosis.plot(t_segment, tkeo_smooth, color='crimson', linewidth=0.5)
+                tkeo_smooth = features['tkeo']
+                if has_values:
+                    ax_kurtosis.plot(feature_times, tkeo_smooth, color='crimson', linewidth=0.5)
+                    # 标记高能量点
+                    threshold = np.mean(tkeo_smooth) + 3 * np.std(tkeo_smooth)
+                    ax_kurtosis.axhline(y=threshold, color='gray', linestyle='--', alpha=0.7, label=f'阈值 (μ+3σ)')
                 ax_kurtosis.set_ylabel("TKEO", fontproperties=self.font_prop)
                 ax_kurtosis.set_title("Teager-Kaiser 能量算子", fontproperties=self.font_prop, fontsize=9)
 
-                # 标记高能量点
-                threshold = np.mean(tkeo_smooth) + 3 * np.std(tkeo_smooth)
-                ax_kurtosis.axhline(y=threshold, color='gray', linestyle='--', alpha=0.7, label=f'阈值 (μ+3σ)')
-
             elif feature_type == "包络":
                 # ====== Hilbert 包络 ======
-                analytic_signal = hilbert(data_segment)
-                envelope = np.abs(analytic_signal)
-
-                ax_kurtosis.plot(t_segment, envelope, color='green', linewidth=0.5)
+                if has_values:
+                    ax_kurtosis.plot(feature_times, features['envelope'], color='green', linewidth=0.5)
                 ax_kurtosis.set_ylabel("包络幅值", fontproperties=self.font_prop)
                 ax_kurtosis.set_title("Hilbert 包络", fontproperties=self.font_prop, fontsize=9)
 
             elif feature_type == "增强包络":
                 # ====== 增强包络：带通滤波 + Hilbert 包络 + 平滑 ======
-                from scipy.signal import butter, filtfilt
-
-                # 获取带通滤波范围
-                try:
-                    bp_low = float(self.envelope_bandpass_low_var.get())
-                    bp_high = float(self.envelope_bandpass_high_var.get())
-                    nyquist = sampling_rate / 2
-                    # 确保频率范围有效
-                    bp_low = max(1, min(bp_low, nyquist * 0.95))
-                    bp_high = max(bp_low + 10, min(bp_high, nyquist * 0.95))
-                except ValueError:
-                    bp_low, bp_high = 500, 5000
-                    nyquist = sampling_rate / 2
-                    bp_high = min(bp_high, nyquist * 0.95)
-
-                # 设计带通滤波器
-                order = 4
-                low = bp_low / nyquist
-                high = bp_high / nyquist
-                b, a = butter(order, [low, high], btype='band')
-
-                # 应用带通滤波
-                filtered_data = filtfilt(b, a, data_segment)
-
-                # 提取 Hilbert 包络
-                analytic_signal = hilbert(filtered_data)
-                envelope = np.abs(analytic_signal)
-
-                # 平滑处理（低通滤波）
-                smooth_cutoff = 50  # 50 Hz 低通
-                smooth_cutoff_norm = smooth_cutoff / nyquist
-                if smooth_cutoff_norm < 1:
-                    b_smooth, a_smooth = butter(2, smooth_cutoff_norm, btype='low')
-                    envelope_smooth = filtfilt(b_smooth, a_smooth, envelope)
-                else:
-                    envelope_smooth = envelope
-
-                ax_kurtosis.plot(t_segment, envelope_smooth, color='darkgreen', linewidth=0.8)
+                bp_low, bp_high = entry['band']
+                if has_values:
+                    ax_kurtosis.plot(feature_times, features['enhanced_envelope'], color='darkgreen', linewidth=0.8)
                 ax_kurtosis.set_ylabel("增强包络", fontproperties=self.font_prop)
                 ax_kurtosis.set_title(f"增强包络 (带通: {bp_low:.0f}-{bp_high:.0f} Hz)",
                                      fontproperties=self.font_prop, fontsize=9)
 
             elif feature_type == "RMS":
-                # ====== 滑动窗口 RMS ======
-                window_samples = max(int(sampling_rate * 0.01), 64)
-                step = max(window_samples // 4, 1)
-
-                rms_values = []
-                rms_times = []
-                for i in range(0, n_samples - window_samples + 1, step):
-                    window_data = data_segment[i:i + window_samples]
-                    rms = np.sqrt(np.mean(window_data**2))
-                    rms_values.append(rms)
-                    center_idx = i + window_samples // 2
-                    rms_times.append(t_segment[min(center_idx, len(t_segment) - 1)])
-
-                if rms_values:
-                    ax_kurtosis.plot(rms_times, rms_values, color='purple', linewidth=0.8)
+                if has_values:
+                    ax_kurtosis.plot(feature_times, features['rms'], color='purple', linewidth=0.8)
                 ax_kurtosis.set_ylabel("RMS", fontproperties=self.font_prop)
                 ax_kurtosis.set_title("滑动窗口 RMS 能量", fontproperties=self.font_prop, fontsize=9)
 
             elif feature_type == "峰值因子":
-                # ====== 滑动窗口峰值因子 (Crest Factor) ======
                 # CF = Peak / RMS，检测冲击
-                window_samples = max(int(sampling_rate * 0.01), 64)
-                step = max(window_samples // 4, 1)
-
-                cf_values = []
-                cf_times = []
-                for i in range(0, n_samples - window_samples + 1, step):
-                    window_data = data_segment[i:i + window_samples]
-                    peak = np.max(np.abs(window_data))
-                    rms = np.sqrt(np.mean(window_data**2))
-                    cf = peak / (rms + 1e-12)
-                    cf_values.append(cf)
-                    center_idx = i + window_samples // 2
-                    cf_times.append(t_segment[min(center_idx, len(t_segment) - 1)])
-
-                if cf_values:
-                    cf_values = np.array(cf_values)
-                    ax_kurtosis.plot(cf_times, cf_values, color='teal', linewidth=0.8)
+                if has_values:
+                    ax_kurtosis.plot(feature_times, features['crest_factor'], color='teal', linewidth=0.8)
                     # 正弦波的峰值因子约为 1.414
                     ax_kurtosis.axhline(y=1.414, color='gray', linestyle='--', alpha=0.7, label='正弦波 (CF=1.414)')
                 ax_kurtosis.set_ylabel("峰值因子", fontproperties=self.font_prop)
                 ax_kurtosis.set_title("峰值因子 (Crest Factor)", fontproperties=self.font_prop, fontsize=9)
 
             elif feature_type == "偏度":
-                # ====== 滑动窗口偏度 (Skewness) ======
-                window_samples = max(int(sampling_rate * 0.01), 64)
-                step = max(window_samples // 4, 1)
-
-                skew_values = []
-                skew_times = []
-                for i in range(0, n_samples - window_samples + 1, step):
-                    window_data = data_segment[i:i + window_samples]
-                    s = skew(window_data)
-                    skew_values.append(s)
-                    center_idx = i + window_samples // 2
-                    skew_times.append(t_segment[min(center_idx, len(t_segment) - 1)])
-
-                if skew_values:
-                    ax_kurtosis.plot(skew_times, skew_values, color='brown', linewidth=0.8)
+                if has_values:
+                    ax_kurtosis.plot(feature_times, features['skewness'], color='brown', linewidth=0.8)
                     ax_kurtosis.axhline(y=0, color='gray', linestyle='--', alpha=0.7, label='对称分布 (S=0)')
                 ax_kurtosis.set_ylabel("偏度", fontproperties=self.font_prop)
                 ax_kurtosis.set_title("偏度 (Skewness)", fontproperties=self.font_prop, fontsize=9)
 
             else:
-                # ====== 默认：峭度 (Kurtosis) ======
-                window_samples = max(int(sampling_rate * 0.01), 64)
-                step = max(window_samples // 4, 1)
-
-                kurtosis_values = []
-                kurtosis_times = []
-                for i in range(0, n_samples - window_samples + 1, step):
-                    window_data = data_segment[i:i + window_samples]
-                    k = kurtosis(window_data, fisher=False)
-                    kurtosis_values.append(k)
-                    center_idx = i + window_samples // 2
-                    kurtosis_times.append(t_segment[min(center_idx, len(t_segment) - 1)])
-
-                if kurtosis_values:
-                    kurtosis_values = np.array(kurtosis_values)
-                    ax_kurtosis.plot(kurtosis_times, kurtosis_values, color='darkorange', linewidth=0.8)
+                # ====== 默认：峭度 ======
+                kurtosis_values = features['kurtosis']
+                if has_values:
+                    ax_kurtosis.plot(feature_times, kurtosis_values, color='darkorange', linewidth=0.8)
                     ax_kurtosis.axhline(y=3, color='gray', linestyle='--', alpha=0.7, label='正态分布 (K=3)')
 
                     # 标记高峭度点
                     high_threshold = 6
                     high_mask = kurtosis_values > high_threshold
                     if np.any(high_mask):
-                        ax_kurtosis.scatter(np.array(kurtosis_times)[high_mask],
+                        ax_kurtosis.scatter(feature_times[high_mask],
                                            kurtosis_values[high_mask],
                                            color='red', s=10, zorder=5, label=f'高峭度 (K>{high_threshold})')
 
@@ -2126,6 +2237,28 @@ class MainWindow(tk.Tk):
             self.figure_time.savefig(file_path)
             messagebox.showinfo("成功", "图片已保存！")
             
+    def export_feature_tracks(self):
+        selected_file = self.file_var_time.get()
+        if not selected_file:
+            messagebox.showwarning("警告", "请选择文件！")
+            return
+        try:
+            window_seconds = float(self.time_feature_window_var.get()) / 1000.0
+            if window_seconds <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showwarning("警告", "特征窗长必须为正数！")
+            return
+        file_path = filedialog.asksaveasfilename(title="导出时域特征", defaultextension=".txt",
+                                                 filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")],
+                                                 initialfile=f"{selected_file}_特征.txt")
+        if file_path:
+            try:
+                self.controller.export_feature_tracks(file_path, selected_file, window_seconds, self._envelope_band())
+                messagebox.showinfo("成功", "时域特征已导出！")
+            except Exception as e:
+                messagebox.showerror("错误", f"导出时域特征时发生错误：{e}")
+
     def truncate_signal(self):
         """
         截断当前选择的文件的所有通道信号，调用Controller生成新的分析结果集。
@@ -2251,6 +2384,19 @@ class MainWindow(tk.Tk):
         self.channel_menu_frf.pack(anchor=tk.W, padx=5, pady=5)
         self.channel_menu_frf.bind('<<ComboboxSelected>>', self._on_channel_selected_frf)
 
+        # 输入（参考）通道选择：多参考时从 FRF 矩阵中选取任意 输出/输入 对
+        tk.Label(control_frame, text="输入通道 (参考):").pack(anchor=tk.W, padx=5, pady=5)
+        self.ref_menu_frf = ttk.Combobox(control_frame, textvariable=self.ref_var_frf, values=self.ref_options_frf, state='readonly')
+        self.ref_menu_frf.pack(anchor=tk.W, padx=5, pady=5)
+
+        # FRF 估计器与相干函数
+        tk.Label(control_frame, text="FRF 估计器:").pack(anchor=tk.W, padx=5, pady=5)
+        estimator_frame = tk.Frame(control_frame)
+        estimator_frame.pack(anchor=tk.W, padx=5, pady=5)
+        ttk.Combobox(estimator_frame, textvariable=self.frf_estimator_var, values=["H1", "H2", "Hv"],
+                     state='readonly', width=6).pack(side=tk.LEFT)
+        tk.Checkbutton(estimator_frame, text="叠加相干函数", variable=self.show_coherence_var_frf).pack(side=tk.LEFT, padx=5)
+
         # 频率显示范围
         tk.Label(control_frame, text="频率显示范围 (Hz):").pack(anchor=tk.W, padx=5, pady=5)
         freq_display_frame = tk.Frame(control_frame)
@@ -2295,6 +2441,15 @@ class MainWindow(tk.Tk):
         tk.Label(freq_marker_frame, text="叶片数:").pack(side=tk.LEFT)
         tk.Entry(freq_marker_frame, textvariable=self.blade_number_var_frf, width=10).pack(side=tk.LEFT)
 
+        # 模态参数识别（频带取上方的频率显示范围）
+        modal_frame = tk.LabelFrame(control_frame, text="模态参数识别")
+        modal_frame.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(modal_frame, text="模态阶数:").grid(row=0, column=0, padx=3, pady=3, sticky=tk.E)
+        tk.Entry(modal_frame, textvariable=self.modal_n_modes_var, width=5).grid(row=0, column=1, sticky=tk.W)
+        tk.Button(modal_frame, text="识别模态", command=self.run_modal_fit).grid(row=0, column=2, padx=5)
+        tk.Checkbutton(modal_frame, text="显示拟合曲线与模态频率",
+                       variable=self.show_modal_fit_var_frf).grid(row=1, column=0, columnspan=3, sticky=tk.W)
+
         # 绘制按钮和保存按钮
         button_frame = tk.Frame(control_frame)
         button_frame.pack(pady=10)
@@ -2314,7 +2469,9 @@ class MainWindow(tk.Tk):
             return
 
         # 获取对应的 FRF 结果
-        frf_result = self.controller.get_frf_result(selected_file, selected_channel)
+        estimator = self.frf_estimator_var.get()
+        selected_ref = self.ref_var_frf.get() or None
+        frf_result = self.controller.get_frf_result(selected_file, selected_channel, estimator, selected_ref)
         if not frf_result:
             messagebox.showwarning("警告", "未找到对应的通道数据！")
             return
@@ -2390,8 +2547,13 @@ class MainWindow(tk.Tk):
             H_f_magnitude_to_plot = 20 * np.log10(H_f_magnitude_to_plot / reference_value + 1e-12)
             y_label = "幅值 (dB)"
 
-        ax.plot(freq_to_plot, H_f_magnitude_to_plot, label=selected_channel)
-        ax.set_title(f"频响函数 - {selected_channel}", fontproperties=self.font_prop)
+        ref_name = frf_result.get('ref_name')
+        estimator_label = frf_result.get('estimator', 'H1')
+        ax.plot(freq_to_plot, H_f_magnitude_to_plot, label=f"{selected_channel} ({estimator_label})")
+        if ref_name:
+            ax.set_title(f"频响函数 - {selected_channel} / {ref_name}", fontproperties=self.font_prop)
+        else:
+            ax.set_title(f"频响函数 - {selected_channel}", fontproperties=self.font_prop)
         ax.set_xlabel("频率 (Hz)", fontproperties=self.font_prop)
         ax.set_ylabel(y_label, fontproperties=self.font_prop)
         ax.legend(prop=self.font_prop)
@@ -2407,6 +2569,17 @@ class MainWindow(tk.Tk):
         if not y_axis_auto_scale:
             ax.set_ylim(y_axis_min, y_axis_max)
 
+        # 叠加相干函数（右侧 0~1 坐标轴）
+        ax_coh = None
+        coherence = frf_result.get('coherence')
+        if self.show_coherence_var_frf.get() and coherence is not None:
+            ax_coh = ax.twinx()
+            ax_coh.plot(freq_to_plot, coherence[idx], color='gray', linewidth=0.8, alpha=0.7)
+            ax_coh.set_ylim(0, 1.05)
+            # 多参考时（只有 H1）coherence 为该输出的多重相干
+            coherence_label = "相干函数" if 'H2' in frf_result.get('estimators', {}) else "多重相干"
+            ax_coh.set_ylabel(coherence_label, fontproperties=self.font_prop)
+
         # 添加频率标记
         if add_frequency_markers:
             marker_freqs = [
@@ -2422,6 +2595,24 @@ class MainWindow(tk.Tk):
                 ax.text(freq_value, y_position, label, rotation=90, verticalalignment='center',
                         color='r', fontproperties=self.font_prop)
 
+        # 叠加模态识别结果：RFP 合成曲线与各方法识别的固有频率
+        modal_fit = self.controller.get_modal_fit(selected_file, selected_channel) \
+            if self.show_modal_fit_var_frf.get() else None
+        if modal_fit is not None:
+            if modal_fit['fit_H'] is not None:
+                fit_mag = np.abs(modal_fit['fit_H'])
+                if y_axis_db:
+                    fit_mag = 20 * np.log10(fit_mag / reference_value + 1e-12)
+                ax.plot(modal_fit['fit_freq'], fit_mag, 'r--', linewidth=1.0, label="RFP 拟合")
+            method_styles = {'峰值拾取': ('g', ':'), '圆拟合': ('m', '-.'), 'RFP': ('r', '--')}
+            for method, freqs in modal_fit['freqs'].items():
+                color, style = method_styles.get(method, ('k', ':'))
+                for k, fn in enumerate(freqs):
+                    if np.isfinite(fn):
+                        ax.axvline(x=fn, color=color, linestyle=style, alpha=0.6,
+                                   label=method if k == 0 else None)
+            ax.legend(prop=self.font_prop)
+
         # 添加交互式光标
         vertical_line = ax.axvline(color='k', linestyle='--', alpha=0.5)
         horizontal_line = ax.axhline(color='k', linestyle='--', alpha=0.5)
@@ -2430,8 +2621,9 @@ class MainWindow(tk.Tk):
                                  fontsize=8, fontproperties=self.font_prop)
 
         def mouse_move(event):
-            if event.inaxes == ax:
-                x, y = event.xdata, event.ydata
+            if event.inaxes is not None and event.inaxes in (ax, ax_coh):
+                # 相干函数 twinx 轴叠加在主轴之上，统一换算回主轴的数据坐标
+                x, y = ax.transData.inverted().transform((event.x, event.y))
                 vertical_line.set_xdata([x, x])
                 horizontal_line.set_ydata([y, y])
                 annotation.xy = (x, y)
@@ -2447,6 +2639,33 @@ class MainWindow(tk.Tk):
         self.canvas_frf.mpl_connect('motion_notify_event', mouse_move)
         self.canvas_frf.draw()
 
+    def run_modal_fit(self):
+        """对全部文件的 FRF 批量做模态识别，频带取频率显示范围，结果以表格显示并可导出。"""
+        try:
+            f_low = float(self.freq_lower_display_var_frf.get())
+            f_high = float(self.freq_upper_display_var_frf.get())
+            n_modes = int(self.modal_n_modes_var.get())
+        except ValueError:
+            messagebox.showwarning("警告", "频率显示范围必须是数字，模态阶数必须是整数！")
+            return
+        if f_low >= f_high or n_modes < 1:
+            messagebox.showwarning("警告", "频率范围无效或模态阶数小于 1！")
+            return
+
+        rows = self.controller.estimate_modal_parameters(
+            f_low, f_high, n_modes,
+            estimator=self.frf_estimator_var.get(),
+            ref_name=self.ref_var_frf.get() or None
+        )
+        if not rows:
+            messagebox.showwarning("警告", "没有可用于模态识别的 FRF 结果！")
+            return
+
+        ModalResultsDialog(self, rows, self.controller.export_modal_table)
+        self.show_modal_fit_var_frf.set(True)
+        if self.file_var_frf.get() and self.channel_var_frf.get():
+            self.plot_frf()
+
     def save_frf_plot(self):
         selected_file = self.file_var_frf.get()
         selected_channel = self.channel_var_frf.get()
@@ -2461,6 +2680,483 @@ class MainWindow(tk.Tk):
             messagebox.showinfo("成功", "图片已保存！")
 
 
+    def create_order_widgets(self):
+        """阶次分析页：由转速通道做计算阶次跟踪（等角度重采样），绘制阶次谱。"""
+        frame = self.order_tab
+        frame.columnconfigure(0, weight=1)
+        frame.columnconfigure(1, weight=0)
+        frame.columnconfigure(2, weight=0)
+        frame.rowconfigure(0, weight=1)
+
+        plot_frame = ttk.Frame(frame)
+        plot_frame.grid(row=0, column=0, sticky='nsew')
+
+        toggle_frame = ttk.Frame(frame, width=10)
+        toggle_frame.grid(row=0, column=1, sticky='ns')
+        toggle_frame.rowconfigure(0, weight=1)
+        toggle_button = tk.Button(toggle_frame, text=">>")
+        toggle_button.grid(row=0, column=0)
+        toggle_button.config(command=lambda: self.toggle_frame(frame, control_frame, toggle_button))
+
+        control_frame = ttk.Frame(frame, width=300)
+        control_frame.grid(row=0, column=2, sticky='nsew')
+
+        # 转速通道与脉冲参数
+        tacho_frame = tk.LabelFrame(control_frame, text="转速信号")
+        tacho_frame.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(tacho_frame, text="转速通道:").grid(row=0, column=0, sticky=tk.W)
+        self.tacho_channel_menu_order = ttk.Combobox(tacho_frame, textvariable=self.tacho_channel_var,
+                                                     values=self.channel_options, state='readonly', width=14)
+        self.tacho_channel_menu_order.grid(row=0, column=1, columnspan=3, sticky=tk.W)
+        tk.Label(tacho_frame, text="每沿角度(°):").grid(row=1, column=0, sticky=tk.W)
+        tk.Entry(tacho_frame, textvariable=self.tacho_deg_per_edge_var, width=6).grid(row=1, column=1, sticky=tk.W)
+        tk.Label(tacho_frame, text="阈值:").grid(row=1, column=2, sticky=tk.W)
+        tk.Entry(tacho_frame, textvariable=self.tacho_threshold_var, width=6).grid(row=1, column=3, sticky=tk.W)
+
+        # 阶次谱参数
+        order_param_frame = tk.LabelFrame(control_frame, text="阶次谱参数")
+        order_param_frame.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(order_param_frame, text="最大阶次:").grid(row=0, column=0, sticky=tk.W)
+        tk.Entry(order_param_frame, textvariable=self.order_max_var, width=6).grid(row=0, column=1, sticky=tk.W)
+        tk.Label(order_param_frame, text="分辨率:").grid(row=0, column=2, sticky=tk.W)
+        tk.Entry(order_param_frame, textvariable=self.order_resolution_var, width=6).grid(row=0, column=3, sticky=tk.W)
+        tk.Button(order_param_frame, text="计算阶次谱", command=self.run_order_tracking).grid(
+            row=1, column=0, columnspan=4, pady=5)
+
+        # 瀑布图 / 坎贝尔图参数
+        campbell_frame = tk.LabelFrame(control_frame, text="瀑布图 / 坎贝尔图")
+        campbell_frame.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(campbell_frame, text="帧长:").grid(row=0, column=0, sticky=tk.W)
+        tk.Entry(campbell_frame, textvariable=self.campbell_nperseg_var, width=6).grid(row=0, column=1, sticky=tk.W)
+        tk.Label(campbell_frame, text="转速步长:").grid(row=0, column=2, sticky=tk.W)
+        tk.Entry(campbell_frame, textvariable=self.campbell_rpm_step_var, width=6).grid(row=0, column=3, sticky=tk.W)
+        tk.Label(campbell_frame, text="纵轴:").grid(row=1, column=0, sticky=tk.W)
+        tk.Radiobutton(campbell_frame, text="频率", variable=self.campbell_axis_var, value="frequency").grid(
+            row=1, column=1, sticky=tk.W)
+        tk.Radiobutton(campbell_frame, text="阶次", variable=self.campbell_axis_var, value="order").grid(
+            row=1, column=2, sticky=tk.W)
+        tk.Label(campbell_frame, text="阶次线:").grid(row=2, column=0, sticky=tk.W)
+        tk.Entry(campbell_frame, textvariable=self.campbell_order_lines_var, width=12).grid(
+            row=2, column=1, columnspan=3, sticky=tk.W)
+        tk.Button(campbell_frame, text="计算瀑布图", command=self.run_campbell).grid(
+            row=3, column=0, columnspan=4, pady=5)
+
+        # 时间同步平均
+        tsa_frame = tk.LabelFrame(control_frame, text="时间同步平均")
+        tsa_frame.pack(fill=tk.X, padx=5, pady=5)
+        tk.Checkbutton(tsa_frame, text="键相信号（每转一个脉冲）", variable=self.tsa_keyphasor_var).grid(
+            row=0, column=0, columnspan=4, sticky=tk.W)
+        tk.Label(tsa_frame, text="每转点数:").grid(row=1, column=0, sticky=tk.W)
+        tk.Entry(tsa_frame, textvariable=self.tsa_points_var, width=8).grid(row=1, column=1, sticky=tk.W)
+        tk.Label(tsa_frame, text="(留空自动)").grid(row=1, column=2, columnspan=2, sticky=tk.W)
+        tk.Button(tsa_frame, text="计算同步平均", command=self.run_tsa).grid(row=2, column=0, columnspan=4, pady=5)
+
+        # 阶次切片（全部文件批量）
+        slice_frame = tk.LabelFrame(control_frame, text="阶次切片（全部文件）")
+        slice_frame.pack(fill=tk.X, padx=5, pady=5)
+        tk.Label(slice_frame, text="阶次:").grid(row=0, column=0, sticky=tk.W)
+        tk.Entry(slice_frame, textvariable=self.slice_orders_var, width=12).grid(row=0, column=1, sticky=tk.W)
+        tk.Label(slice_frame, text="转速步长:").grid(row=0, column=2, sticky=tk.W)
+        tk.Entry(slice_frame, textvariable=self.slice_rpm_step_var, width=6).grid(row=0, column=3, sticky=tk.W)
+        tk.Label(slice_frame, text="方法:").grid(row=1, column=0, sticky=tk.W)
+        tk.Radiobutton(slice_frame, text="阶次跟踪FFT", variable=self.slice_method_var, value="fft").grid(
+            row=1, column=1, sticky=tk.W)
+        tk.Radiobutton(slice_frame, text="VK2", variable=self.slice_method_var, value="vk2").grid(
+            row=1, column=2, sticky=tk.W)
+        slice_buttons = tk.Frame(slice_frame)
+        slice_buttons.grid(row=2, column=0, columnspan=4, pady=5)
+        tk.Button(slice_buttons, text="批量提取", command=self.run_order_slices).pack(side=tk.LEFT, padx=5)
+        tk.Button(slice_buttons, text="导出表格", command=self.export_order_slices).pack(side=tk.LEFT, padx=5)
+
+        # 显示选项
+        tk.Label(control_frame, text="选择文件:").pack(anchor=tk.W, padx=5, pady=5)
+        self.file_menu_order = ttk.Combobox(control_frame, textvariable=self.file_var_order,
+                                            values=self.file_options, state='readonly')
+        self.file_menu_order.pack(anchor=tk.W, padx=5, pady=5)
+        tk.Checkbutton(control_frame, text="叠加全部文件", variable=self.order_all_files_var).pack(anchor=tk.W, padx=5)
+
+        tk.Label(control_frame, text="选择通道:").pack(anchor=tk.W, padx=5, pady=5)
+        self.channel_menu_order = ttk.Combobox(control_frame, textvariable=self.channel_var_order,
+                                               values=self.channel_options, state='readonly')
+        self.channel_menu_order.pack(anchor=tk.W, padx=5, pady=5)
+        tk.Checkbutton(control_frame, text="幅值以 dB 显示", variable=self.order_db_var).pack(anchor=tk.W, padx=5)
+        mode_frame = tk.Frame(control_frame)
+        mode_frame.pack(anchor=tk.W, padx=5)
+        tk.Radiobutton(mode_frame, text="阶次谱", variable=self.order_plot_mode_var, value="spectrum").pack(side=tk.LEFT)
+        tk.Radiobutton(mode_frame, text="瀑布图", variable=self.order_plot_mode_var, value="campbell").pack(side=tk.LEFT)
+        tk.Radiobutton(mode_frame, text="同步平均", variable=self.order_plot_mode_var, value="tsa").pack(side=tk.LEFT)
+        tk.Radiobutton(mode_frame, text="阶次切片", variable=self.order_plot_mode_var, value="slices").pack(side=tk.LEFT)
+
+        button_frame = tk.Frame(control_frame)
+        button_frame.pack(pady=10)
+        tk.Button(button_frame, text="绘制", command=self.plot_order_tab).pack(side=tk.LEFT, padx=5)
+        tk.Button(button_frame, text="保存图片", command=self.save_order_plot).pack(side=tk.LEFT, padx=5)
+
+        self.figure_order = plt.Figure(figsize=(8, 5))
+        self.canvas_order = FigureCanvasTkAgg(self.figure_order, master=plot_frame)
+        self.canvas_order.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        # 瀑布图框选缩放：拖动时只 blit 选框，松开后才整体重绘；右键恢复全图
+        self.canvas_order.mpl_connect('button_press_event', self._campbell_zoom_press)
+        self.canvas_order.mpl_connect('motion_notify_event', self._campbell_zoom_motion)
+        self.canvas_order.mpl_connect('button_release_event', self._campbell_zoom_release)
+
+    def run_order_tracking(self):
+        if self.controller.processing_results is None:
+            messagebox.showwarning("警告", "请先处理数据。")
+            return
+        tacho_channel = self.tacho_channel_var.get()
+        if not tacho_channel:
+            messagebox.showwarning("警告", "请选择转速通道！")
+            return
+        try:
+            deg_per_edge = float(self.tacho_deg_per_edge_var.get())
+            threshold = float(self.tacho_threshold_var.get())
+            max_order = float(self.order_max_var.get())
+            resolution = float(self.order_resolution_var.get())
+        except ValueError:
+            messagebox.showwarning("警告", "转速与阶次谱参数必须是数字！")
+            return
+        if deg_per_edge <= 0 or max_order <= 0 or resolution <= 0:
+            messagebox.showwarning("警告", "每沿角度、最大阶次和分辨率必须为正数！")
+            return
+
+        result = self.controller.compute_order_tracking(tacho_channel, deg_per_edge, threshold, max_order, resolution)
+        if result is None:
+            messagebox.showwarning("警告", "未能计算阶次谱，请检查转速通道与参数！")
+            return
+        self.plot_order_spectrum()
+
+    def plot_order_spectrum(self):
+        result = self.controller.order_results
+        if not result:
+            messagebox.showwarning("警告", "请先计算阶次谱！")
+            return
+        selected_channel = self.channel_var_order.get()
+        if not selected_channel:
+            messagebox.showwarning("警告", "请选择通道！")
+            return
+        if self.order_all_files_var.get():
+            file_names = list(result['files'])
+        else:
+            file_names = [self.file_var_order.get()]
+
+        self.campbell_ax = None
+        self.figure_order.clear()
+        ax = self.figure_order.add_subplot(111)
+        orders = result['orders']
+        plotted = 0
+        for file_name in file_names:
+            info = result['files'].get(file_name)
+            if info is None or selected_channel not in info['channels']:
+                continue
+            amplitude = info['amplitude'][info['channels'].index(selected_channel)]
+            if self.order_db_var.get():
+                amplitude = 20 * np.log10(amplitude + 1e-12)
+            ax.plot(orders, amplitude, label=f"{file_name} ({info['rpm_mean']:.0f} rpm)")
+            plotted += 1
+        if plotted == 0:
+            messagebox.showwarning("警告", "所选文件 / 通道没有阶次谱结果！")
+            return
+
+        ax.set_title(f"阶次谱 - {selected_channel}", fontproperties=self.font_prop)
+        ax.set_xlabel("阶次", fontproperties=self.font_prop)
+        ax.set_ylabel("幅值 (dB)" if self.order_db_var.get() else "幅值", fontproperties=self.font_prop)
+        ax.set_xlim(orders[0], orders[-1])
+        ax.legend(prop=self.font_prop)
+        ax.grid()
+        self.canvas_order.draw()
+
+    def plot_order_tab(self):
+        mode = self.order_plot_mode_var.get()
+        if mode == "campbell":
+            self.plot_campbell()
+        elif mode == "tsa":
+            self.plot_tsa()
+        elif mode == "slices":
+            self.plot_order_slices()
+        else:
+            self.plot_order_spectrum()
+
+    def run_campbell(self):
+        if self.controller.processing_results is None:
+            messagebox.showwarning("警告", "请先处理数据。")
+            return
+        file_name = self.file_var_order.get()
+        tacho_channel = self.tacho_channel_var.get()
+        if not file_name or not tacho_channel:
+            messagebox.showwarning("警告", "请选择文件和转速通道！")
+            return
+        try:
+            deg_per_edge = float(self.tacho_deg_per_edge_var.get())
+            threshold = float(self.tacho_threshold_var.get())
+            nperseg = int(self.campbell_nperseg_var.get())
+            rpm_step = float(self.campbell_rpm_step_var.get())
+            max_order = float(self.order_max_var.get())
+            resolution = float(self.order_resolution_var.get())
+        except ValueError:
+            messagebox.showwarning("警告", "瀑布图参数必须是数字！")
+            return
+        if deg_per_edge <= 0 or nperseg < 8 or rpm_step <= 0 or max_order <= 0 or resolution <= 0:
+            messagebox.showwarning("警告", "每沿角度、转速步长、最大阶次和分辨率必须为正数，帧长不小于 8！")
+            return
+
+        def on_done(done_file, result):
+            if self.file_var_order.get() == done_file:
+                self.order_plot_mode_var.set("campbell")
+                self.plot_campbell()
+
+        started = self.controller.compute_campbell(
+            file_name, tacho_channel, deg_per_edge, threshold, nperseg=nperseg, rpm_step=rpm_step,
+            axis=self.campbell_axis_var.get(), max_order=max_order, order_resolution=resolution, callback=on_done)
+        if not started:
+            messagebox.showwarning("警告", "无法计算瀑布图，请检查文件选择！")
+
+    def plot_campbell(self):
+        file_name = self.file_var_order.get()
+        result = self.controller.campbell_results.get(file_name)
+        if result is None:
+            messagebox.showwarning("警告", "请先计算该文件的瀑布图！")
+            return
+        selected_channel = self.channel_var_order.get()
+        if selected_channel not in result['channels']:
+            messagebox.showwarning("警告", "所选通道没有瀑布图结果！")
+            return
+
+        amplitude = result['amplitude'][result['channels'].index(selected_channel)]       # (B, F)
+        if self.order_db_var.get():
+            amplitude = 20 * np.log10(amplitude + 1e-12)
+        rpm, axis_values = result['rpm'], result['axis']
+        is_order = result['axis_type'] == 'order'
+
+        self.campbell_zoom = None
+        self.figure_order.clear()
+        ax = self.figure_order.add_subplot(111)
+        drpm = rpm[1] - rpm[0] if len(rpm) > 1 else 1.0
+        dy = axis_values[1] - axis_values[0]
+        mesh = ax.imshow(amplitude.T, origin='lower', aspect='auto', cmap='jet', interpolation='nearest',
+                         extent=(rpm[0] - drpm / 2, rpm[-1] + drpm / 2,
+                                 axis_values[0] - dy / 2, axis_values[-1] + dy / 2))
+        self.figure_order.colorbar(mesh, ax=ax).set_label("幅值 (dB)" if self.order_db_var.get() else "幅值",
+                                                          fontproperties=self.font_prop)
+
+        # 坎贝尔图：频率纵轴上叠加阶次线 f = 阶次 · rpm / 60
+        if not is_order:
+            try:
+                order_lines = [float(o) for o in self.campbell_order_lines_var.get().split(',') if o.strip()]
+            except ValueError:
+                order_lines = []
+            rpm_span = np.array([rpm[0] - drpm / 2, rpm[-1] + drpm / 2])
+            for order in order_lines:
+                ax.plot(rpm_span, order * rpm_span / 60.0, 'w--', linewidth=0.8)
+                ax.text(rpm_span[-1], order * rpm_span[-1] / 60.0, f"{order:g}X", color='w',
+                        fontsize=8, ha='right', va='bottom')
+            ax.set_ylim(axis_values[0], axis_values[-1])
+
+        ax.set_title(f"{'阶次' if is_order else '坎贝尔'}瀑布图 - {selected_channel}", fontproperties=self.font_prop)
+        ax.set_xlabel("转速 (rpm)", fontproperties=self.font_prop)
+        ax.set_ylabel("阶次" if is_order else "频率 (Hz)", fontproperties=self.font_prop)
+        self.campbell_ax = ax
+        self.campbell_full_limits = (ax.get_xlim(), ax.get_ylim())
+        self.canvas_order.draw()
+
+    def run_tsa(self):
+        if self.controller.processing_results is None:
+            messagebox.showwarning("警告", "请先处理数据。")
+            return
+        file_name = self.file_var_order.get()
+        tacho_channel = self.tacho_channel_var.get()
+        if not file_name or not tacho_channel:
+            messagebox.showwarning("警告", "请选择文件和转速通道！")
+            return
+        try:
+            deg_per_edge = float(self.tacho_deg_per_edge_var.get())
+            threshold = float(self.tacho_threshold_var.get())
+            points_text = self.tsa_points_var.get().strip()
+            points_per_rev = int(points_text) if points_text else None
+        except ValueError:
+            messagebox.showwarning("警告", "同步平均参数必须是数字！")
+            return
+        if deg_per_edge <= 0 or (points_per_rev is not None and points_per_rev < 8):
+            messagebox.showwarning("警告", "每沿角度必须为正数，每转点数不小于 8！")
+            return
+
+        result = self.controller.compute_tsa(file_name, tacho_channel, deg_per_edge, threshold, points_per_rev,
+                                             keyphasor=self.tsa_keyphasor_var.get())
+        if result is None:
+            messagebox.showwarning("警告", "未能计算同步平均，请检查转速通道与参数！")
+            return
+        self.order_plot_mode_var.set("tsa")
+        self.plot_tsa()
+
+    def plot_tsa(self):
+        file_name = self.file_var_order.get()
+        result = self.controller.tsa_results.get(file_name)
+        if result is None:
+            messagebox.showwarning("警告", "请先计算该文件的同步平均！")
+            return
+        selected_channel = self.channel_var_order.get()
+        if selected_channel not in result['channels']:
+            messagebox.showwarning("警告", "所选通道没有同步平均结果！")
+            return
+        k = result['channels'].index(selected_channel)
+
+        self.campbell_ax = None
+        self.figure_order.clear()
+        ax_avg = self.figure_order.add_subplot(211)
+        ax_avg.plot(result['angle'], result['average'][k])
+        ax_avg.set_title(f"时间同步平均 - {selected_channel}（{result['n_revolutions']} 转）",
+                         fontproperties=self.font_prop)
+        ax_avg.set_xlabel("转角 (°)", fontproperties=self.font_prop)
+        ax_avg.set_ylabel("幅值", fontproperties=self.font_prop)
+        ax_avg.set_xlim(0, 360)
+        ax_avg.grid()
+
+        ax_res = self.figure_order.add_subplot(212)
+        rev_index = np.arange(1, result['n_revolutions'] + 1)
+        ax_res.plot(rev_index, result['residual_rms'][k], label="残差 RMS")
+        ax_res.plot(rev_index, result['residual_peak'][k], label="残差峰值", alpha=0.7)
+        ax_res.set_xlabel("转数", fontproperties=self.font_prop)
+        ax_res.set_ylabel("残差", fontproperties=self.font_prop)
+        ax_res.legend(prop=self.font_prop)
+        ax_res.grid()
+        self.figure_order.tight_layout()
+        self.canvas_order.draw()
+
+    def run_order_slices(self):
+        if self.controller.processing_results is None:
+            messagebox.showwarning("警告", "请先处理数据。")
+            return
+        tacho_channel = self.tacho_channel_var.get()
+        if not tacho_channel:
+            messagebox.showwarning("警告", "请选择转速通道！")
+            return
+        try:
+            orders = [float(o) for o in self.slice_orders_var.get().split(',') if o.strip()]
+            slice_params = {
+                'method': self.slice_method_var.get(),
+                'orders': orders,
+                'rpm_step': float(self.slice_rpm_step_var.get()),
+                'deg_per_edge': float(self.tacho_deg_per_edge_var.get()),
+                'threshold': float(self.tacho_threshold_var.get()),
+                'resolution': float(self.order_resolution_var.get()),
+                'r': float(self.vk2_r_var.get()),
+                'filtord': int(self.vk2_filtord_var.get()),
+            }
+        except ValueError:
+            messagebox.showwarning("警告", "阶次切片参数必须是数字！")
+            return
+        if not orders or min(orders) <= 0 or slice_params['rpm_step'] <= 0 or slice_params['deg_per_edge'] <= 0 \
+                or slice_params['resolution'] <= 0:
+            messagebox.showwarning("警告", "阶次、转速步长、每沿角度和分辨率必须为正数！")
+            return
+
+        def on_done(results):
+            self.order_plot_mode_var.set("slices")
+            self.plot_order_slices()
+
+        if not self.controller.extract_order_slices(tacho_channel, slice_params, callback=on_done):
+            messagebox.showwarning("警告", "没有包含该转速通道的文件！")
+
+    def plot_order_slices(self):
+        results = self.controller.order_slice_results
+        if not results:
+            messagebox.showwarning("警告", "请先提取阶次切片！")
+            return
+        selected_channel = self.channel_var_order.get()
+        file_names = list(results) if self.order_all_files_var.get() else [self.file_var_order.get()]
+
+        self.campbell_ax = None
+        self.figure_order.clear()
+        ax = self.figure_order.add_subplot(111)
+        plotted = 0
+        for file_name in file_names:
+            res = results.get(file_name)
+            if res is None or selected_channel not in res['channels']:
+                continue
+            amplitude = res['amplitude'][res['channels'].index(selected_channel)]      # (O, B)
+            if self.order_db_var.get():
+                amplitude = 20 * np.log10(amplitude + 1e-12)
+            for order, row in zip(res['orders'], amplitude):
+                label = f"{order:g}阶" if len(file_names) == 1 else f"{file_name} {order:g}阶"
+                ax.plot(res['rpm'], row, marker='.', label=label)
+                plotted += 1
+        if plotted == 0:
+            messagebox.showwarning("警告", "所选文件 / 通道没有阶次切片结果！")
+            return
+
+        ax.set_title(f"阶次切片 - {selected_channel}", fontproperties=self.font_prop)
+        ax.set_xlabel("转速 (rpm)", fontproperties=self.font_prop)
+        ax.set_ylabel("幅值 (dB)" if self.order_db_var.get() else "幅值", fontproperties=self.font_prop)
+        ax.legend(prop=self.font_prop)
+        ax.grid()
+        self.canvas_order.draw()
+
+    def export_order_slices(self):
+        if not self.controller.order_slice_results:
+            messagebox.showwarning("警告", "请先提取阶次切片！")
+            return
+        file_path = filedialog.asksaveasfilename(title="导出阶次切片", defaultextension=".txt",
+                                                 filetypes=[("文本文件", "*.txt"), ("所有文件", "*.*")])
+        if file_path:
+            try:
+                self.controller.export_order_slices(file_path)
+                messagebox.showinfo("成功", "阶次切片已导出！")
+            except Exception as e:
+                messagebox.showerror("错误", f"导出阶次切片时发生错误：{e}")
+
+    def _campbell_zoom_press(self, event):
+        if self.campbell_ax is None or event.inaxes is not self.campbell_ax:
+            return
+        if event.button == 3:
+            xlim, ylim = self.campbell_full_limits
+            self.campbell_ax.set_xlim(xlim)
+            self.campbell_ax.set_ylim(ylim)
+            self.canvas_order.draw_idle()
+            return
+        if event.button != 1:
+            return
+        rect = Rectangle((event.xdata, event.ydata), 0, 0, fill=False, edgecolor='w', linestyle='--', animated=True)
+        self.campbell_ax.add_patch(rect)
+        self.campbell_zoom = {
+            'start': (event.xdata, event.ydata),
+            'rect': rect,
+            'bg': self.canvas_order.copy_from_bbox(self.campbell_ax.bbox),
+        }
+
+    def _campbell_zoom_motion(self, event):
+        zoom = self.campbell_zoom
+        if zoom is None or event.inaxes is not self.campbell_ax:
+            return
+        x0, y0 = zoom['start']
+        zoom['rect'].set_bounds(min(x0, event.xdata), min(y0, event.ydata),
+                                abs(event.xdata - x0), abs(event.ydata - y0))
+        # 只恢复背景并重绘选框
+        self.canvas_order.restore_region(zoom['bg'])
+        self.campbell_ax.draw_artist(zoom['rect'])
+        self.canvas_order.blit(self.campbell_ax.bbox)
+
+    def _campbell_zoom_release(self, event):
+        zoom = self.campbell_zoom
+        if zoom is None:
+            return
+        self.campbell_zoom = None
+        zoom['rect'].remove()
+        x0, y0 = zoom['start']
+        if event.inaxes is self.campbell_ax and event.xdata != x0 and event.ydata != y0:
+            self.campbell_ax.set_xlim(sorted((x0, event.xdata)))
+            self.campbell_ax.set_ylim(sorted((y0, event.ydata)))
+        self.canvas_order.draw_idle()
+
+    def save_order_plot(self):
+        selected_channel = self.channel_var_order.get()
+        default_filename = f"{self.file_var_order.get()}_{selected_channel}_order.png" if selected_channel else ""
+        file_path = filedialog.asksaveasfilename(title="保存图片", defaultextension=".png",
+                                                 filetypes=[("PNG 文件", "*.png"), ("JPEG 文件", "*.jpg"), ("所有文件", "*.*")],
+                                                 initialfile=default_filename)
+        if file_path:
+            self.figure_order.savefig(file_path)
+            messagebox.showinfo("成功", "图片已保存！")
+
     def create_oma_widgets(self, parent_frame):
         """
         在 OMA 选项卡上，用 grid() 来布置左侧 plot_frame、右侧 control_frame。
@@ -2559,6 +3255,8 @@ class MainWindow(tk.Tk):
         # ========== 5) 按钮区 =============
         ttk.Button(control_frame, text="绘制 SSI+FDD", command=self.plot_oma_combined).pack(padx=5, pady=5)
         ttk.Button(control_frame, text="保存 OMA 图", command=self.save_oma_figure).pack(padx=5, pady=5)
+        # FDD 奇异值直接取自互谱矩阵缓存（帧长用 nxseg），不经过 pyoma2
+        ttk.Button(control_frame, text="FDD 奇异值(互谱缓存)", command=self.plot_oma_fdd_from_csd).pack(padx=5, pady=5)
 
         tk.Label(control_frame, text="(此处可放更多设置)").pack(pady=10)
 
@@ -2759,6 +3457,56 @@ class MainWindow(tk.Tk):
 
 
 
+    def plot_oma_fdd_from_csd(self):
+        """用缓存的互谱矩阵绘制所选通道的 FDD 奇异值谱。"""
+        file_name = self.oma_file_var.get()
+        sel_indices = self.oma_channel_listbox.curselection()
+        if not file_name or not sel_indices:
+            messagebox.showwarning("警告", "请选择文件并至少选择一个通道！")
+            return
+        selected_channels = [self.oma_channel_listbox.get(i) for i in sel_indices]
+
+        try:
+            nxseg = int(self.oma_nxseg_var.get())
+            freq_min = float(self.freq_min_var.get())
+            freq_max = float(self.freq_max_var.get())
+        except ValueError:
+            messagebox.showwarning("警告", "nxseg 必须是整数，频率上下限应是数字！")
+            return
+        if freq_min < 0 or freq_min >= freq_max:
+            messagebox.showwarning("警告", "频率范围不合法，请检查输入！")
+            return
+
+        csm = self.controller.get_csd_matrix(file_name, nperseg=nxseg)
+        if csm is None:
+            messagebox.showerror("错误", "未能计算互谱矩阵，请检查文件/通道。")
+            return
+        missing = [ch for ch in selected_channels if ch not in csm.channel_names]
+        if missing:
+            messagebox.showwarning("警告", f"以下通道没有时域数据: {', '.join(missing)}")
+            return
+
+        singular_values = csm.singular_values(selected_channels)
+        idx = (csm.freq >= freq_min) & (csm.freq <= freq_max)
+
+        fig = plt.Figure(figsize=(8, 5))
+        ax = fig.add_subplot(111)
+        for k, sv in enumerate(singular_values):
+            ax.plot(csm.freq[idx], 10 * np.log10(sv[idx] + 1e-30), label=f"SV{k + 1}")
+        ax.set_title(f"FDD 奇异值 - {file_name}", fontproperties=self.font_prop)
+        ax.set_xlabel("频率 (Hz)", fontproperties=self.font_prop)
+        ax.set_ylabel("奇异值 (dB)", fontproperties=self.font_prop)
+        ax.set_xlim(freq_min, freq_max)
+        ax.legend(prop=self.font_prop)
+        ax.grid()
+
+        if self.canvas_oma:
+            self.canvas_oma.get_tk_widget().destroy()
+        self.fig_oma = fig
+        self.canvas_oma = FigureCanvasTkAgg(self.fig_oma, master=self.oma_tab)
+        self.canvas_oma.get_tk_widget().grid(row=0, column=0, sticky="nsew")
+        self.canvas_oma.draw()
+
     # ====== Global Params 相关方法 ======
     def create_global_params_widgets(self):
         """
@@ -2972,6 +3720,22 @@ class MainWindow(tk.Tk):
         self.channel_menu_spectrum['values'] = self.channel_options
         self.channel_menu_time['values']     = self.channel_options
         self.channel_menu_frf['values']      = self.channel_options
+        self.ods_ref_menu['values']          = self.channel_options
+        self.tacho_channel_menu['values']    = self.channel_options
+        self.tacho_channel_menu_order['values'] = self.channel_options
+        self.file_menu_order['values']       = self.file_options
+        self.channel_menu_order['values']    = self.channel_options
+        self.file_var_order.set(self.file_options[0] if self.file_options else '')
+
+        # FRF 输入通道：全部参考传感器，以及结果中实际出现的输入（如力锤试验的力锤通道）
+        self.ref_options_frf = [s.name for s in self.controller.sensor_settings if s.is_reference]
+        for file_result in results.files:
+            for frf_item in file_result.get('frf_results', []):
+                if frf_item.get('ref_name') and frf_item['ref_name'] not in self.ref_options_frf:
+                    self.ref_options_frf.append(frf_item['ref_name'])
+        self.ref_menu_frf['values'] = self.ref_options_frf
+        if self.ref_var_frf.get() not in self.ref_options_frf:
+            self.ref_var_frf.set(self.ref_options_frf[0] if self.ref_options_frf else '')
 
         old_file = self.oma_file_var.get()     # 先记下用户当前选的文件
         self.file_menu_oma['values'] = self.file_options  # 更新下拉值